@@ -2,6 +2,7 @@ from airflow import DAG
 from airflow.operators.python import PythonOperator
 from datetime import datetime, timedelta
 import os, json, sys
+import requests
 
 import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), 'growjo_scripts'))
@@ -79,6 +80,24 @@ def refresh_view(**context):
         cur.close()
         conn.close()
 
+def invalidate_competitor_cache(**context):
+    # The backend caches competitor lookups on COMPANY_MERGED_VIEW; drop them now the view is fresh
+    api_url = os.getenv("INVESTORINTEL_API_URL")
+    if not api_url:
+        print("⚠️ INVESTORINTEL_API_URL not set; backend competitor cache will expire on its TTL")
+        return
+    try:
+        response = requests.post(
+            f"{api_url.rstrip('/')}/cache/competitors/invalidate",
+            headers={"X-Admin-Token": os.getenv("ADMIN_TOKEN", "")},
+            timeout=30
+        )
+        response.raise_for_status()
+        print(f"✅ Invalidated competitor cache: {response.json()}")
+    except Exception as e:
+        # Not fatal: the cache TTL bounds how long stale competitors are served
+        print(f"⚠️ Failed to invalidate competitor cache: {e}")
+
 # Define Tasks
 scrape_task = PythonOperator(
     task_id='scrape_growjo_data',
@@ -108,5 +127,12 @@ view_task = PythonOperator(
     dag=dag
 )
 
+invalidate_cache_task = PythonOperator(
+    task_id='invalidate_competitor_cache',
+    python_callable=invalidate_competitor_cache,
+    provide_context=True,
+    dag=dag
+)
+
 # DAG Flow
-scrape_task >> upsert_task >> refine_task >> view_task
+scrape_task >> upsert_task >> refine_task >> view_task >> invalidate_cache_task
@@ -0,0 +1,90 @@
+import time
+import threading
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class LRUTTLCache:
+    """
+    Thread-safe in-process cache with a size bound and a time-to-live.
+
+    Entries are evicted least-recently-used first once `max_entries` is reached,
+    and treated as missing once they are older than `ttl_seconds`.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (stored_at, value), least recently used first
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                self._stats["misses"] += 1
+                return default
+            stored_at, value = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return default
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def get_or_load(self, key, loader):
+        """
+        Return the cached value for key, calling loader() to fill it on a miss.
+
+        The loader runs outside the lock, so a slow query never blocks hits on
+        other keys. Exceptions from the loader propagate and nothing is cached.
+        """
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = loader()
+            self.set(key, value)
+        return value
+
+    def invalidate(self, predicate=None) -> int:
+        """
+        Drop cached entries.
+
+        Args:
+            predicate: Optional callable taking a key; only matching keys are dropped.
+                Every entry is dropped when omitted.
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            if predicate is None:
+                removed = len(self._entries)
+                self._entries.clear()
+            else:
+                keys = [key for key in self._entries if predicate(key)]
+                for key in keys:
+                    del self._entries[key]
+                removed = len(keys)
+            self._stats["invalidations"] += removed
+            return removed
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "size": len(self._entries),
+                **self._stats,
+            }
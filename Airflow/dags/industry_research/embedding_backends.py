@@ -0,0 +1,153 @@
+import os
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+# "torch" runs the model with sentence-transformers; "onnx" runs the int8 export with onnxruntime
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+# Directory written by export_onnx_model (model_quantized.onnx and tokenizer.json)
+ONNX_MODEL_DIR = os.getenv(
+    "ONNX_MODEL_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "models", "all-MiniLM-L6-v2-onnx-int8")
+)
+# onnxruntime intra-op threads per worker; 0 lets onnxruntime use every core
+ONNX_THREADS = int(os.getenv("ONNX_THREADS", "0"))
+
+# sentence-transformers truncates all-MiniLM-L6-v2 inputs to 256 tokens
+MAX_SEQ_LENGTH = 256
+ONNX_MODEL_FILE = "model_quantized.onnx"
+
+
+def mean_pool_normalize(token_embeddings: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+    """
+    Average token embeddings over the non-padding tokens and L2-normalize.
+
+    This is the Pooling + Normalize head of all-MiniLM-L6-v2, applied to the
+    transformer output (batch, sequence, hidden).
+    """
+    mask = attention_mask[..., None].astype(np.float32)
+    summed = (token_embeddings * mask).sum(axis=1)
+    pooled = summed / np.clip(mask.sum(axis=1), 1e-9, None)
+    norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+    return (pooled / np.clip(norms, 1e-12, None)).astype(np.float32)
+
+
+class OnnxSentenceEncoder:
+    """
+    all-MiniLM-L6-v2 exported to ONNX and int8-quantized, run with onnxruntime on CPU.
+
+    Implements the part of SentenceTransformer.encode used in this repo, without
+    importing torch: a string gives a 1-D embedding, a list gives a 2-D array.
+    Embeddings are always normalized, like the original model's output.
+    """
+
+    def __init__(self, model_dir: str = ONNX_MODEL_DIR, max_length: int = MAX_SEQ_LENGTH, threads: int = ONNX_THREADS):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding(pad_id=0, pad_token="[PAD]")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, ONNX_MODEL_FILE), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+    def encode(self, sentences, batch_size: int = 32, **kwargs):
+        """
+        Embed one sentence or a list of sentences.
+
+        Args:
+            sentences: A string or a list of strings
+            batch_size: Sentences per onnxruntime call
+
+        Returns:
+            float32 array of shape (384,) for a string, (len(sentences), 384) for a list
+        """
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        batches = []
+        for start in range(0, len(texts), batch_size):
+            encodings = self.tokenizer.encode_batch(texts[start:start + batch_size])
+            feeds = {
+                "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+                "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+                "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+            }
+            token_embeddings = self.session.run(None, {k: v for k, v in feeds.items() if k in self._input_names})[0]
+            batches.append(mean_pool_normalize(token_embeddings, feeds["attention_mask"]))
+        embeddings = np.concatenate(batches) if batches else np.zeros((0, 384), dtype=np.float32)
+        return embeddings[0] if single else embeddings
+
+
+def load_embedding_model(model_name: str = EMBEDDING_MODEL_NAME, backend: str = None):
+    """
+    Load the embedding model with the configured backend.
+
+    The ONNX backend serves only all-MiniLM-L6-v2; if its export is missing or
+    onnxruntime is not installed, the torch backend is used instead.
+
+    Args:
+        model_name: sentence-transformers model name
+        backend: "torch" or "onnx" (defaults to EMBEDDING_BACKEND)
+
+    Returns:
+        An object with a SentenceTransformer-compatible encode()
+    """
+    backend = (backend or EMBEDDING_BACKEND).lower()
+    if backend == "onnx" and model_name.endswith("all-MiniLM-L6-v2"):
+        try:
+            model = OnnxSentenceEncoder(ONNX_MODEL_DIR)
+            print(f"Embedding model initialized: {model_name} (onnx int8, {ONNX_MODEL_DIR})")
+            return model
+        except Exception as e:
+            print(f"ONNX embedding backend unavailable, falling back to torch: {e}")
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name)
+
+
+def export_onnx_model(model_name: str = EMBEDDING_MODEL_NAME, output_dir: str = ONNX_MODEL_DIR):
+    """
+    Export the transformer to ONNX, quantize its weights to int8 and save the tokenizer.
+
+    Needs torch, transformers and onnxruntime; run it once wherever those are
+    installed and ship output_dir with the serving image.
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    os.makedirs(output_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    transformer = AutoModel.from_pretrained(model_name).eval()
+
+    class TokenEmbeddings(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            return self.model(input_ids=input_ids, attention_mask=attention_mask, token_type_ids=token_type_ids)[0]
+
+    names = ["input_ids", "attention_mask", "token_type_ids"]
+    sample = tokenizer(["An example sentence to trace the model with"], return_tensors="pt")
+    fp32_path = os.path.join(output_dir, "model.onnx")
+    torch.onnx.export(
+        TokenEmbeddings(transformer),
+        tuple(sample[name] for name in names),
+        fp32_path,
+        input_names=names,
+        output_names=["token_embeddings"],
+        dynamic_axes={name: {0: "batch", 1: "sequence"} for name in names + ["token_embeddings"]},
+        opset_version=14
+    )
+    quantize_dynamic(fp32_path, os.path.join(output_dir, ONNX_MODEL_FILE), weight_type=QuantType.QInt8)
+    tokenizer.save_pretrained(output_dir)
+    print(f"Exported {model_name} to {output_dir}")
@@ -0,0 +1,212 @@
+import os
+import time
+import sqlite3
+import hashlib
+import tempfile
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# SQLite file recording which Pinecone vector IDs are live for each document.
+# Every process that writes or compacts an index must use the same file.
+VECTOR_MANIFEST_DB = os.getenv(
+    "VECTOR_MANIFEST_DB",
+    os.path.join(tempfile.gettempdir(), "investorintel_vector_manifest.sqlite")
+)
+
+# Compaction deletes every vector of a known document that the manifest does not keep, so it
+# is refused unless VECTOR_MANIFEST_DB is set explicitly to a file shared by every writer
+# (the /tmp default is private to one container)
+VECTOR_MANIFEST_SHARED = bool(os.getenv("VECTOR_MANIFEST_DB"))
+
+# IDs listed, fetched and deleted per Pinecone call during compaction
+COMPACTION_BATCH_SIZE = 100
+
+
+def content_vector_id(document_id: str, text: str) -> str:
+    """Deterministic Pinecone ID for a piece of a document, derived from its text"""
+    return f"{document_id.replace(' ', '_')}_{hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]}"
+
+
+class VectorManifest:
+    """
+    Record of the live vector IDs of every document written to a Pinecone index.
+
+    A write marks its IDs "pending" before upserting and "live" once Pinecone has
+    accepted them; the document's other IDs are then superseded. Compaction deletes
+    every vector of a known document that the manifest does not keep, which also
+    removes vectors written before the manifest existed.
+    """
+
+    def __init__(self, path: str = VECTOR_MANIFEST_DB):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS vector_manifest (
+                    index_name  TEXT,
+                    vector_id   TEXT,
+                    document_id TEXT,
+                    state       TEXT,
+                    updated_at  REAL,
+                    PRIMARY KEY (index_name, vector_id)
+                )
+            """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS vector_manifest_document ON vector_manifest (index_name, document_id)"
+            )
+            self._conn.commit()
+
+    def live_ids(self, index_name: str, document_id: str) -> set:
+        """IDs of the document already stored in the index; upserting them again can be skipped"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT vector_id FROM vector_manifest WHERE index_name = ? AND document_id = ? AND state = 'live'",
+                (index_name, document_id)
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def begin(self, index_name: str, document_id: str, vector_ids):
+        """Mark the IDs about to be upserted as pending, so compaction keeps them if the write is interrupted"""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO vector_manifest (index_name, vector_id, document_id, state, updated_at) "
+                "VALUES (?, ?, ?, 'pending', ?)",
+                [(index_name, vector_id, document_id, time.time()) for vector_id in vector_ids]
+            )
+            self._conn.commit()
+
+    def commit(self, index_name: str, document_id: str, vector_ids) -> list:
+        """
+        Make vector_ids the document's complete live set.
+
+        Args:
+            index_name: Pinecone index the vectors were written to
+            document_id: Startup name or report ID the vectors belong to
+            vector_ids: Every ID of the current version of the document
+
+        Returns:
+            IDs of the document's previous version that are no longer live
+        """
+        vector_ids = set(vector_ids)
+        now = time.time()
+        with self._lock:
+            previous = {row[0] for row in self._conn.execute(
+                "SELECT vector_id FROM vector_manifest WHERE index_name = ? AND document_id = ?",
+                (index_name, document_id)
+            )}
+            superseded = sorted(previous - vector_ids)
+            self._conn.executemany(
+                "DELETE FROM vector_manifest WHERE index_name = ? AND vector_id = ?",
+                [(index_name, vector_id) for vector_id in superseded]
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO vector_manifest (index_name, vector_id, document_id, state, updated_at) "
+                "VALUES (?, ?, ?, 'live', ?)",
+                [(index_name, vector_id, document_id, now) for vector_id in vector_ids]
+            )
+            self._conn.commit()
+        return superseded
+
+    def kept_ids(self, index_name: str, vector_ids) -> set:
+        """The subset of vector_ids that is live or pending in the index"""
+        vector_ids = list(vector_ids)
+        if not vector_ids:
+            return set()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT vector_id FROM vector_manifest WHERE index_name = ? "
+                f"AND vector_id IN ({', '.join('?' * len(vector_ids))})",
+                (index_name, *vector_ids)
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def snapshot(self, index_name: str):
+        """Return (known document IDs, IDs to keep) for compacting an index"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT document_id, vector_id FROM vector_manifest WHERE index_name = ?", (index_name,)
+            ).fetchall()
+        return {row[0] for row in rows}, {row[1] for row in rows}
+
+    def metrics(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT index_name, COUNT(DISTINCT document_id), SUM(state = 'live'), SUM(state = 'pending') "
+                "FROM vector_manifest GROUP BY index_name"
+            ).fetchall()
+        return {name: {"documents": documents, "live": live, "pending": pending}
+                for name, documents, live, pending in rows}
+
+
+_manifest = None
+_manifest_lock = threading.Lock()
+
+
+def get_vector_manifest() -> VectorManifest:
+    """Return the process-wide manifest, opening the SQLite file on first use"""
+    global _manifest
+    if _manifest is None:
+        with _manifest_lock:
+            if _manifest is None:
+                _manifest = VectorManifest()
+    return _manifest
+
+
+def compact_index(index, index_name: str, document_field: str, manifest: VectorManifest = None,
+                  dry_run: bool = False, batch_size: int = COMPACTION_BATCH_SIZE) -> dict:
+    """
+    Delete superseded and orphaned vectors from a Pinecone index.
+
+    Pages through every ID in the index, fetches the metadata and deletes vectors
+    whose document (metadata[document_field]) is in the manifest but which are
+    not among that document's kept IDs. Vectors of documents the manifest has
+    never seen are left alone. Each delete batch is checked against the manifest
+    again, so IDs a concurrent write has begun since the scan are kept.
+
+    Args:
+        index: Pinecone index handle
+        index_name: Name the index is recorded under in the manifest
+        document_field: Metadata field holding the document ID ("startup_name" or "document_id")
+        manifest: Manifest to compact against (defaults to the process-wide one)
+        dry_run: Only count what would be deleted
+
+    Returns:
+        dict with the number of vectors scanned and deleted (or to delete, for a dry run),
+        and the deleted IDs as deleted_ids
+
+    Raises:
+        RuntimeError: If no manifest is passed and VECTOR_MANIFEST_DB is not configured
+    """
+    if manifest is None and not VECTOR_MANIFEST_SHARED:
+        raise RuntimeError("Compaction needs VECTOR_MANIFEST_DB set to a manifest shared by every writer")
+    manifest = manifest or get_vector_manifest()
+    documents, keep = manifest.snapshot(index_name)
+    scanned = 0
+    stale = []
+    for ids in index.list(limit=batch_size):
+        ids = list(ids)
+        scanned += len(ids)
+        ids = [vector_id for vector_id in ids if vector_id not in keep]
+        if not ids:
+            continue
+        response = index.fetch(ids=ids)
+        vectors = response.vectors if hasattr(response, "vectors") else response["vectors"]
+        for vector_id, vector in vectors.items():
+            metadata = (vector.get("metadata") if isinstance(vector, dict) else vector.metadata) or {}
+            if metadata.get(document_field) in documents:
+                stale.append(vector_id)
+    deleted_ids = []
+    if not dry_run:
+        for start in range(0, len(stale), batch_size):
+            batch = stale[start:start + batch_size]
+            kept = manifest.kept_ids(index_name, batch)
+            batch = [vector_id for vector_id in batch if vector_id not in kept]
+            if batch:
+                index.delete(ids=batch)
+                deleted_ids.extend(batch)
+    deleted = len(stale) if dry_run else len(deleted_ids)
+    print(f"Compaction of '{index_name}': {deleted} stale vectors {'found' if dry_run else 'deleted'}")
+    return {"index": index_name, "scanned": scanned, "deleted": deleted, "dry_run": dry_run,
+            "deleted_ids": deleted_ids}
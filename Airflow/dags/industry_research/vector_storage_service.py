@@ -1,11 +1,25 @@
 import os
-from sentence_transformers import SentenceTransformer
+import itertools
+import requests
 from dotenv import load_dotenv
 from pinecone import Pinecone, ServerlessSpec
 
+try:
+    from text_store import text_store
+    from vector_manifest import get_vector_manifest, content_vector_id, compact_index
+    from embedding_backends import load_embedding_model
+except ImportError:
+    from .text_store import text_store
+    from .vector_manifest import get_vector_manifest, content_vector_id, compact_index
+    from .embedding_backends import load_embedding_model
+
 # Load environment variables
 load_dotenv()
 
+# Chunks embedded per model forward pass, and vectors sent per Pinecone upsert
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+PINECONE_UPSERT_BATCH_SIZE = int(os.getenv("PINECONE_UPSERT_BATCH_SIZE", "100"))
+
 # Global model cache for efficiency
 _model = None
 
@@ -14,12 +28,12 @@ def get_embedding_model(model_name="sentence-transformers/all-MiniLM-L6-v2"):
     global _model
     if _model is None:
         try:
-            _model = SentenceTransformer(model_name)
+            _model = load_embedding_model(model_name)
             print(f"Embedding model initialized: {model_name}")
         except Exception as e:
             print(f"Error initializing embedding model: {str(e)}")
             try:
-                _model = SentenceTransformer("all-MiniLM-L6-v2")
+                _model = load_embedding_model("all-MiniLM-L6-v2")
                 print("Using fallback model: all-MiniLM-L6-v2")
             except Exception as e2:
                 raise Exception(f"Failed to initialize embedding model: {str(e2)}")
@@ -34,8 +48,76 @@ def generate_embeddings(text, model_name="sentence-transformers/all-MiniLM-L6-v2
     else:
         return model.encode(text).tolist()
 
+def generate_embeddings_batch(texts, batch_size=EMBEDDING_BATCH_SIZE, model_name="sentence-transformers/all-MiniLM-L6-v2"):
+    """Embed a list of texts, batch_size texts per forward pass"""
+    model = get_embedding_model(model_name)
+    return model.encode(list(texts), batch_size=batch_size).tolist()
+
+def embed_chunks(chunks, metadata, batch_size=EMBEDDING_BATCH_SIZE, index_name="deloitte-reports"):
+    """
+    Lazily embed document chunks in batches, in the format store_in_pinecone expects.
+
+    Each batch is encoded only when the consumer reaches it, so store_in_pinecone
+    upserts earlier chunks before later ones are embedded and only one batch of
+    embeddings is held at a time. Embedding and upserting alternate in the
+    calling thread; they do not run concurrently. Chunks whose content-derived
+    ID is already live in index_name are not embedded again; they are yielded
+    with embedding None so they stay part of the document.
+
+    Args:
+        chunks: List of chunk texts
+        metadata: Metadata shared by every chunk (industry, year, document_id)
+        batch_size: Chunks per model forward pass
+        index_name: Index the chunks will be stored in
+
+    Yields:
+        Dicts with id, content, embedding and metadata
+    """
+    live = get_vector_manifest().live_ids(index_name, metadata['document_id'])
+    items = [
+        {'id': content_vector_id(metadata['document_id'], chunk), 'content': chunk, 'embedding': None, 'metadata': metadata}
+        for chunk in chunks
+    ]
+    for start in range(0, len(items), batch_size):
+        batch = items[start:start + batch_size]
+        changed = [item for item in batch if item['id'] not in live]
+        if changed:
+            embeddings = generate_embeddings_batch([item['content'] for item in changed], batch_size=batch_size)
+            for item, embedding in zip(changed, embeddings):
+                item['embedding'] = embedding
+        yield from batch
+
+def invalidate_chat_cache(vector_ids):
+    """Ask the backend to drop cached /chat answers built from vector_ids, e.g. chunks replaced or deleted here"""
+    vector_ids = sorted(set(vector_ids))
+    if not vector_ids:
+        return
+    api_url = os.getenv("INVESTORINTEL_API_URL")
+    if not api_url:
+        print("⚠️ INVESTORINTEL_API_URL not set; backend chat cache will expire on its TTL")
+        return
+    try:
+        response = requests.post(
+            f"{api_url.rstrip('/')}/cache/chat/invalidate",
+            json=vector_ids,
+            headers={"X-Admin-Token": os.getenv("ADMIN_TOKEN", "")},
+            timeout=30
+        )
+        response.raise_for_status()
+        print(f"✅ Invalidated chat cache for {len(vector_ids)} vectors: {response.json()}")
+    except Exception as e:
+        # Not fatal: the cache TTL bounds how long stale answers are served
+        print(f"⚠️ Failed to invalidate chat cache: {e}")
+
 def store_in_pinecone(embeddings_data, index_name="deloitte-reports"):
-    """Store embeddings data in Pinecone"""
+    """
+    Store embeddings data in Pinecone.
+
+    Vector IDs are derived from each chunk's content, so storing a document again
+    only upserts changed chunks (items with no embedding are kept as is). Once the
+    upserts succeed, the document's chunks that are no longer present are deleted,
+    and the backend drops cached chat answers built from the new or deleted chunks.
+    """
     try:
         # Initialize Pinecone if not already initialized
         api_key = os.getenv("PINECONE_API_KEY")
@@ -45,10 +127,14 @@ def store_in_pinecone(embeddings_data, index_name="deloitte-reports"):
             
         pc = Pinecone(api_key=api_key)
         
+        # embeddings_data may be a generator (see embed_chunks); look at the first item only
+        items = iter(embeddings_data)
+        first_item = next(items, None)
+        
         # Check if index exists
         if index_name not in [idx["name"] for idx in pc.list_indexes()]:
             # Get dimension from first embedding
-            dimension = len(embeddings_data[0]['embedding'])
+            dimension = len(first_item['embedding'])
             
             # Create index with the right dimension
             pc.create_index(
@@ -64,35 +150,72 @@ def store_in_pinecone(embeddings_data, index_name="deloitte-reports"):
         # Get index
         index = pc.Index(index_name)
         
-        # Prepare vectors for Pinecone
-        vectors = []
+        manifest = get_vector_manifest()
         
-        for i, item in enumerate(embeddings_data):
-            chunk_id = f"{item['metadata']['document_id']}_chunk_{i}"
-            vector = {
+        def upsert(batch):
+            for document_id in {vector["metadata"]["document_id"] for vector in batch}:
+                manifest.begin(index_name, document_id,
+                               [vector["id"] for vector in batch if vector["metadata"]["document_id"] == document_id])
+            index.upsert(vectors=batch)
+        
+        # Upsert in batches as the embeddings arrive
+        batch = []
+        stored_ids = []
+        unchanged = 0
+        document_chunks = {}
+        if first_item is not None:
+            items = itertools.chain([first_item], items)
+        for item in items:
+            document_id = item['metadata']['document_id']
+            chunk_id = item.get('id') or content_vector_id(document_id, item['content'])
+            document_chunks.setdefault(document_id, []).append(chunk_id)
+            if item['embedding'] is None:
+                unchanged += 1
+                continue
+            batch.append({
                 "id": chunk_id,
                 "values": item['embedding'],
                 "metadata": {
-                    "text": item['content'],
+                    "text_hash": text_store.put(item['content']),
                     "industry": item['metadata']['industry'],
                     "year": item['metadata']['year'],
                     "document_id": item['metadata']['document_id']
                 }
-            }
-            vectors.append(vector)
+            })
+            if len(batch) == PINECONE_UPSERT_BATCH_SIZE:
+                upsert(batch)
+                stored_ids.extend(vector["id"] for vector in batch)
+                batch = []
+        if batch:
+            upsert(batch)
+            stored_ids.extend(vector["id"] for vector in batch)
         
-        # Upsert in batches
-        batch_size = 100
-        for i in range(0, len(vectors), batch_size):
-            batch = vectors[i:i + batch_size]
-            index.upsert(vectors=batch)
+        # The documents' chunks from earlier versions are superseded now
+        superseded = []
+        for document_id, chunk_ids in document_chunks.items():
+            superseded.extend(manifest.commit(index_name, document_id, chunk_ids))
+        for start in range(0, len(superseded), PINECONE_UPSERT_BATCH_SIZE):
+            index.delete(ids=superseded[start:start + PINECONE_UPSERT_BATCH_SIZE])
         
-        print(f"Stored {len(embeddings_data)} chunks in Pinecone index '{index_name}'")
+        print(f"Stored {len(stored_ids)} chunks in Pinecone index '{index_name}' "
+              f"({unchanged} unchanged, {len(superseded)} superseded deleted)")
+        invalidate_chat_cache(stored_ids + superseded)
         return True
     except Exception as e:
         print(f"Error storing in Pinecone: {str(e)}")
         return False
 
+def compact_pinecone(index_name="deloitte-reports", document_field="document_id", dry_run=False):
+    """Delete superseded and orphaned chunks (e.g. from the old positional chunk IDs) of known documents"""
+    try:
+        pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
+        result = compact_index(pc.Index(index_name), index_name, document_field, dry_run=dry_run)
+        invalidate_chat_cache(result.pop("deleted_ids"))
+        return result
+    except Exception as e:
+        print(f"Error compacting Pinecone index '{index_name}': {str(e)}")
+        return None
+
 def search_pinecone(query, index_name="nvidia-financials", filter_dict=None, top_k=5):
     """Search for similar documents in Pinecone"""
     try:
@@ -118,14 +241,18 @@ def search_pinecone(query, index_name="nvidia-financials", filter_dict=None, top
             filter=filter_dict
         )
         print("Results from Pinecone: ", results)
-        # Format results
+        # Format results, resolving chunk texts stored by hash (older vectors have them inline)
+        matches = results.get("matches", [])
+        texts = text_store.get_many(
+            m["metadata"]["text_hash"] for m in matches if m.get("metadata", {}).get("text_hash")
+        )
         formatted_results = []
         
-        for match in results.get("matches", []):
+        for match in matches:
             metadata = match.get("metadata", {})
             
             formatted_results.append({
-                "text": metadata.get("text", ""),
+                "text": metadata.get("text") or texts.get(metadata.get("text_hash"), ""),
                 "document_id": metadata.get("document_id", "unknown"),
                 "quarter": metadata.get("quarter", "unknown"),
                 "similarity": float(match.get("score", 0.0))
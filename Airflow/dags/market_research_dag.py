@@ -327,7 +327,7 @@ def store_in_snowflake(**context):
 def store_in_pinecone(**context):
     """Generate embeddings and store in Pinecone"""
     # Import inside the function to avoid loading at DAG parse time
-    from industry_research.vector_storage_service import generate_embeddings, store_in_pinecone
+    from industry_research.vector_storage_service import embed_chunks, store_in_pinecone, compact_pinecone
     from industry_research.chunking_strategies import markdown_header_chunks
     
     ti = context['ti']
@@ -350,26 +350,13 @@ def store_in_pinecone(**context):
                 print(f"No chunks generated for {name}, skipping")
                 continue
                 
-            # Process each chunk
-            embeddings_data = []
-            for chunk in chunks:
-                embedding = generate_embeddings(chunk)
-                
-                if embedding:
-                    embeddings_data.append({
-                        'content': chunk,
-                        'embedding': embedding,
-                        'metadata': {
-                            'industry': industry,
-                            'year': '2024',
-                            'document_id': name
-                        }
-                    })
+            # Embed the chunks in batches, upserting each batch as it is ready
+            embeddings_data = embed_chunks(chunks, {
+                'industry': industry,
+                'year': '2024',
+                'document_id': name
+            })
             
-            if not embeddings_data:
-                print(f"No embeddings generated for {name}, skipping")
-                continue
-                
             # Store embeddings in Pinecone
             store_success = store_in_pinecone(embeddings_data, index_name="deloitte-reports")
             
@@ -385,6 +372,9 @@ def store_in_pinecone(**context):
     if success_count == 0:
         raise AirflowSkipException("No embeddings were successfully stored in Pinecone")
     
+    # Remove chunks superseded by this run or left over from older chunk IDs
+    compact_pinecone(index_name="deloitte-reports")
+    
     return f"Successfully stored {success_count} report embeddings in Pinecone"
 
 def cleanup_temp_files(**context):
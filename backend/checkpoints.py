@@ -0,0 +1,187 @@
+import os
+import time
+import uuid
+import sqlite3
+import asyncio
+import tempfile
+import threading
+from dotenv import load_dotenv
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+load_dotenv()
+
+# SQLite file holding graph checkpoints, one thread per run ID
+GRAPH_CHECKPOINT_DB = os.getenv(
+    "GRAPH_CHECKPOINT_DB",
+    os.path.join(tempfile.gettempdir(), "investorintel_graph_checkpoints.sqlite")
+)
+# Runs untouched for this long are deleted; until then a retry with the same run ID resumes or reuses them
+GRAPH_CHECKPOINT_RETENTION_SECONDS = int(os.getenv("GRAPH_CHECKPOINT_RETENTION_SECONDS", "86400"))
+# Minimum time between two retention sweeps
+CHECKPOINT_PRUNE_INTERVAL_SECONDS = 600
+
+
+class ThreadedSqliteSaver(SqliteSaver):
+    """
+    SqliteSaver that also serves async graph runs.
+
+    The stock SqliteSaver only implements the sync API. Graph runs here are async
+    and happen on several event loops (the API loop and one per background job),
+    so the async methods run the sync ones in a worker thread; SqliteSaver's own
+    lock serialises access to the shared connection.
+
+    It also records when each run (thread) was last used, so runs past their
+    retention can be pruned.
+    """
+
+    def setup(self):
+        if self.is_setup:
+            return
+        super().setup()
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS run_activity (thread_id TEXT PRIMARY KEY, updated_at REAL NOT NULL)"
+        )
+        self.conn.commit()
+
+    def touch(self, thread_id: str):
+        """Record that the run is in use, restarting its retention period"""
+        with self.cursor() as cur:
+            cur.execute(
+                "INSERT OR REPLACE INTO run_activity (thread_id, updated_at) VALUES (?, ?)",
+                (str(thread_id), time.time())
+            )
+
+    def prune(self, retention_seconds: float = GRAPH_CHECKPOINT_RETENTION_SECONDS) -> int:
+        """
+        Delete the checkpoints and writes of runs not used for retention_seconds.
+
+        Returns:
+            Number of runs deleted
+        """
+        now = time.time()
+        with self.cursor() as cur:
+            # Runs checkpointed before activity was recorded start their retention now
+            cur.execute(
+                "INSERT OR IGNORE INTO run_activity (thread_id, updated_at) SELECT DISTINCT thread_id, ? FROM checkpoints",
+                (now,)
+            )
+            expired = [(row[0],) for row in cur.execute(
+                "SELECT thread_id FROM run_activity WHERE updated_at < ?", (now - retention_seconds,)
+            ).fetchall()]
+            for table in ("checkpoints", "writes", "run_activity"):
+                cur.executemany(f"DELETE FROM {table} WHERE thread_id = ?", expired)
+        if expired:
+            print(f"Pruned checkpoints of {len(expired)} runs older than {retention_seconds}s")
+        return len(expired)
+
+    async def aget_tuple(self, config):
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        items = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path=""):
+        return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id):
+        return await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+_checkpointer = None
+_checkpointer_lock = threading.Lock()
+_last_prune = 0.0
+
+
+def get_checkpointer() -> ThreadedSqliteSaver:
+    """Return the process-wide checkpointer, opening the SQLite file on first use"""
+    global _checkpointer
+    if _checkpointer is None:
+        with _checkpointer_lock:
+            if _checkpointer is None:
+                conn = sqlite3.connect(GRAPH_CHECKPOINT_DB, check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+                saver = ThreadedSqliteSaver(conn)
+                saver.setup()
+                _checkpointer = saver
+    return _checkpointer
+
+
+def _record_run(checkpointer, run_id: str):
+    """Touch the run, and sweep expired runs at most every CHECKPOINT_PRUNE_INTERVAL_SECONDS"""
+    global _last_prune
+    if not isinstance(checkpointer, ThreadedSqliteSaver):
+        return
+    checkpointer.touch(run_id)
+    if time.monotonic() - _last_prune >= CHECKPOINT_PRUNE_INTERVAL_SECONDS:
+        _last_prune = time.monotonic()
+        try:
+            checkpointer.prune()
+        except Exception as e:
+            print(f"Error pruning graph checkpoints: {str(e)}")
+
+
+def new_run_id() -> str:
+    return uuid.uuid4().hex
+
+
+def run_config(run_id: str) -> dict:
+    return {"configurable": {"thread_id": run_id}}
+
+
+async def run_checkpointed_graph(graph, initial_state: dict, run_id: str, on_node=None) -> dict:
+    """
+    Run the analysis graph under the checkpoint thread for run_id, resuming if possible.
+
+    - No checkpoint yet: start from initial_state.
+    - A previous attempt raised part-way: resume after the last completed step.
+      Outputs of nodes that already finished, including parallel siblings of the
+      node that failed, are reused rather than recomputed.
+    - A previous attempt completed: return its stored final state without
+      running anything.
+    - A previous attempt ended with state["error"] or never got past the pitch
+      deck step: discard it and start again, since that depends on the new upload.
+
+    Args:
+        graph: Analysis graph compiled with a checkpointer
+        initial_state: Input for a fresh run
+        run_id: Checkpoint thread ID; retries must reuse the same ID
+        on_node: Optional callback invoked with each completed node name
+
+    Returns:
+        The final graph state
+    """
+    config = run_config(run_id)
+    await asyncio.to_thread(_record_run, graph.checkpointer, run_id)
+    snapshot = await graph.aget_state(config)
+    graph_input = initial_state
+
+    if snapshot.values:
+        pending = list(snapshot.next)
+        if pending and "process_pitch_deck" not in pending:
+            print(f"Resuming run {run_id} at {pending}")
+            graph_input = None
+        elif not pending and not snapshot.values.get("error"):
+            print(f"Run {run_id} already completed; reusing stored outputs")
+            return snapshot.values
+        else:
+            print(f"Discarding checkpoints of run {run_id} and starting over")
+            await graph.checkpointer.adelete_thread(run_id)
+
+    if on_node is None:
+        return await graph.ainvoke(graph_input, config)
+
+    final_state = dict(initial_state)
+    async for mode, chunk in graph.astream(graph_input, config, stream_mode=["updates", "values"]):
+        if mode == "updates":
+            for node_name in chunk:
+                on_node(node_name)
+        else:
+            final_state = chunk
+    return final_state
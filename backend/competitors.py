@@ -0,0 +1,77 @@
+import os
+from dotenv import load_dotenv
+from cache import LRUTTLCache
+from database.snowflake_connect import pooled_connection
+
+load_dotenv()
+
+# COMPANY_MERGED_VIEW only changes when the weekly Growjo DAG runs, which also
+# invalidates this cache; the TTL bounds staleness on instances it cannot reach
+COMPETITOR_CACHE_SIZE = int(os.getenv("COMPETITOR_CACHE_SIZE", "256"))
+COMPETITOR_CACHE_TTL_SECONDS = float(os.getenv("COMPETITOR_CACHE_TTL_SECONDS", "21600"))
+
+competitor_cache = LRUTTLCache(max_entries=COMPETITOR_CACHE_SIZE, ttl_seconds=COMPETITOR_CACHE_TTL_SECONDS)
+
+TOP_COMPETITORS_QUERY = """
+WITH RankedCompanies AS (
+    SELECT
+        Company,
+        Industry,
+        Emp_Growth_Percent,
+        Revenue,
+        Short_Description,
+        Employees,
+        City,
+        Country,
+        Homepage_URL,
+        LinkedIn_URL,
+        ROW_NUMBER() OVER (PARTITION BY Company ORDER BY Revenue DESC, Emp_Growth_Percent DESC) AS rn
+    FROM INVESTOR_INTEL_DB.GROWJO_SCHEMA.COMPANY_MERGED_VIEW
+    WHERE Industry = %s
+)
+SELECT
+    Company,
+    Industry,
+    Emp_Growth_Percent,
+    Revenue,
+    Short_Description,
+    Employees,
+    City,
+    Country,
+    Homepage_URL,
+    LinkedIn_URL
+FROM RankedCompanies
+WHERE rn = 1
+ORDER BY Revenue DESC, Emp_Growth_Percent DESC
+LIMIT %s
+"""
+
+
+def _query_top_competitors(industry: str, limit: int) -> list:
+    with pooled_connection() as (conn, cur):
+        cur.execute(TOP_COMPETITORS_QUERY, (industry, limit))
+        rows = cur.fetchall()
+        columns = [col[0] for col in cur.description]
+    return [dict(zip(columns, row)) for row in rows]
+
+
+def get_top_competitors(industry: str, limit: int = 10) -> list:
+    """
+    Top companies in an industry by revenue and employee growth, served from cache.
+
+    Args:
+        industry: Industry name as stored in COMPANY_MERGED_VIEW
+        limit: Maximum number of companies to return
+
+    Returns:
+        List of row dicts; each call gets its own copies, so callers may modify them
+    """
+    rows = competitor_cache.get_or_load((industry, limit), lambda: _query_top_competitors(industry, limit))
+    return [dict(row) for row in rows]
+
+
+def invalidate_competitor_cache(industry: str = None) -> int:
+    """Drop cached competitor lists for one industry, or for all industries when omitted"""
+    if industry is None:
+        return competitor_cache.invalidate()
+    return competitor_cache.invalidate(lambda key: key[0] == industry)
@@ -1,54 +1,114 @@
-from database.snowflake_connect import account_login
+from database.snowflake_connect import pooled_connection
 from dotenv import load_dotenv
 import pandas as pd
 
 load_dotenv()
 def get_investor_by_username(username):
-    conn, cur = account_login()
-    cur.execute("SELECT * FROM startup_information.investor WHERE username = %s", (username,))
-    row = cur.fetchone()
-    return dict(zip([desc[0] for desc in cur.description], row))
+    with pooled_connection() as (conn, cur):
+        cur.execute("SELECT * FROM startup_information.investor WHERE username = %s", (username,))
+        row = cur.fetchone()
+        return dict(zip([desc[0] for desc in cur.description], row))
 
 def get_startups_by_status(investor_id, status):
-    conn, cur = account_login()
     query = """
         SELECT s.startup_id, s.startup_name
         FROM startup_information.startup_investor_map m
         JOIN startup_information.startup s ON m.startup_id = s.startup_id
         WHERE m.investor_id = %s AND m.status = %s
     """
-    cur.execute(query, (investor_id, status))
-    rows = cur.fetchall()
+    with pooled_connection() as (conn, cur):
+        cur.execute(query, (investor_id, status))
+        rows = cur.fetchall()
     return pd.DataFrame(rows, columns=["startup_id", "startup_name"])
 
 def get_startup_info_by_id(startup_id):
-    conn, cur = account_login()
-    cur.execute("SELECT * FROM startup_information.startup WHERE startup_id = %s", (startup_id,))
-    row = cur.fetchone()
-    return dict(zip([desc[0] for desc in cur.description], row))
+    with pooled_connection() as (conn, cur):
+        cur.execute("SELECT * FROM startup_information.startup WHERE startup_id = %s", (startup_id,))
+        row = cur.fetchone()
+        return dict(zip([desc[0] for desc in cur.description], row))
+
+# Columns of startup_information.startup that may be requested by name
+STARTUP_COLUMNS = (
+    "startup_id", "startup_name", "industry", "email_address", "website_url",
+    "funding_amount_requested", "round_type", "equity_offered",
+    "pre_money_valuation", "post_money_valuation",
+    "summary_report", "analytics_report", "news_report", "competitor_visualizations",
+    "pitch_deck_link", "pitch_deck_filename", "created_at",
+)
+
+def validate_startup_columns(column_names):
+    """
+    Normalise requested column names and reject anything not in STARTUP_COLUMNS.
+
+    Column names are interpolated into SQL, so this is what keeps them safe.
+
+    Raises:
+        ValueError: If any column is unknown or the list is empty
+    """
+    columns = []
+    for name in column_names:
+        column = str(name).strip().lower()
+        if column not in STARTUP_COLUMNS:
+            raise ValueError(f"Invalid column name: {name}")
+        if column not in columns:
+            columns.append(column)
+    if not columns:
+        raise ValueError("At least one column name is required")
+    return columns
 
 def get_startup_column_by_id(column_name: str, startup_id: int):
-    conn, cur = account_login()
-    # Build the query with the column name injected
+    # Build the query with the validated column name injected
+    column = validate_startup_columns([column_name])[0]
     query = f"""
-        SELECT s.{column_name}
+        SELECT s.{column}
         FROM startup_information.startup AS s
         WHERE s.startup_id = %s
     """
-    print(query)
 
     # Execute with only the ID as a parameter
-    try:
+    with pooled_connection() as (conn, cur):
         cur.execute(query, (startup_id,))
         row = cur.fetchone()
-        print("row", row)
-    finally:
-        cur.close()
-        conn.close()
 
-    # 4) Return the single value (or None if not found)
+    # Return the single value (or None if not found)
     return row[0] if row else None
 
+def get_startup_columns(startup_ids, column_names):
+    """
+    Fetch several columns for one or more startups in a single query.
+
+    Args:
+        startup_ids (list[int]): IDs of the startups to fetch
+        column_names (list[str]): Columns to return, validated against STARTUP_COLUMNS
+
+    Returns:
+        dict: startup_id -> {COLUMN_NAME: value}, with upper-case keys as Snowflake
+        returns them; IDs with no matching row are omitted
+    """
+    columns = validate_startup_columns(column_names)
+    startup_ids = list(dict.fromkeys(int(startup_id) for startup_id in startup_ids))
+    if not startup_ids:
+        return {}
+
+    select_list = ", ".join(f"s.{column}" for column in ["startup_id"] + [c for c in columns if c != "startup_id"])
+    placeholders = ", ".join(["%s"] * len(startup_ids))
+    query = f"""
+        SELECT {select_list}
+        FROM startup_information.startup AS s
+        WHERE s.startup_id IN ({placeholders})
+    """
+    with pooled_connection() as (conn, cur):
+        cur.execute(query, tuple(startup_ids))
+        rows = cur.fetchall()
+        names = [desc[0] for desc in cur.description]
+
+    results = {}
+    for row in rows:
+        record = dict(zip(names, row))
+        startup_id = record["STARTUP_ID"] if "startup_id" in columns else record.pop("STARTUP_ID")
+        results[startup_id] = record
+    return results
+
 def update_startup_status(investor_id, startup_id, status):
     """
     Update the status of a startup for a specific investor
@@ -61,20 +121,16 @@ def update_startup_status(investor_id, startup_id, status):
     Returns:
         bool: True if successful, False otherwise
     """
-    conn, cur = account_login()
+    query = """
+    UPDATE startup_information.startup_investor_map
+    SET status = %s
+    WHERE investor_id = %s AND startup_id = %s
+    """
     try:
-        query = """
-        UPDATE startup_information.startup_investor_map
-        SET status = %s
-        WHERE investor_id = %s AND startup_id = %s
-        """
-        cur.execute(query, (status, investor_id, startup_id))
-        conn.commit()
+        with pooled_connection() as (conn, cur):
+            cur.execute(query, (status, investor_id, startup_id))
+            conn.commit()
         return True
     except Exception as e:
-        conn.rollback()
         print(f"Error updating startup status: {e}")
         return False
-    finally:
-        cur.close()
-        conn.close()
@@ -100,6 +100,9 @@ def insert_investor(first_name, last_name, email_address, username):
     except Exception as e:
         conn.rollback()
         print(f"❌ Failed to insert investor: {e}")
+    finally:
+        cur.close()
+        conn.close()
 
 def insert_startup(
     startup_name,
@@ -198,7 +201,6 @@ def insert_startup_founder_map(founders_list):
        "founder_name": "...",
        "linkedin_url": "..."}
     """
-    cur = conn.cursor()
     
     try:
         for founder in founders_list:
@@ -227,6 +229,9 @@ def insert_startup_founder_map(founders_list):
         print(f"❌ Failed to map startup to founders: {e}")
         # re‑raise if you want upstream code to also see the failure
         raise
+    finally:
+        cur.close()
+        conn.close()
 
 
 def map_startup_to_investors(startup_name, investor_usernames):
@@ -271,6 +276,9 @@ def map_startup_to_investors(startup_name, investor_usernames):
     except Exception as e:
         conn.rollback()
         print(f"❌ Failed to map startup to investors: {e}")
+    finally:
+        cur.close()
+        conn.close()
 
 def get_all_investor_usernames():
     conn, cur = account_login()
@@ -288,6 +296,9 @@ def get_all_investor_usernames():
     except Exception as e:
         print(f"❌ Failed to fetch investor usernames: {e}")
         return []
+    finally:
+        cur.close()
+        conn.close()
 
 
 if __name__ == "__main__":
@@ -1,55 +1,344 @@
 from dotenv import load_dotenv
 import snowflake.connector
+from contextlib import contextmanager
+import threading
+import time
 load_dotenv()
 import os
 
-# Global connection and cursor that will be reused
-_connection = None
-_cursor = None
+# Pool settings (seconds unless stated otherwise)
+SNOWFLAKE_POOL_SIZE = int(os.getenv("SNOWFLAKE_POOL_SIZE", "8"))
+SNOWFLAKE_POOL_TIMEOUT = float(os.getenv("SNOWFLAKE_POOL_TIMEOUT", "30"))
+SNOWFLAKE_POOL_MAX_IDLE = float(os.getenv("SNOWFLAKE_POOL_MAX_IDLE", "600"))
+SNOWFLAKE_POOL_MAX_LIFETIME = float(os.getenv("SNOWFLAKE_POOL_MAX_LIFETIME", "3600"))
+SNOWFLAKE_POOL_PING_AFTER = float(os.getenv("SNOWFLAKE_POOL_PING_AFTER", "60"))
 
-# Function to get the existing connection or create a new one if needed
-def get_connection():
-    global _connection, _cursor
-    
-    # If we already have a connection, check if it's still valid
-    if _connection:
-        try:
-            # Test if connection is still alive with a simple query
-            _cursor.execute("SELECT 1")
-            return _connection, _cursor
-        except:
-            # Connection is dead, close it and create a new one
-            try:
-                _cursor.close()
-                _connection.close()
-            except:
-                pass
-            _connection = None
-            _cursor = None
-    
-    # Create a new connection
-    SNOWFLAKE_ACCOUNT = os.getenv("SNOWFLAKE_ACCOUNT")
-    SNOWFLAKE_USER = os.getenv("SNOWFLAKE_USER")
-    SNOWFLAKE_PASSWORD = os.getenv("SNOWFLAKE_PASSWORD")
-    SNOWFLAKE_ROLE = os.getenv("SNOWFLAKE_ROLE")
-    
-    # Connecting to Snowflake
-    _connection = snowflake.connector.connect(
-        user=SNOWFLAKE_USER,
-        password=SNOWFLAKE_PASSWORD,
-        account=SNOWFLAKE_ACCOUNT,
-        role=SNOWFLAKE_ROLE
+
+def _create_connection():
+    """Open a new Snowflake connection with the session context set"""
+    connection = snowflake.connector.connect(
+        user=os.getenv("SNOWFLAKE_USER"),
+        password=os.getenv("SNOWFLAKE_PASSWORD"),
+        account=os.getenv("SNOWFLAKE_ACCOUNT"),
+        role=os.getenv("SNOWFLAKE_ROLE")
     )
-    
-    _cursor = _connection.cursor()
-    
+
     # Set up the session
-    _cursor.execute("USE WAREHOUSE INVESTOR_INTEL_WH;")
-    _cursor.execute("USE DATABASE INVESTOR_INTEL_DB;")
-    _connection.commit()
-    
-    return _connection, _cursor
+    cursor = connection.cursor()
+    try:
+        cursor.execute("USE WAREHOUSE INVESTOR_INTEL_WH;")
+        cursor.execute("USE DATABASE INVESTOR_INTEL_DB;")
+        connection.commit()
+    finally:
+        cursor.close()
+
+    return connection
+
+
+class _PooledEntry:
+    """A raw connection plus the timestamps the pool needs to age it out"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.created_at = time.monotonic()
+        self.last_used_at = self.created_at
+
+
+class SnowflakeConnectionPool:
+    """
+    Bounded, thread-safe pool of Snowflake connections.
+
+    Connections are checked out for exclusive use by one caller and checked back
+    in afterwards, so concurrent FastAPI requests never share a cursor. Health
+    checks are lazy: an idle connection is only pinged on checkout if it has been
+    idle longer than `ping_after`, and is discarded outright once it exceeds
+    `max_idle` or `max_lifetime`.
+    """
+
+    def __init__(self,
+                 max_size: int = SNOWFLAKE_POOL_SIZE,
+                 timeout: float = SNOWFLAKE_POOL_TIMEOUT,
+                 max_idle: float = SNOWFLAKE_POOL_MAX_IDLE,
+                 max_lifetime: float = SNOWFLAKE_POOL_MAX_LIFETIME,
+                 ping_after: float = SNOWFLAKE_POOL_PING_AFTER,
+                 connect=_create_connection):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.ping_after = ping_after
+        self._connect = connect
+
+        self._lock = threading.Condition()
+        self._idle = []  # LIFO stack of _PooledEntry, most recently used last
+        self._in_use = {}  # id(connection) -> _PooledEntry
+        self._opening = 0  # connections currently being created outside the lock
+
+        self._stats = {
+            "checkouts": 0,
+            "reused": 0,
+            "created": 0,
+            "pinged": 0,
+            "discarded_idle": 0,
+            "discarded_lifetime": 0,
+            "discarded_broken": 0,
+            "waits": 0,
+            "wait_time_ms": 0.0,
+            "timeouts": 0,
+        }
+
+    def _close_quietly(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def _is_expired(self, entry, now):
+        """Age-based checks that need no round-trip to Snowflake"""
+        if now - entry.created_at > self.max_lifetime:
+            self._stats["discarded_lifetime"] += 1
+            return True
+        if now - entry.last_used_at > self.max_idle:
+            self._stats["discarded_idle"] += 1
+            return True
+        return False
+
+    def _ping(self, connection):
+        try:
+            cursor = connection.cursor()
+            try:
+                cursor.execute("SELECT 1")
+            finally:
+                cursor.close()
+            return True
+        except Exception:
+            return False
+
+    def checkout(self):
+        """
+        Take a connection from the pool, opening a new one if the pool has room.
+
+        Blocks for up to `timeout` seconds when every connection is in use.
+
+        Returns:
+            A live snowflake.connector connection owned by the caller until checkin
+        """
+        deadline = time.monotonic() + self.timeout
+        waited_since = None
+        entry = None
+        stale = []
+
+        with self._lock:
+            self._stats["checkouts"] += 1
+            while True:
+                # Reuse the most recently returned connection first
+                while self._idle:
+                    candidate = self._idle.pop()
+                    if self._is_expired(candidate, time.monotonic()):
+                        stale.append(candidate.connection)
+                        continue
+                    entry = candidate
+                    break
+
+                # Either way we now hold a slot; pings and logins happen outside the lock
+                if entry is not None or len(self._in_use) + self._opening < self.max_size:
+                    self._opening += 1
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    for connection in stale:
+                        self._close_quietly(connection)
+                    raise TimeoutError(
+                        f"Timed out after {self.timeout}s waiting for a Snowflake connection "
+                        f"(pool size {self.max_size})"
+                    )
+                if waited_since is None:
+                    waited_since = time.monotonic()
+                    self._stats["waits"] += 1
+                self._lock.wait(remaining)
+
+        # Logging out of expired sessions is a network call, so do it unlocked
+        for connection in stale:
+            self._close_quietly(connection)
+
+        # Lazy health check: only ping connections that have sat idle for a while
+        if entry is not None and time.monotonic() - entry.last_used_at > self.ping_after:
+            with self._lock:
+                self._stats["pinged"] += 1
+            if not self._ping(entry.connection):
+                with self._lock:
+                    self._stats["discarded_broken"] += 1
+                self._close_quietly(entry.connection)
+                entry = None
+
+        if entry is None:
+            try:
+                entry = _PooledEntry(self._connect())
+            except Exception:
+                with self._lock:
+                    self._opening -= 1
+                    self._lock.notify()
+                raise
+            created = True
+        else:
+            created = False
+
+        with self._lock:
+            self._opening -= 1
+            entry.last_used_at = time.monotonic()
+            self._in_use[id(entry.connection)] = entry
+            self._stats["created" if created else "reused"] += 1
+            self._record_wait(waited_since)
+        return entry.connection
+
+    def _record_wait(self, waited_since):
+        if waited_since is not None:
+            self._stats["wait_time_ms"] += (time.monotonic() - waited_since) * 1000
+
+    def checkin(self, connection, discard: bool = False):
+        """
+        Return a connection to the pool.
+
+        Args:
+            connection: Connection previously obtained from checkout()
+            discard: Close the connection instead of keeping it for reuse
+        """
+        discard = discard or self._is_closed(connection)
+        with self._lock:
+            entry = self._in_use.pop(id(connection), None)
+            if entry is None:
+                return
+            if discard:
+                self._stats["discarded_broken"] += 1
+            else:
+                entry.last_used_at = time.monotonic()
+                self._idle.append(entry)
+            self._lock.notify()
+        if discard:
+            self._close_quietly(connection)
+
+    def _is_closed(self, connection):
+        try:
+            return bool(connection.is_closed())
+        except Exception:
+            return False
+
+    def close_all(self):
+        """Close every idle connection; in-use connections are closed on checkin"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for entry in idle:
+            self._close_quietly(entry.connection)
+
+    def metrics(self) -> dict:
+        """Snapshot of pool occupancy and lifetime counters"""
+        with self._lock:
+            return {
+                "max_size": self.max_size,
+                "in_use": len(self._in_use),
+                "idle": len(self._idle),
+                **self._stats,
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> SnowflakeConnectionPool:
+    """Return the process-wide Snowflake connection pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = SnowflakeConnectionPool()
+    return _pool
+
+
+@contextmanager
+def pooled_connection():
+    """
+    Check out a pooled connection together with a fresh cursor.
+
+    Usage:
+        with pooled_connection() as (conn, cur):
+            cur.execute(...)
+
+    The cursor is closed and the connection returned to the pool on exit. If the
+    block raises, the transaction is rolled back and the connection is discarded
+    when the rollback itself fails.
+    """
+    pool = get_pool()
+    connection = pool.checkout()
+    try:
+        cursor = connection.cursor()
+    except Exception:
+        pool.checkin(connection, discard=True)
+        raise
+    discard = False
+    try:
+        yield connection, cursor
+    except Exception:
+        try:
+            connection.rollback()
+        except Exception:
+            discard = True
+        raise
+    finally:
+        try:
+            cursor.close()
+        except Exception:
+            pass
+        pool.checkin(connection, discard=discard)
+
+
+def get_pool_metrics() -> dict:
+    """Metrics for the shared pool, or an empty snapshot if it was never used"""
+    if _pool is None:
+        return {"max_size": SNOWFLAKE_POOL_SIZE, "in_use": 0, "idle": 0}
+    return _pool.metrics()
+
+
+def close_pool():
+    """Close idle pooled connections, e.g. on application shutdown"""
+    if _pool is not None:
+        _pool.close_all()
+
+
+class _PooledConnectionHandle:
+    """
+    Connection proxy returned by get_connection() for legacy callers.
+
+    Closing it returns the underlying connection to the pool instead of logging out.
+    """
+
+    def __init__(self, pool, connection):
+        self._pool = pool
+        self._connection = connection
+        self._released = False
+
+    def close(self):
+        if not self._released:
+            self._released = True
+            self._pool.checkin(self._connection)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+# Function to check out a connection and cursor; call conn.close() to return it
+def get_connection():
+    pool = get_pool()
+    connection = pool.checkout()
+    try:
+        cursor = connection.cursor()
+    except Exception:
+        pool.checkin(connection, discard=True)
+        raise
+    return _PooledConnectionHandle(pool, connection), cursor
 
 # For backward compatibility with existing code
 def account_login():
-    return get_connection()
\ No newline at end of file
+    return get_connection()
@@ -0,0 +1,126 @@
+import os
+import time
+import sqlite3
+import hashlib
+import tempfile
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# SQLite file mapping pitch deck content hashes to the artifacts already produced for them
+DECK_INDEX_DB = os.getenv(
+    "DECK_INDEX_DB",
+    os.path.join(tempfile.gettempdir(), "investorintel_deck_index.sqlite")
+)
+
+# Read size used when hashing uploads
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class DeckIndex:
+    """
+    Local index from a pitch deck's SHA-256 to its S3 key, Gemini summary and Pinecone vector ID.
+
+    Lets a resubmitted deck (same bytes, any filename) reuse the stored artifacts
+    instead of uploading to S3 and summarizing with Gemini again.
+    """
+
+    def __init__(self, path: str = DECK_INDEX_DB):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS pitch_decks (
+                    content_hash      TEXT PRIMARY KEY,
+                    s3_key            TEXT,
+                    summary           TEXT,
+                    vector_id         TEXT,
+                    startup_name      TEXT,
+                    original_filename TEXT,
+                    created_at        REAL,
+                    last_hit_at       REAL,
+                    hits              INTEGER DEFAULT 0
+                )
+            """)
+            self._conn.commit()
+
+    def lookup(self, content_hash: str):
+        """
+        Return the stored artifacts for a deck, or None if it has not been processed.
+
+        Returns:
+            dict with s3_key, summary, vector_id, startup_name and original_filename
+        """
+        if not content_hash:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT s3_key, summary, vector_id, startup_name, original_filename "
+                "FROM pitch_decks WHERE content_hash = ?",
+                (content_hash,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE pitch_decks SET hits = hits + 1, last_hit_at = ? WHERE content_hash = ?",
+                (time.time(), content_hash)
+            )
+            self._conn.commit()
+        return dict(zip(("s3_key", "summary", "vector_id", "startup_name", "original_filename"), row))
+
+    def record(self, content_hash: str, s3_key: str, summary: str, vector_id: str = None,
+               startup_name: str = None, original_filename: str = None):
+        """Store (or replace) the artifacts produced for a deck"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pitch_decks "
+                "(content_hash, s3_key, summary, vector_id, startup_name, original_filename, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (content_hash, s3_key, summary, vector_id, startup_name, original_filename, time.time())
+            )
+            self._conn.commit()
+
+    def metrics(self) -> dict:
+        """Number of indexed decks and how many uploads were served from the index"""
+        with self._lock:
+            decks, hits = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(hits), 0) FROM pitch_decks"
+            ).fetchone()
+        return {"decks": decks, "hits": hits}
+
+
+_deck_index = None
+_deck_index_lock = threading.Lock()
+
+
+def get_deck_index() -> DeckIndex:
+    """Return the process-wide deck index, opening the SQLite file on first use"""
+    global _deck_index
+    if _deck_index is None:
+        with _deck_index_lock:
+            if _deck_index is None:
+                _deck_index = DeckIndex()
+    return _deck_index
+
+
+def copy_and_hash(source, destination) -> str:
+    """
+    Copy a binary file object to another chunk by chunk, hashing the bytes on the way.
+
+    Returns:
+        Hex SHA-256 of the copied content
+    """
+    digest = hashlib.sha256()
+    while True:
+        chunk = source.read(HASH_CHUNK_SIZE)
+        if not chunk:
+            break
+        digest.update(chunk)
+        destination.write(chunk)
+    return digest.hexdigest()
+
+
+def deck_vector_id(startup_name: str, content_hash: str) -> str:
+    """Stable Pinecone ID for a deck, so re-embedding it overwrites rather than duplicates"""
+    return f"{startup_name.replace(' ', '_')}_{content_hash[:16]}"
@@ -0,0 +1,171 @@
+import os
+import time
+import queue
+import bisect
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Batch single-text encode calls arriving from concurrent requests into one forward pass
+EMBEDDING_BATCHING_ENABLED = os.getenv("EMBEDDING_BATCHING_ENABLED", "true").lower() == "true"
+# How long the first text of a batch waits for others, and the most texts per pass
+EMBEDDING_BATCH_WAIT_MS = float(os.getenv("EMBEDDING_BATCH_WAIT_MS", "5"))
+EMBEDDING_MAX_BATCH_SIZE = int(os.getenv("EMBEDDING_MAX_BATCH_SIZE", "32"))
+# Longest a caller waits for its batched embedding before giving up
+EMBEDDING_BATCH_TIMEOUT_SECONDS = float(os.getenv("EMBEDDING_BATCH_TIMEOUT_SECONDS", "30"))
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+QUEUE_WAIT_MS_BUCKETS = (0.5, 1, 2, 5, 10, 20, 50, 100, 250)
+
+
+class Histogram:
+    """Cumulative bucket counts, as in Prometheus: each bucket counts observations <= its bound"""
+
+    def __init__(self, bounds):
+        self.bounds = tuple(bounds)
+        self._counts = [0] * (len(self.bounds) + 1)  # the last bucket is +Inf
+        self._count = 0
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self._counts[bisect.bisect_left(self.bounds, value)] += 1
+            self._count += 1
+            self._sum += value
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts, count, total = list(self._counts), self._count, self._sum
+        cumulative = np.cumsum(counts).tolist()
+        buckets = {str(bound): cumulative[i] for i, bound in enumerate(self.bounds)}
+        buckets["+Inf"] = cumulative[-1]
+        return {"buckets": buckets, "count": count, "sum": round(total, 3),
+                "mean": round(total / count, 3) if count else None}
+
+
+class EmbeddingBatcher:
+    """
+    Wraps an embedding model so concurrent single-text encode() calls share forward passes.
+
+    Callers enqueue their text and block on a future. A worker thread takes the
+    first queued text, keeps collecting for up to max_wait_seconds or until
+    max_batch_size texts are queued, encodes them with one model.encode(list)
+    call and resolves each future with its row. Lists, and calls with encode
+    options, are passed to the model directly. Every batched future is resolved
+    or failed, and callers stop waiting after timeout_seconds.
+    """
+
+    def __init__(self, model, max_batch_size: int = 32, max_wait_seconds: float = 0.005, name: str = "embedding",
+                 timeout_seconds: float = EMBEDDING_BATCH_TIMEOUT_SECONDS):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self.timeout_seconds = timeout_seconds
+        self.name = name
+        self._queue = queue.Queue()
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_wait_ms = Histogram(QUEUE_WAIT_MS_BUCKETS)
+        self._worker = threading.Thread(target=self._run, name=f"{name}-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, text: str) -> Future:
+        """Queue text for the next batch; the future resolves to its 1-D embedding"""
+        future = Future()
+        self._queue.put((text, future, time.monotonic()))
+        return future
+
+    def encode(self, sentences, **kwargs):
+        """SentenceTransformer-compatible encode: a string without options is batched with concurrent calls"""
+        if kwargs or not isinstance(sentences, str):
+            return self.model.encode(sentences, **kwargs)
+        future = self.submit(sentences)
+        try:
+            return future.result(timeout=self.timeout_seconds)
+        except FutureTimeoutError:
+            future.cancel()  # dropped from its batch if not encoded yet
+            raise
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            if batch[0] is None:
+                return
+            deadline = time.monotonic() + self.max_wait_seconds
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)  # stop after this batch
+                    break
+                batch.append(item)
+            try:
+                self._encode_batch(batch)
+            except Exception as e:
+                # Keep the worker alive; _encode_batch has already failed the batch's futures
+                print(f"Error in {self.name} batcher: {e}")
+
+    def _encode_batch(self, batch):
+        # Callers that timed out cancelled their futures; don't encode those texts
+        batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        error = None
+        try:
+            started = time.monotonic()
+            for _, _, queued_at in batch:
+                self.queue_wait_ms.observe((started - queued_at) * 1000)
+            self.batch_sizes.observe(len(batch))
+            embeddings = self.model.encode([text for text, _, _ in batch], batch_size=len(batch))
+            for (_, future, _), embedding in zip(batch, embeddings):
+                future.set_result(embedding)
+        except Exception as e:
+            error = e
+        for _, future, _ in batch:
+            if not future.done():
+                future.set_exception(error or RuntimeError(f"{self.name} model returned fewer embeddings than texts"))
+        if error is not None:
+            raise error
+
+    def close(self):
+        """Stop the worker once the queued texts are encoded"""
+        self._queue.put(None)
+        self._worker.join()
+
+    def metrics(self) -> dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_seconds * 1000,
+            "queued": self._queue.qsize(),
+            "batch_size": self.batch_sizes.snapshot(),
+            "queue_wait_ms": self.queue_wait_ms.snapshot(),
+        }
+
+
+# Batchers created by batched(), by name
+batchers = {}
+
+
+def batched(model, name: str = "embedding"):
+    """Wrap model in an EmbeddingBatcher when EMBEDDING_BATCHING_ENABLED is set"""
+    if not EMBEDDING_BATCHING_ENABLED:
+        return model
+    batcher = EmbeddingBatcher(
+        model,
+        max_batch_size=EMBEDDING_MAX_BATCH_SIZE,
+        max_wait_seconds=EMBEDDING_BATCH_WAIT_MS / 1000,
+        name=name,
+        timeout_seconds=EMBEDDING_BATCH_TIMEOUT_SECONDS
+    )
+    batchers[name] = batcher
+    return batcher
+
+
+def batcher_metrics() -> dict:
+    return {"enabled": EMBEDDING_BATCHING_ENABLED, **{name: b.metrics() for name, b in batchers.items()}}
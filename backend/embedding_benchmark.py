@@ -0,0 +1,141 @@
+"""
+Accuracy parity check and latency/memory benchmark for the embedding backends.
+
+    python embedding_benchmark.py export      # write the int8 ONNX model (needs torch)
+    python embedding_benchmark.py parity      # compare ONNX embeddings with torch; exits 1 below threshold
+    python embedding_benchmark.py benchmark   # load time, latency, throughput and peak RSS per backend
+"""
+import sys
+import json
+import time
+import resource
+import argparse
+import subprocess
+import numpy as np
+from embedding_backends import load_embedding_model, export_onnx_model, OnnxSentenceEncoder
+
+# Queries and document snippets like the ones the chat and report indexes see
+SAMPLE_TEXTS = [
+    "AI startups in healthcare",
+    "Which fintech companies raised a Series A this year?",
+    "healthcare AI companies",
+    "Renewable energy market size and growth projections",
+    "Competitive landscape for electric vehicle charging networks",
+    "Semiconductor supply chain risks and reshoring trends",
+    "Acme AI builds computer vision models for radiology triage in hospitals.",
+    "The company's revenue grew 240% year over year to $12M ARR with 85% gross margins.",
+    "Key risks: regulatory approval timelines, reimbursement, and competition from incumbents.",
+    "Generative AI adoption in enterprises is moving from pilots to production deployments.",
+    "Banking outlook: deposit costs, credit quality and digital transformation",
+    "Sports media rights are shifting from linear TV to streaming platforms.",
+    "Higher education enrollment trends and financial pressure on universities",
+    "Defense and aerospace industry performance outlook",
+    "Founders previously worked at Google and Stripe; team of 14 engineers.",
+    "What are the growth opportunities in digital media consumption?",
+    "Startups similar to Uber in logistics",
+    "Investor summary: seed-stage B2B SaaS for construction project management",
+    "Market dynamics, segment growth potential and supply chain analysis",
+    "ok",
+]
+
+
+def compare_backends(reference, candidate, texts=SAMPLE_TEXTS, top_k: int = 3) -> dict:
+    """
+    Compare a candidate encoder against a reference one on the same texts.
+
+    Args:
+        reference: Encoder whose embeddings are taken as correct (torch)
+        candidate: Encoder under test (onnx)
+        texts: Texts to embed with both
+        top_k: Neighbourhood size for the retrieval agreement check
+
+    Returns:
+        dict with min/mean cosine similarity between paired embeddings, and the
+        mean overlap of each text's top_k nearest neighbours under both encoders
+    """
+    expected = np.asarray(reference.encode(list(texts)), dtype=np.float32)
+    actual = np.asarray(candidate.encode(list(texts)), dtype=np.float32)
+    expected /= np.linalg.norm(expected, axis=1, keepdims=True)
+    actual /= np.linalg.norm(actual, axis=1, keepdims=True)
+    cosines = (expected * actual).sum(axis=1)
+
+    def neighbours(embeddings):
+        similarities = embeddings @ embeddings.T
+        np.fill_diagonal(similarities, -np.inf)
+        return np.argsort(-similarities, axis=1)[:, :top_k]
+
+    overlap = [len(set(a) & set(b)) / top_k for a, b in zip(neighbours(expected), neighbours(actual))]
+    return {
+        "texts": len(texts),
+        "min_cosine": round(float(cosines.min()), 4),
+        "mean_cosine": round(float(cosines.mean()), 4),
+        f"top{top_k}_overlap": round(float(np.mean(overlap)), 4),
+    }
+
+
+def measure_backend(backend: str, repeats: int = 200) -> dict:
+    """Load one backend in this process and time it; run in a fresh process for a fair RSS"""
+    started = time.perf_counter()
+    model = load_embedding_model(backend=backend)
+    load_seconds = time.perf_counter() - started
+    model.encode("warm up")
+
+    latencies = []
+    for i in range(repeats):
+        text = SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)]
+        started = time.perf_counter()
+        model.encode(text)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    batch = SAMPLE_TEXTS * 16
+    started = time.perf_counter()
+    model.encode(batch, batch_size=64)
+    throughput = len(batch) / (time.perf_counter() - started)
+
+    return {
+        "backend": backend,
+        "model": type(model).__name__,
+        "load_seconds": round(load_seconds, 2),
+        "query_p50_ms": round(float(np.percentile(latencies, 50)), 2),
+        "query_p95_ms": round(float(np.percentile(latencies, 95)), 2),
+        "batch_texts_per_second": round(throughput, 1),
+        # ru_maxrss is in kilobytes on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["export", "parity", "benchmark", "measure"])
+    parser.add_argument("--backend", default="onnx", help="backend for 'measure'")
+    parser.add_argument("--min-cosine", type=float, default=0.98, help="parity threshold per text")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        export_onnx_model()
+    elif args.command == "parity":
+        candidate = load_embedding_model(backend="onnx")
+        if not isinstance(candidate, OnnxSentenceEncoder):
+            print("FAIL: ONNX backend could not be loaded; run 'export' first")
+            return 1
+        result = compare_backends(load_embedding_model(backend="torch"), candidate)
+        print(json.dumps(result, indent=2))
+        if result["min_cosine"] < args.min_cosine:
+            print(f"FAIL: min cosine {result['min_cosine']} < {args.min_cosine}")
+            return 1
+        print("OK")
+    elif args.command == "measure":
+        print(json.dumps(measure_backend(args.backend)))
+    else:
+        # One process per backend, so neither import cost nor resident memory leaks into the other
+        for backend in ("torch", "onnx"):
+            output = subprocess.run(
+                [sys.executable, __file__, "measure", "--backend", backend],
+                capture_output=True, text=True, check=True
+            ).stdout
+            print(output.strip().splitlines()[-1])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+import os
+import numpy as np
+from dotenv import load_dotenv
+from cache import LRUTTLCache
+
+load_dotenv()
+
+# Number of distinct texts whose embeddings are kept in memory (384 float32s, ~1.5 KB each)
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "2048"))
+
+
+def normalize_text(text: str) -> str:
+    """
+    Cache key for a text.
+
+    all-MiniLM-L6-v2 uses an uncased tokenizer that ignores runs of whitespace,
+    so case and spacing differences produce the same embedding.
+    """
+    return " ".join(text.split()).lower()
+
+
+class EmbeddingCache:
+    """Bounded LRU of normalized text -> float32 embedding, placed in front of model.encode"""
+
+    def __init__(self, max_entries: int = 2048):
+        self._cache = LRUTTLCache(max_entries=max_entries, ttl_seconds=float("inf"))
+
+    def encode(self, model, text: str) -> np.ndarray:
+        """
+        Return the embedding of text, calling model.encode only on a miss.
+
+        The returned array is shared with the cache and must not be modified.
+        """
+        key = normalize_text(text)
+        embedding = self._cache.get(key)
+        if embedding is None:
+            embedding = np.asarray(model.encode(text), dtype=np.float32)
+            embedding.setflags(write=False)
+            self._cache.set(key, embedding)
+        return embedding
+
+    def clear(self):
+        self._cache.invalidate()
+
+    def metrics(self) -> dict:
+        metrics = self._cache.metrics()
+        lookups = metrics["hits"] + metrics["misses"]
+        return {
+            "max_entries": metrics["max_entries"],
+            "size": metrics["size"],
+            "hits": metrics["hits"],
+            "misses": metrics["misses"],
+            "evictions": metrics["evictions"],
+            "hit_rate": round(metrics["hits"] / lookups, 4) if lookups else None,
+        }
+
+
+embedding_cache = EmbeddingCache(max_entries=EMBEDDING_CACHE_SIZE)
@@ -0,0 +1,35 @@
+import os
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Upper bound on threads doing blocking Gemini, boto3, Pinecone and Snowflake calls
+BLOCKING_IO_WORKERS = int(os.getenv("BLOCKING_IO_WORKERS", "16"))
+
+_blocking_executor = ThreadPoolExecutor(max_workers=BLOCKING_IO_WORKERS, thread_name_prefix="blocking-io")
+
+
+async def run_blocking(func, *args, **kwargs):
+    """
+    Await a blocking call on the shared bounded executor.
+
+    Keeps the event loop free for other requests while SDK calls that have no
+    async client (Gemini, boto3, Snowflake, SentenceTransformer) are in flight.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_blocking_executor, functools.partial(func, *args, **kwargs))
+
+
+def offloaded(node_fn):
+    """Wrap a blocking LangGraph node so the graph awaits it on the bounded executor"""
+    @functools.wraps(node_fn)
+    async def async_node(state):
+        return await run_blocking(node_fn, state)
+    return async_node
+
+
+def shutdown_executors():
+    _blocking_executor.shutdown(wait=False, cancel_futures=True)
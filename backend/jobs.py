@@ -0,0 +1,188 @@
+import os
+import json
+import time
+import uuid
+import asyncio
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from checkpoints import run_checkpointed_graph
+
+load_dotenv()
+
+# Number of pitch decks processed concurrently in the background
+PITCH_DECK_JOB_WORKERS = int(os.getenv("PITCH_DECK_JOB_WORKERS", "2"))
+# How long finished jobs stay queryable before they are pruned
+JOB_RETENTION_SECONDS = int(os.getenv("JOB_RETENTION_SECONDS", "3600"))
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+
+class Job:
+    """State and progress events for one background job"""
+
+    def __init__(self, job_id: str, kind: str):
+        self.job_id = job_id
+        self.kind = kind
+        self.status = JOB_QUEUED
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self.events = []
+        self._lock = threading.Lock()
+        self.add_event("queued")
+
+    def add_event(self, event_type: str, **data):
+        """Append a progress event; events are numbered from 0 in arrival order"""
+        with self._lock:
+            self._append_event(event_type, data)
+
+    def _append_event(self, event_type, data):
+        self.events.append({
+            "id": len(self.events),
+            "type": event_type,
+            "job_id": self.job_id,
+            "timestamp": time.time(),
+            **data
+        })
+
+    def start(self):
+        with self._lock:
+            self.status = JOB_RUNNING
+            self.started_at = time.time()
+            self._append_event("started", {})
+
+    def finish(self, result=None, error=None):
+        """Mark the job as done; the final event and status change are atomic"""
+        with self._lock:
+            self.finished_at = time.time()
+            if error:
+                self.status = JOB_FAILED
+                self.error = error
+                self._append_event(JOB_FAILED, {"error": error})
+            else:
+                self.status = JOB_COMPLETED
+                self.result = result
+                self._append_event(JOB_COMPLETED, {})
+
+    def is_finished(self) -> bool:
+        return self.status in (JOB_COMPLETED, JOB_FAILED)
+
+    def events_since(self, event_id: int) -> list:
+        """Return events with an id greater than or equal to event_id"""
+        with self._lock:
+            return list(self.events[event_id:])
+
+    def to_dict(self, include_result: bool = True) -> dict:
+        with self._lock:
+            data = {
+                "job_id": self.job_id,
+                "kind": self.kind,
+                "status": self.status,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "completed_nodes": [e["node"] for e in self.events if e["type"] == "node_completed"],
+                "error": self.error,
+            }
+            if include_result:
+                data["result"] = self.result
+            return data
+
+
+class JobManager:
+    """
+    Runs jobs on a bounded thread pool and keeps their status in memory.
+
+    Each job function receives its Job so it can publish progress events, and
+    returns the result dict stored on the job. Exceptions mark the job as failed.
+    Job status is only visible to the process that accepted the job, and work
+    continues after the 202 response, so the backend must run as a single
+    instance with CPU allocated outside requests (see deploy-backend.yml).
+    """
+
+    def __init__(self, max_workers: int = PITCH_DECK_JOB_WORKERS, retention_seconds: int = JOB_RETENTION_SECONDS):
+        self.retention_seconds = retention_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job-worker")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, job_fn, cleanup=None) -> Job:
+        """
+        Queue a job for background execution.
+
+        Args:
+            kind: Short label for the job type, e.g. "process-pitch-deck"
+            job_fn: Callable taking the Job and returning its result dict
+            cleanup: Optional callable run after the job finishes, success or not
+
+        Returns:
+            The queued Job
+        """
+        self._prune()
+        job = Job(uuid.uuid4().hex, kind)
+        with self._lock:
+            self._jobs[job.job_id] = job
+        self._executor.submit(self._run, job, job_fn, cleanup)
+        return job
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job, job_fn, cleanup):
+        job.start()
+        try:
+            job.finish(result=job_fn(job))
+        except Exception as e:
+            print(f"Job {job.job_id} failed: {e}")
+            print(traceback.format_exc())
+            job.finish(error=str(e))
+        finally:
+            if cleanup:
+                try:
+                    cleanup()
+                except Exception as e:
+                    print(f"Error cleaning up job {job.job_id}: {e}")
+
+    def _prune(self):
+        cutoff = time.time() - self.retention_seconds
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job.is_finished() and job.finished_at < cutoff
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def astream_graph_with_progress(graph, initial_state: dict, job: Job, run_id: str) -> dict:
+    """
+    Run (or resume) a checkpointed LangGraph run, publishing a node_completed event per finished node.
+
+    Returns:
+        The final graph state
+    """
+    return await run_checkpointed_graph(
+        graph, initial_state, run_id,
+        on_node=lambda node_name: job.add_event("node_completed", node=node_name)
+    )
+
+
+def run_graph_with_progress(graph, initial_state: dict, job: Job, run_id: str) -> dict:
+    """Synchronous wrapper so graph runs can execute on a job worker thread"""
+    return asyncio.run(astream_graph_with_progress(graph, initial_state, job, run_id))
+
+
+def format_sse(event: dict) -> str:
+    """Encode a job event as a server-sent event frame"""
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
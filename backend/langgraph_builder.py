@@ -4,26 +4,23 @@ import os
 import google.generativeai as genai
 from state import AnalysisState
 from pinecone_pipeline.summary import summarize_pitch_deck_with_gemini
-from pinecone_pipeline.embedding_manager import EmbeddingManager
-from s3_utils import upload_pitch_deck_to_s3
-import snowflake.connector
+from s3_utils import upload_pitch_deck, generate_presigned_url, bucket_name
+from database.snowflake_connect import pooled_connection
 from pinecone_pipeline.mcp_google_search_agent import google_search_with_fallback
 import datetime
 from log_gemini_interaction import log_gemini_interaction
-import plotly.graph_objects as go
-import plotly.express as px
 import json
+from concurrent.futures import ThreadPoolExecutor
+from executors import offloaded
+from competitors import get_top_competitors
+from services import get_embedding_manager
+from llm_cache import llm_cache
+from deck_index import get_deck_index, deck_vector_id
 load_dotenv()
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 genai.configure(api_key=GEMINI_API_KEY)
 
-# Initialize embedding manager
-try:
-    embedding_manager = EmbeddingManager()
-except Exception as e:
-    print(f"Warning: Failed to initialize embedding manager. Pinecone functionality will be disabled: {e}")
-
 # -------------------------
 # Gemini Prompt Generator
 # -------------------------
@@ -62,24 +59,19 @@ Also include a final section: "Market Size Validation & Commentary".
 # -------------------------
 # Hardcoded Snowflake Logic (MCP-less)
 # -------------------------
-SNOWFLAKE_USER = os.getenv("SNOWFLAKE_USER")
-SNOWFLAKE_PASSWORD = os.getenv("SNOWFLAKE_PASSWORD")
-SNOWFLAKE_ACCOUNT = os.getenv("SNOWFLAKE_ACCOUNT")
-SNOWFLAKE_WAREHOUSE = os.getenv("SNOWFLAKE_WAREHOUSE")
-
 def snowflake_query(query, params=None):
-    conn = snowflake.connector.connect(
-        user=SNOWFLAKE_USER,
-        password=SNOWFLAKE_PASSWORD,
-        account=SNOWFLAKE_ACCOUNT,
-        warehouse=SNOWFLAKE_WAREHOUSE,
-    )
-    cursor = conn.cursor()
-    cursor.execute(query, params or {})
-    result = cursor.fetchall()
-    columns = [col[0] for col in cursor.description]
+    with pooled_connection() as (conn, cursor):
+        cursor.execute(query, params or {})
+        result = cursor.fetchall()
+        columns = [col[0] for col in cursor.description]
     return [dict(zip(columns, row)) for row in result]
 
+def snowflake_execute(query, params=None):
+    """Run a write statement on a pooled connection and commit it"""
+    with pooled_connection() as (conn, cursor):
+        cursor.execute(query, params or {})
+        conn.commit()
+
 def get_startup_summary(startup_name: str):
     query = """
     SELECT startup_name, industry, summary_report 
@@ -101,48 +93,50 @@ def get_industry_report(industry_name: str):
     return result[0]["REPORT_SUMMARY"] if result else "No report found."
 
 def get_top_companies(industry_name: str):
-    query = """
-    WITH RankedCompanies AS (
-    SELECT 
-        Company,
-        Industry,
-        Emp_Growth_Percent,
-        Revenue,
-        Short_Description,
-        ROW_NUMBER() OVER (PARTITION BY Company ORDER BY Revenue DESC, Emp_Growth_Percent DESC) AS rn
-    FROM INVESTOR_INTEL_DB.GROWJO_SCHEMA.COMPANY_MERGED_VIEW
-    WHERE Industry = %s
-    )
-    SELECT Company, Industry, Emp_Growth_Percent, Revenue, Short_Description
-    FROM RankedCompanies
-    WHERE rn = 1
-    ORDER BY Revenue DESC, Emp_Growth_Percent DESC
-    LIMIT 10;
+    # Shares the cached (industry, 10) lookup with the dashboard's competitor tab
+    competitors = get_top_competitors(industry_name, limit=10)
+    columns = ("COMPANY", "INDUSTRY", "EMP_GROWTH_PERCENT", "REVENUE", "SHORT_DESCRIPTION")
+    return [{col: competitor.get(col) for col in columns} for competitor in competitors]
+
+# STARTUP columns graph runs may write; names are interpolated into the UPDATE
+STARTUP_WRITE_COLUMNS = (
+    "summary_report", "analytics_report", "news_report", "competitor_visualizations",
+    "pitch_deck_link", "pitch_deck_filename",
+)
+
+def flush_startup_writes(startup_name: str, startup_writes: dict) -> bool:
     """
-    result = snowflake_query(query, (industry_name,))
-    return result
+    Apply all queued column updates for one startup as a single UPDATE.
 
-def store_analysis_report(startup_name: str, report_text: str):
-    query = """
+    Args:
+        startup_name: STARTUP_NAME of the row to update
+        startup_writes: Column name -> value, limited to STARTUP_WRITE_COLUMNS
+
+    Returns:
+        True if a statement was executed, False if there was nothing to write
+    """
+    if not startup_writes:
+        return False
+    unknown = [column for column in startup_writes if column not in STARTUP_WRITE_COLUMNS]
+    if unknown:
+        raise ValueError(f"Invalid startup columns: {unknown}")
+
+    columns = list(startup_writes)
+    assignments = ", ".join(f"{column} = %s" for column in columns)
+    query = f"""
     UPDATE INVESTOR_INTEL_DB.STARTUP_INFORMATION.STARTUP
-    SET analytics_report = %s
+    SET {assignments}
     WHERE startup_name = %s
     """
-    conn = snowflake.connector.connect(
-        user=SNOWFLAKE_USER,
-        password=SNOWFLAKE_PASSWORD,
-        account=SNOWFLAKE_ACCOUNT,
-        warehouse=SNOWFLAKE_WAREHOUSE,
-        database="INVESTOR_INTEL_DB"
-    )
-    cursor = conn.cursor()
-    cursor.execute(query, (report_text, startup_name))
-    conn.commit()
-    return {"status": "success", "message": f"Report stored for {startup_name}"}
+    snowflake_execute(query, tuple(startup_writes[column] for column in columns) + (startup_name,))
+    return True
 
 # -------------------------
 # PDF Processing Node
 # -------------------------
+# Pitch deck S3 uploads run here while the node waits on Gemini
+_upload_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="pitch-deck-upload")
+
 def process_pitch_deck(state):
     """Process a pitch deck PDF and generate a summary"""
     # Debug printing to help diagnose the issue
@@ -167,14 +161,38 @@ def process_pitch_deck(state):
         website_url = state.get("website_url", "")
         original_filename = state.get("original_filename", os.path.basename(file_path))
         
-        print(f"Uploading file to S3 for {startup_name} in {industry}")
-        # Upload file to S3
-        s3_location = upload_pitch_deck_to_s3(
-            file_path=file_path,
-            startup_name=startup_name,
-            industry=industry,
-            original_filename=original_filename
-        )
+        # A deck with the same bytes was processed before: reuse its S3 object and summary
+        content_hash = state.get("content_hash")
+        known_deck = get_deck_index().lookup(content_hash) if content_hash else None
+        
+        if known_deck:
+            print(f"Pitch deck {content_hash[:12]} already processed; reusing stored artifacts")
+            s3_key = known_deck["s3_key"]
+            s3_location = generate_presigned_url(bucket_name, s3_key)
+            investor_summary = known_deck["summary"]
+        else:
+            # Upload and summarize concurrently: both only read the local file, and the
+            # S3 upload finishes well within Gemini's file-processing wait
+            print(f"Uploading file to S3 for {startup_name} in {industry}")
+            upload_future = _upload_executor.submit(
+                upload_pitch_deck,
+                file_path=file_path,
+                startup_name=startup_name,
+                industry=industry,
+                original_filename=original_filename,
+                content_hash=content_hash
+            )
+            
+            print(f"Generating summary using Gemini for {file_path}")
+            try:
+                investor_summary = summarize_pitch_deck_with_gemini(
+                    file_path=file_path,
+                    api_key=GEMINI_API_KEY,
+                    model_name="gemini-1.5-flash"
+                )
+            finally:
+                # Join the upload before returning so the temp file outlives it
+                s3_key, s3_location = upload_future.result()
         
         print(f"S3 Upload result: {s3_location}")
         if not s3_location:
@@ -183,14 +201,6 @@ def process_pitch_deck(state):
             
         state["s3_location"] = s3_location
         
-        print(f"Generating summary using Gemini for {file_path}")
-        # Generate summary using Gemini
-        investor_summary = summarize_pitch_deck_with_gemini(
-            file_path=file_path,
-            api_key=GEMINI_API_KEY,
-            model_name="gemini-1.5-flash"
-        )
-        
         print(f"Summary generation complete: {investor_summary is not None}")
         if not investor_summary:
             state["error"] = "Failed to generate summary"
@@ -198,20 +208,51 @@ def process_pitch_deck(state):
             
         # state["summary_text"] = investor_summary
         
-        # Store embedding in Pinecone if available
-        if embedding_manager:
-            embedding_success = embedding_manager.store_summary_embeddings(
+        vector_id = deck_vector_id(startup_name, content_hash) if content_hash else None
+        embedding_success = False
+        if known_deck and known_deck["vector_id"] and known_deck["startup_name"] == startup_name:
+            # Already embedded for this startup; only the Snowflake row needs updating
+            state["startup_writes"] = {
+                "summary_report": investor_summary,
+                "pitch_deck_link": s3_location,
+                "pitch_deck_filename": original_filename
+            }
+            state["embedding_status"] = "reused"
+        else:
+            # Store embedding in Pinecone if available
+            try:
+                embedding_manager = get_embedding_manager()
+            except Exception as e:
+                print(f"Warning: Failed to initialize embedding manager. Pinecone functionality will be disabled: {e}")
+                embedding_manager = None
+            if embedding_manager:
+                # The summary and deck link are queued and written with the report by store_report
+                startup_writes = {}
+                embedding_success = embedding_manager.store_summary_embeddings(
+                    summary=investor_summary,
+                    startup_name=startup_name,
+                    industry=industry,
+                    website_url=website_url,
+                    linkedin_urls=linkedin_urls,
+                    original_filename=original_filename,
+                    s3_location=s3_location,
+                    snowflake_writes=startup_writes,
+                    vector_id=vector_id
+                )
+                state["startup_writes"] = startup_writes
+                state["embedding_status"] = "success" if embedding_success else "failed"
+            else:
+                state["embedding_status"] = "skipped"
+        
+        if content_hash and (not known_deck or embedding_success):
+            get_deck_index().record(
+                content_hash,
+                s3_key=s3_key,
                 summary=investor_summary,
+                vector_id=vector_id if embedding_success else None,
                 startup_name=startup_name,
-                industry=industry,
-                website_url=website_url,
-                linkedin_urls=linkedin_urls,
-                original_filename=original_filename,
-                s3_location=s3_location
+                original_filename=original_filename
             )
-            state["embedding_status"] = "success" if embedding_success else "failed"
-        else:
-            state["embedding_status"] = "skipped"
             
         # Update the summary state for subsequent nodes
         # Create the summary object in the format expected by other nodes
@@ -275,24 +316,20 @@ def fetch_summary(state):
 #         return {"status": "failed", "message": f"Error: {str(e)}"}
 
 def fetch_industry_report(state):
+    # Runs in parallel with fetch_competitors and fetch_news, so only return the keys it owns
     if not state.get("summary") or not isinstance(state["summary"], dict):
-        state["industry_report"] = "No industry report available - summary data missing"
-        return state
+        return {"industry_report": "No industry report available - summary data missing"}
     
     industry = state["summary"].get("INDUSTRY")
     if not industry:
-        state["industry_report"] = "No industry report available - industry not specified"
-        return state
+        return {"industry_report": "No industry report available - industry not specified"}
         
     report = get_industry_report(industry)
-    state["industry_report"] = report
-    return state
+    return {"industry_report": report}
 
 def fetch_competitors(state):
     if not state.get("summary") or not isinstance(state["summary"], dict):
-        state["competitors"] = []
-        state["competitor_visualizations"] = None
-        return state
+        return {"competitors": [], "competitor_visualizations": None}
     
     industry = state["summary"].get("INDUSTRY")
     if industry == "Renewable Energy":
@@ -300,22 +337,14 @@ def fetch_competitors(state):
         
     startup_name = state["summary"].get("STARTUP_NAME")
     if not industry or not startup_name:
-        state["competitors"] = []
-        state["competitor_visualizations"] = None
-        return state
+        return {"competitors": [], "competitor_visualizations": None}
         
     competitors = get_top_companies(industry)
-    state["competitors"] = competitors
     
-    # Generate visualizations for the competitors
+    # Generate visualizations for the competitors; they are stored by store_report
     visualizations = generate_competitor_visualizations(competitors)
-    state["competitor_visualizations"] = visualizations
-    
-    # Store visualizations in Snowflake
-    if visualizations:
-        store_visualizations_in_snowflake(startup_name, visualizations)
     
-    return state
+    return {"competitors": competitors, "competitor_visualizations": visualizations}
 
 def generate_report(state):
     # Check if we have the necessary data
@@ -328,107 +357,119 @@ def generate_report(state):
     industry = state["summary"].get("INDUSTRY", "Unknown")
     model_name = "gemini-1.5-flash"
     
-    # Start timing for response time measurement
-    start_time = datetime.datetime.now()
-    
-    # Generate the prompt and response
-    model = genai.GenerativeModel(model_name)
     prompt = generate_gemini_prompt(
         startup=state["summary"],
         industry_report=state["industry_report"],
         competitors=state["competitors"]
     )
     
-    # Generate the content
-    response = model.generate_content(prompt)
-    final_report = response.text
-    
-    # Calculate response time
-    end_time = datetime.datetime.now()
-    response_time_ms = int((end_time - start_time).total_seconds() * 1000)
-    
-    # Create session ID (optional - you can use this to group related calls)
-    session_id = f"report-{startup_name}-{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}"
-    
-    # Get tokens if available (may not be available in all model versions)
-    tokens_used = None
-    if hasattr(response, 'usage') and response.usage:
-        tokens_used = response.usage.total_tokens
+    def generate():
+        # Start timing for response time measurement
+        start_time = datetime.datetime.now()
+        
+        # Generate the content
+        model = genai.GenerativeModel(model_name)
+        response = model.generate_content(prompt)
+        final_report = response.text
+        
+        # Calculate response time
+        end_time = datetime.datetime.now()
+        response_time_ms = int((end_time - start_time).total_seconds() * 1000)
+        
+        # Create session ID (optional - you can use this to group related calls)
+        session_id = f"report-{startup_name}-{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}"
+        
+        # Get tokens if available (may not be available in all model versions)
+        tokens_used = None
+        if hasattr(response, 'usage') and response.usage:
+            tokens_used = response.usage.total_tokens
+        
+        # Log the Gemini interaction
+        log_gemini_interaction(
+            startup_name=startup_name,
+            industry=industry,
+            model=model_name,
+            prompt=prompt,
+            response=final_report,
+            response_time_ms=response_time_ms,
+            tokens_used=tokens_used,
+            session_id=session_id
+        )
+        return final_report
     
-    # Log the Gemini interaction
-    log_gemini_interaction(
-        startup_name=startup_name,
-        industry=industry,
-        model=model_name,
-        prompt=prompt,
-        response=final_report,
-        response_time_ms=response_time_ms,
-        tokens_used=tokens_used,
-        session_id=session_id
-    )
+    # Identical inputs (e.g. re-running /analyze) reuse the cached report unless a refresh was requested
+    final_report = llm_cache.generate(model_name, prompt, generate, bypass=bool(state.get("refresh")))
     print("Final report generated and logged")
     state["final_report"] = final_report
     return state
 
+# Snowflake writes run here so the graph can return as soon as the report is ready
+_storage_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="analysis-storage")
+
+def persist_analysis_outputs(startup_name: str, startup_writes: dict):
+    """Write every STARTUP column produced by a graph run to Snowflake in one statement"""
+    try:
+        if flush_startup_writes(startup_name, startup_writes):
+            print(f"Analysis outputs stored for {startup_name}: {', '.join(startup_writes)}")
+    except Exception as e:
+        print(f"Error storing analysis outputs for {startup_name}: {e}")
+
+def collect_startup_writes(state) -> dict:
+    """Combine the columns queued during the run with the report, visualizations and news"""
+    writes = dict(state.get("startup_writes") or {})
+    if state.get("final_report"):
+        writes["analytics_report"] = state["final_report"]
+    if state.get("competitor_visualizations"):
+        writes["competitor_visualizations"] = json.dumps(state["competitor_visualizations"])
+    if state.get("news"):
+        writes["news_report"] = state["news"]
+    return writes
+
 def store_report(state):
     print("Storing report")
-    if not state.get("startup_name") or not state.get("final_report"):
-        return state
-        
-    store_analysis_report(state["startup_name"], state["final_report"])
-    print("Report stored")
-    return state
+    startup_name = state.get("startup_name")
+    if state.get("summary") and isinstance(state["summary"], dict):
+        startup_name = state["summary"].get("STARTUP_NAME") or startup_name
+    startup_writes = collect_startup_writes(state)
+    if not startup_name or not startup_writes:
+        return {}
+    
+    # Hand the single write to the background executor instead of blocking the response
+    _storage_executor.submit(persist_analysis_outputs, startup_name, startup_writes)
+    print("Report storage scheduled")
+    return {}
 
 async def fetch_news(state):
-    """Fetch news using the websearch agent and store in Snowflake"""
+    """Fetch news using the websearch agent; news is stored later by store_report"""
     if not state.get("summary") or not isinstance(state["summary"], dict):
-        state["news"] = "No news available - summary data missing"
-        return state
+        return {"news": "No news available - summary data missing"}
     
     startup_name = state["summary"].get("STARTUP_NAME")
     industry = state["summary"].get("INDUSTRY")
     
     if not startup_name or not industry:
-        state["news"] = "No news available - startup name or industry not specified"
-        return state
+        return {"news": "No news available - startup name or industry not specified"}
     
-    # Call the websearch agent
-    results, search_type = await google_search_with_fallback(startup_name, industry)
-    news_content = "\n".join([f"{r.get('title', '')}: {r.get('url', '')}" for r in results.get("results", [])])
+    # News is optional enrichment: a failed search must not take down the parallel
+    # branches that the report depends on
+    try:
+        results, search_type = await google_search_with_fallback(startup_name, industry)
+        news_content = "\n".join([f"{r.get('title', '')}: {r.get('url', '')}" for r in results.get("results", [])])
+    except Exception as e:
+        print(f"Error fetching news for {startup_name}: {e}")
+        return {"news": "No news available - news search failed"}
     
-    # Store the news in the state
-    state["news"] = news_content
     print("news_content", news_content)
-    # Update the Snowflake table with the news
-    store_news_in_snowflake(startup_name, news_content)
-    
-    return state
-
-def store_news_in_snowflake(startup_name: str, news: str):
-    """Store the news in the Snowflake table"""
-    query = """
-    UPDATE INVESTOR_INTEL_DB.STARTUP_INFORMATION.STARTUP
-    SET news_report = %s
-    WHERE startup_name = %s
-    """
-    conn = snowflake.connector.connect(
-        user=SNOWFLAKE_USER,
-        password=SNOWFLAKE_PASSWORD,
-        account=SNOWFLAKE_ACCOUNT,
-        warehouse=SNOWFLAKE_WAREHOUSE,
-        database="INVESTOR_INTEL_DB"
-    )
-    cursor = conn.cursor()
-    cursor.execute(query, (news, startup_name))
-    conn.commit()
-    cursor.close()
-    conn.close()
+    return {"news": news_content}
 
 def generate_competitor_visualizations(competitors):
     """Generate plotly visualizations for competitors data"""
     if not competitors or len(competitors) == 0:
         return None
     
+    # Imported here so plotly's import cost is not paid at API startup
+    import plotly.express as px
+    
     # Extract data for plots and convert to appropriate types
     companies = [str(comp.get('COMPANY', 'Unknown')) for comp in competitors]
     
@@ -497,103 +538,43 @@ def generate_competitor_visualizations(competitors):
         'growth_chart': growth_json
     }
 
-def store_visualizations_in_snowflake(startup_name: str, visualization_data: dict):
-    """Store the visualization data in the Snowflake table"""
-    # Convert the visualization data to a JSON string
-    viz_json = json.dumps(visualization_data)
-    
-    query = """
-    UPDATE INVESTOR_INTEL_DB.STARTUP_INFORMATION.STARTUP
-    SET competitor_visualizations = %s
-    WHERE startup_name = %s
-    """
-    try:
-        conn = snowflake.connector.connect(
-            user=SNOWFLAKE_USER,
-            password=SNOWFLAKE_PASSWORD,
-            account=SNOWFLAKE_ACCOUNT,
-            warehouse=SNOWFLAKE_WAREHOUSE,
-            database="INVESTOR_INTEL_DB"
-        )
-        cursor = conn.cursor()
-        cursor.execute(query, (viz_json, startup_name))
-        conn.commit()
-        cursor.close()
-        conn.close()
-        print(f"Successfully stored visualizations for {startup_name}")
-        return True
-    except Exception as e:
-        print(f"Error storing visualizations in Snowflake: {e}")
-        return False
-
-def store_pitch_deck_link(startup_name: str, pitch_deck_link: str, filename: str = None):
-    """Store the pitch deck link and filename in the Snowflake table"""
-    if not startup_name or not pitch_deck_link:
-        print("Missing startup name or pitch deck link, skipping storage")
-        return {"status": "failed", "message": "Missing startup name or pitch deck link"}
-        
-    if filename:
-        query = """
-        UPDATE INVESTOR_INTEL_DB.STARTUP_INFORMATION.STARTUP
-        SET pitch_deck_link = %s, pitch_deck_filename = %s
-        WHERE startup_name = %s
-        """
-        params = (pitch_deck_link, filename, startup_name)
-    else:
-        query = """
-        UPDATE INVESTOR_INTEL_DB.STARTUP_INFORMATION.STARTUP
-        SET pitch_deck_link = %s
-        WHERE startup_name = %s
-        """
-        params = (pitch_deck_link, startup_name)
-        
-    try:
-        conn = snowflake.connector.connect(
-            user=SNOWFLAKE_USER,
-            password=SNOWFLAKE_PASSWORD,
-            account=SNOWFLAKE_ACCOUNT,
-            warehouse=SNOWFLAKE_WAREHOUSE,
-            database="INVESTOR_INTEL_DB"
-        )
-        cursor = conn.cursor()
-        cursor.execute(query, params)
-        conn.commit()
-        cursor.close()
-        conn.close()
-        print(f"Successfully stored pitch deck link for {startup_name}")
-        return {"status": "success", "message": f"Pitch deck link stored for {startup_name}"}
-    except Exception as e:
-        print(f"Error storing pitch deck link in Snowflake: {e}")
-        return {"status": "failed", "message": f"Error: {str(e)}"}
-
 # -------------------------
 # Graph Compiler
 # -------------------------
 
-def build_analysis_graph():
+def build_analysis_graph(checkpointer=None):
     builder = StateGraph(AnalysisState)
     print("Building analysis graph")
-    # Add nodes
-    builder.add_node("process_pitch_deck", process_pitch_deck)
-    builder.add_node("fetch_summary", fetch_summary)
-    builder.add_node("fetch_industry_report", fetch_industry_report)
-    builder.add_node("fetch_competitors", fetch_competitors)
-    builder.add_node("generate_report", generate_report)
-    builder.add_node("store_report", store_report)
-    builder.add_node("fetch_news", fetch_news)  # New node for fetching news
+    # Add nodes; blocking Gemini/boto3/Snowflake nodes run on the bounded executor
+    # so a slow deck never holds the event loop
+    builder.add_node("process_pitch_deck", offloaded(process_pitch_deck))
+    builder.add_node("fetch_summary", offloaded(fetch_summary))
+    builder.add_node("fetch_industry_report", offloaded(fetch_industry_report))
+    builder.add_node("fetch_competitors", offloaded(fetch_competitors))
+    builder.add_node("fetch_news", fetch_news)
+    builder.add_node("generate_report", offloaded(generate_report))
+    builder.add_node("store_report", offloaded(store_report))
 
     # Set conditional starting point
     builder.set_conditional_entry_point(
-        lambda state: "process_pitch_deck" if state.get("pdf_file_path") else "fetch_summary"
+        lambda state: "process_pitch_deck" if state.get("pdf_file_path") else "fetch_summary",
+        ["process_pitch_deck", "fetch_summary"]
     )
     
-    # Add edges
-    builder.add_edge("process_pitch_deck", "fetch_summary")
-    builder.add_edge("fetch_summary", "fetch_industry_report")
-    builder.add_edge("fetch_industry_report", "fetch_competitors")
-    builder.add_edge("fetch_competitors", "generate_report")
+    # Stop early if the pitch deck could not be processed
+    builder.add_conditional_edges(
+        "process_pitch_deck",
+        lambda state: END if state.get("error") else "fetch_summary",
+        [END, "fetch_summary"]
+    )
+
+    # The three fetches only depend on the summary, so fan them out in parallel
+    for fetch_node in ("fetch_industry_report", "fetch_competitors", "fetch_news"):
+        builder.add_edge("fetch_summary", fetch_node)
+
+    # ...and join them before generating the report
+    builder.add_edge(["fetch_industry_report", "fetch_competitors", "fetch_news"], "generate_report")
     builder.add_edge("generate_report", "store_report")
-    builder.add_edge("store_report", "fetch_news")  # Add edge to fetch news
-    builder.add_edge("fetch_news", END)  # End after fetching news
+    builder.add_edge("store_report", END)
 
-    return builder.compile()
+    return builder.compile(checkpointer=checkpointer)
@@ -0,0 +1,228 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from dotenv import load_dotenv
+try:
+    from cache import LRUTTLCache
+except ImportError:
+    from .cache import LRUTTLCache
+
+load_dotenv()
+
+# Cache Gemini responses to deterministic prompts (reports, summaries, chat answers)
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+LLM_CACHE_MEMORY_ENTRIES = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "256"))
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", os.path.join(tempfile.gettempdir(), "investorintel_llm_cache"))
+LLM_CACHE_MAX_DISK_MB = float(os.getenv("LLM_CACHE_MAX_DISK_MB", "200"))
+
+_MISSING = object()
+
+
+def sha256_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def sha256_file(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def response_cache_key(model_name: str, prompt: str, file_hash: str = None) -> str:
+    """Cache key for a generation: the model, a hash of the prompt text and the hash of any attached file"""
+    prompt_hash = sha256_bytes(prompt.encode("utf-8"))
+    return sha256_bytes(json.dumps([model_name, prompt_hash, file_hash]).encode("utf-8"))
+
+
+class DiskCache:
+    """
+    Directory of JSON files, one per key, with a TTL and a total size bound.
+
+    Survives restarts and is shared by every process using the same directory.
+    Once the directory grows past max_bytes the least recently written files are removed.
+    """
+
+    def __init__(self, directory: str, ttl_seconds: float, max_bytes: int):
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+        os.makedirs(directory, exist_ok=True)
+        self._size = sum(entry.stat().st_size for entry in os.scandir(directory) if entry.name.endswith(".json"))
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key, default=None):
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                self._stats["misses"] += 1
+            return default
+        if time.time() - entry["stored_at"] > self.ttl_seconds:
+            self._remove(path)
+            with self._lock:
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+            return default
+        with self._lock:
+            self._stats["hits"] += 1
+        return entry["value"]
+
+    def set(self, key, value):
+        path = self._path(key)
+        data = json.dumps({"stored_at": time.time(), "value": value})
+        # Write to a temp file and rename so readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(data)
+            with self._lock:
+                try:
+                    self._size -= os.path.getsize(path)
+                except OSError:
+                    pass  # a new entry
+                os.replace(tmp_path, path)
+                self._size += len(data.encode("utf-8"))
+        except Exception:
+            # e.g. the disk is full; don't leave the partial file behind
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        if self._size > self.max_bytes:
+            self._evict()
+
+    def _remove(self, path: str):
+        with self._lock:
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+                self._size -= size
+            except OSError:
+                pass
+
+    def _evict(self):
+        entries = []
+        try:
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(".json"):
+                    try:
+                        entries.append((entry.stat().st_mtime, entry.path))
+                    except OSError:
+                        pass  # removed by another process since the scan
+        except OSError as e:
+            print(f"Error scanning LLM disk cache for eviction: {str(e)}")
+            return
+        for _, path in sorted(entries):
+            if self._size <= self.max_bytes:
+                break
+            self._remove(path)
+            with self._lock:
+                self._stats["evictions"] += 1
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {"directory": self.directory, "bytes": self._size, "max_bytes": self.max_bytes, **self._stats}
+
+
+class LLMResponseCache:
+    """
+    Tiered cache of LLM responses.
+
+    Tiers are checked in order (e.g. memory, then disk) and a hit in a later tier
+    is copied into the earlier ones. Any object with get(key, default) and
+    set(key, value) can be used as a tier.
+    """
+
+    def __init__(self, tiers, enabled: bool = True):
+        self.tiers = list(tiers)
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "bypasses": 0, "stores": 0}
+
+    def _count(self, stat: str):
+        with self._lock:
+            self._stats[stat] += 1
+
+    def _set_tier(self, tier, key: str, value: str):
+        """Store in one tier; a failing tier (e.g. a full disk) is skipped rather than failing the caller"""
+        try:
+            tier.set(key, value)
+        except OSError as e:
+            print(f"Error writing LLM cache tier {type(tier).__name__}: {str(e)}")
+
+    def get(self, key: str):
+        """Return the cached response for key, or None"""
+        for i, tier in enumerate(self.tiers):
+            value = tier.get(key, _MISSING)
+            if value is not _MISSING:
+                for earlier in self.tiers[:i]:
+                    self._set_tier(earlier, key, value)
+                self._count("hits")
+                return value
+        self._count("misses")
+        return None
+
+    def set(self, key: str, value: str):
+        for tier in self.tiers:
+            self._set_tier(tier, key, value)
+        self._count("stores")
+
+    def generate(self, model_name: str, prompt: str, generate, file_hash: str = None, bypass: bool = False):
+        """
+        Return the cached response for (model, prompt, file), calling generate() on a miss.
+
+        Args:
+            model_name: Model the prompt is sent to
+            prompt: Full prompt text
+            generate: Zero-argument callable that calls the model and returns its text
+            file_hash: SHA-256 of a file attached to the prompt, if any
+            bypass: Always call the model; the fresh response still replaces the cached one
+
+        Returns:
+            The response text. Empty or None responses are not cached.
+        """
+        key = response_cache_key(model_name, prompt, file_hash)
+        if bypass or not self.enabled:
+            self._count("bypasses")
+        else:
+            cached = self.get(key)
+            if cached is not None:
+                return cached
+        value = generate()
+        if value and self.enabled:
+            self.set(key, value)
+        return value
+
+    def metrics(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        return {
+            "enabled": self.enabled,
+            **stats,
+            "tiers": [tier.metrics() for tier in self.tiers if hasattr(tier, "metrics")],
+        }
+
+
+def _create_llm_cache() -> LLMResponseCache:
+    tiers = [LRUTTLCache(max_entries=LLM_CACHE_MEMORY_ENTRIES, ttl_seconds=LLM_CACHE_TTL_SECONDS)]
+    try:
+        tiers.append(DiskCache(LLM_CACHE_DIR, LLM_CACHE_TTL_SECONDS, int(LLM_CACHE_MAX_DISK_MB * 1024 * 1024)))
+    except OSError as e:
+        print(f"LLM disk cache unavailable, using memory only: {e}")
+    return LLMResponseCache(tiers, enabled=LLM_CACHE_ENABLED)
+
+
+llm_cache = _create_llm_cache()
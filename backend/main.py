@@ -1,27 +1,39 @@
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException
+from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Request, Depends, Header
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, JSONResponse
 from pydantic import BaseModel
 from langgraph_builder import build_analysis_graph
-from pinecone_pipeline.embedding_manager import EmbeddingManager
-from startup_check import startup_exists_check, StartupCheckRequest
+from startup_check import startup_exists_check, StartupCheckRequest, startup_index
 from database import db_utils, investor_auth, investorIntel_entity
-from pinecone_pipeline.gemini_assistant import GeminiAssistant
 import os
+import hmac
+import asyncio
+import itertools
 import pandas as pd
 import tempfile
 import shutil
 import json
 import traceback
 from typing import List, Optional
-from s3_utils import upload_pitch_deck_to_s3
-from pinecone_pipeline.embedding_manager import EmbeddingManager
-from database.snowflake_connect import get_connection
+from database.snowflake_connect import get_pool_metrics, close_pool
+from jobs import JobManager, run_graph_with_progress, format_sse
+from checkpoints import get_checkpointer, new_run_id, run_checkpointed_graph
+from executors import run_blocking, shutdown_executors
+from competitors import get_top_competitors, invalidate_competitor_cache, competitor_cache
+from services import registry, WARM_UP_ON_STARTUP
+from deck_index import copy_and_hash, get_deck_index
+from llm_cache import llm_cache
+from semantic_cache import chat_cache
+from embedding_cache import embedding_cache
+from vector_store import mirror_metrics
+from text_store import text_store
+from vector_manifest import get_vector_manifest
+from embedding_batcher import batcher_metrics
+from pinecone_pipeline.gemini_assistant import UNAVAILABLE_RESPONSE
 
-# Initialize Snowflake connection at startup
-conn, cursor = get_connection()
-
-embedding_manager = EmbeddingManager()
-gemini_assistant = GeminiAssistant()
+# Shared services are built on first use (or by the warm-up thread), not at import
+embedding_manager = registry.proxy("embedding_manager")
+gemini_assistant = registry.proxy("gemini_assistant")
 
 app = FastAPI(
     title="InvestorIntel API",
@@ -32,6 +44,13 @@ app = FastAPI(
 # Create the langgraph
 graph = None
 
+# Background workers for asynchronous pitch deck jobs
+job_manager = JobManager()
+JOB_EVENT_POLL_SECONDS = 0.5
+
+# Shared secret for the cache/index maintenance endpoints, sent as X-Admin-Token by the DAGs
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
 # Add CORS middleware to allow requests from the Streamlit frontend
 app.add_middleware(
     CORSMiddleware,
@@ -41,9 +60,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def require_admin_token(x_admin_token: Optional[str] = Header(None)):
+    """Reject maintenance calls without the ADMIN_TOKEN; refuse them all when it is not configured"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=503, detail="Admin endpoints are disabled: ADMIN_TOKEN is not set")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid or missing X-Admin-Token")
+
 # ------- Models -------
 class AnalyzeRequest(BaseModel):
     startup_name: str
+    run_id: Optional[str] = None
+    refresh: bool = False  # Regenerate the report instead of reusing a cached one
 
 class PitchDeckRequest(BaseModel):
     startup_name: str
@@ -95,6 +123,11 @@ class ColumnRequest(BaseModel):
     column_name: str
     startup_id:   int
 
+class StartupColumnsRequest(BaseModel):
+    columns: List[str]
+    startup_id: Optional[int] = None
+    startup_ids: Optional[List[int]] = None
+
 class UpdateStatusRequest(BaseModel):
     investor_id: int
     startup_id: int
@@ -117,24 +150,116 @@ async def health_check():
         "message": "API is running and all required services are operational"
     }
 
+@app.get("/ready")
+async def readiness_check():
+    """Report ready only once the embedding model and other heavy services are loaded"""
+    services = registry.status()
+    if registry.is_ready():
+        return {"status": "ready", "services": services}
+    status = "failed" if any(s["status"] == "failed" for s in services.values()) else "warming_up"
+    return JSONResponse(status_code=503, content={"status": status, "services": services})
+
+@app.get("/metrics")
+async def metrics():
+    """Runtime metrics for shared backend resources"""
+    return {
+        "snowflake_pool": get_pool_metrics(),
+        "competitor_cache": competitor_cache.metrics(),
+        "deck_index": get_deck_index().metrics(),
+        "llm_cache": llm_cache.metrics(),
+        "chat_cache": chat_cache.metrics(),
+        "embedding_cache": embedding_cache.metrics(),
+        "startup_index": startup_index.metrics(),
+        "vector_mirrors": mirror_metrics(),
+        "text_store": text_store.metrics(),
+        "vector_manifest": get_vector_manifest().metrics(),
+        "embedding_batcher": batcher_metrics(),
+        "services": registry.status()
+    }
+
 @app.post("/check-startup-exists")
 async def check_startup_exists(request: StartupCheckRequest):
     """Check if a startup already exists in the database"""
-    return startup_exists_check(request.startup_name)
+    return await run_blocking(startup_exists_check, request.startup_name)
 
 @app.post("/analyze")
-def analyze_startup(request: AnalyzeRequest):
-    """Analyze existing startup by name"""
+async def analyze_startup(request: AnalyzeRequest):
+    """Analyze existing startup by name; on failure, retry with the X-Run-Id header's value as run_id"""
+    run_id = request.run_id or new_run_id()
     try:
-        state = {"startup_name": request.startup_name}
-        result = graph.invoke(state)
+        state = {"startup_name": request.startup_name, "refresh": request.refresh}
+        result = await run_checkpointed_graph(get_graph(), state, run_id)
         return {
             "status": "success",
             "startup": request.startup_name,
+            "run_id": run_id,
             "final_report": result.get("final_report")
         }
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=500, detail=str(e), headers={"X-Run-Id": run_id})
+
+def get_graph():
+    """Build the checkpointed analysis graph on first use and reuse it afterwards"""
+    global graph
+    if not graph:
+        graph = build_analysis_graph(checkpointer=get_checkpointer())
+    return graph
+
+def parse_linkedin_urls(linkedin_urls: Optional[str]) -> list:
+    """Parse the LinkedIn URLs form field, which is a JSON list or a single URL"""
+    if not linkedin_urls:
+        return []
+    try:
+        return json.loads(linkedin_urls)
+    except json.JSONDecodeError:
+        # If not valid JSON, treat it as a single URL
+        return [linkedin_urls]
+
+def save_upload(file: UploadFile, temp_dir: str):
+    """
+    Copy the uploaded pitch deck into temp_dir, hashing it as it streams in.
+
+    Returns:
+        Tuple of (local path, SHA-256 of the content)
+    """
+    file_path = os.path.join(temp_dir, "temp_pitch_deck.pdf")
+    try:
+        with open(file_path, "wb") as buffer:
+            content_hash = copy_and_hash(file.file, buffer)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
+    return file_path, content_hash
+
+def build_pitch_deck_state(file_path, original_filename, startup_name, industry, linkedin_urls_list,
+                           website_url, funding_info, content_hash=None) -> dict:
+    """Prepare the initial graph state for a pitch deck run"""
+    return {
+        "pdf_file_path": file_path,
+        "content_hash": content_hash,
+        "startup_name": startup_name,
+        "industry": industry,
+        "linkedin_urls": linkedin_urls_list,
+        "website_url": website_url,
+        "original_filename": original_filename,
+        "funding_info": funding_info
+    }
+
+def pitch_deck_response(result: dict, initial_state: dict, run_id: str) -> dict:
+    """Shape the final graph state into the /process-pitch-deck response body"""
+    return {
+        "run_id": run_id,
+        "startup_name": initial_state["startup_name"],
+        "industry": initial_state["industry"],
+        "linkedin_urls": initial_state["linkedin_urls"],
+        "s3_location": result.get("s3_location"),
+        "original_filename": initial_state["original_filename"],
+        "summary": result.get("summary_text"),
+        "embedding_status": result.get("embedding_status"),
+        "final_report": result.get("final_report"),
+        "news": result.get("news"),
+        "competitor_visualizations": result.get("competitor_visualizations"),
+        "funding_info": initial_state["funding_info"]
+    }
 
 @app.post("/process-pitch-deck")
 async def process_pitch_deck(
@@ -147,97 +272,165 @@ async def process_pitch_deck(
     round_type: str = Form(None),
     equity_offered: str = Form(None),
     pre_money_valuation: str = Form(None),
-    post_money_valuation: str = Form(None)
+    post_money_valuation: str = Form(None),
+    run_id: str = Form(None)
 ):
     """
     Process a pitch deck PDF, generate summary, and analysis report all at once.
+
+    Every run is checkpointed under run_id (generated when omitted and returned in
+    the response, or in the X-Run-Id header on failure). Retrying a failed run with
+    the same run_id resumes after the last completed step instead of redoing the
+    S3 upload and Gemini calls.
     """
     # Parse the LinkedIn URLs from JSON string if provided
-    linkedin_urls_list = []
-    if linkedin_urls:
-        try:
-            linkedin_urls_list = json.loads(linkedin_urls)
-        except json.JSONDecodeError:
-            # If not valid JSON, treat it as a single URL
-            linkedin_urls_list = [linkedin_urls]
-    
-    # Get the original filename
-    original_filename = file.filename
+    linkedin_urls_list = parse_linkedin_urls(linkedin_urls)
     
     # Set default values if not provided
     startup_name = startup_name or "Unknown"
     industry = industry or "Unknown"
     print("Startup name:", startup_name)
     print("Funding info:", funding_amount, round_type, equity_offered)
+    run_id = run_id or new_run_id()
     
     # Create a temporary directory to store the uploaded file
     with tempfile.TemporaryDirectory() as temp_dir:
-        # Create a temporary filename for local storage
-        temp_filename = f"temp_pitch_deck.pdf"
-        file_path = os.path.join(temp_dir, temp_filename)
-        
-        # Save the uploaded file to the temporary directory
-        try:
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
+        file_path, content_hash = save_upload(file, temp_dir)
         
         # Process with langgraph
         try:
             # Prepare the initial state for the graph with funding information
-            initial_state = {
-                "pdf_file_path": file_path,
-                "startup_name": startup_name,
-                "industry": industry,
-                "linkedin_urls": linkedin_urls_list,
-                "website_url": website_url,
-                "original_filename": original_filename,
-                # Add funding information to the initial state
-                "funding_info": {
+            initial_state = build_pitch_deck_state(
+                file_path, file.filename, startup_name, industry, linkedin_urls_list, website_url,
+                funding_info={
                     "funding_amount": funding_amount,
                     "round_type": round_type,
                     "equity_offered": equity_offered,
                     "pre_money_valuation": pre_money_valuation,
                     "post_money_valuation": post_money_valuation
-                }
-            }
-            global graph
-            if not graph:
-                graph = build_analysis_graph()
+                },
+                content_hash=content_hash
+            )
 
-            result = await graph.ainvoke(initial_state)
+            result = await run_checkpointed_graph(get_graph(), initial_state, run_id)
             
             # Check for errors
-            if "error" in result:
-                raise HTTPException(status_code=500, detail=result["error"])
+            if result.get("error"):
+                raise HTTPException(status_code=500, detail=result["error"], headers={"X-Run-Id": run_id})
             
             # Return the results
-            return {
-                "startup_name": startup_name,
-                "industry": industry,
-                "linkedin_urls": linkedin_urls_list,
-                "s3_location": result.get("s3_location"),
-                "original_filename": original_filename,
-                "summary": result.get("summary_text"),
-                "embedding_status": result.get("embedding_status"),
-                "final_report": result.get("final_report"),
-                "news": result.get("news"),
-                "competitor_visualizations": result.get("competitor_visualizations"),
-                "funding_info": {
-                    "funding_amount": funding_amount,
-                    "round_type": round_type,
-                    "equity_offered": equity_offered,
-                    "pre_money_valuation": pre_money_valuation,
-                    "post_money_valuation": post_money_valuation
-                }
-            }
+            return pitch_deck_response(result, initial_state, run_id)
             
         except HTTPException:
             raise
         except Exception as e:
             print(traceback.format_exc())
-            raise HTTPException(status_code=500, detail=f"Processing error: {str(e)}")
+            raise HTTPException(
+                status_code=500,
+                detail=f"Processing error: {str(e)} (retry with run_id {run_id} to resume)",
+                headers={"X-Run-Id": run_id}
+            )
+
+@app.post("/jobs/process-pitch-deck", status_code=202)
+async def submit_pitch_deck_job(
+    file: UploadFile = File(...),
+    startup_name: str = Form(None),
+    industry: str = Form(None),
+    linkedin_urls: str = Form(None),
+    website_url: str = Form(None),
+    funding_amount: str = Form(None),
+    round_type: str = Form(None),
+    equity_offered: str = Form(None),
+    pre_money_valuation: str = Form(None),
+    post_money_valuation: str = Form(None),
+    run_id: str = Form(None)
+):
+    """
+    Queue a pitch deck for background processing and return a job ID immediately.
+
+    Poll /jobs/{job_id} for status and the final result, or subscribe to
+    /jobs/{job_id}/events for server-sent per-node progress events. Resubmit with
+    the returned run_id to resume a failed job from its last completed step.
+    """
+    startup_name = startup_name or "Unknown"
+    run_id = run_id or new_run_id()
+    industry = industry or "Unknown"
+
+    # The file must outlive this request, so the job removes the directory itself
+    temp_dir = tempfile.mkdtemp(prefix="pitch_deck_")
+    try:
+        file_path, content_hash = save_upload(file, temp_dir)
+    except HTTPException:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        raise
+
+    initial_state = build_pitch_deck_state(
+        file_path, file.filename, startup_name, industry, parse_linkedin_urls(linkedin_urls), website_url,
+        funding_info={
+            "funding_amount": funding_amount,
+            "round_type": round_type,
+            "equity_offered": equity_offered,
+            "pre_money_valuation": pre_money_valuation,
+            "post_money_valuation": post_money_valuation
+        },
+        content_hash=content_hash
+    )
+
+    def run_pitch_deck_job(job):
+        result = run_graph_with_progress(get_graph(), initial_state, job, run_id)
+        if result.get("error"):
+            raise Exception(result["error"])
+        return pitch_deck_response(result, initial_state, run_id)
+
+    job = job_manager.submit(
+        "process-pitch-deck",
+        run_pitch_deck_job,
+        cleanup=lambda: shutil.rmtree(temp_dir, ignore_errors=True)
+    )
+    print(f"Queued pitch deck job {job.job_id} for {startup_name}")
+    return {
+        "job_id": job.job_id,
+        "run_id": run_id,
+        "status": job.status,
+        "status_url": f"/jobs/{job.job_id}",
+        "events_url": f"/jobs/{job.job_id}/events"
+    }
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Return the status, completed nodes and (once finished) the result of a job"""
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, request: Request):
+    """Stream a job's progress events as server-sent events until it finishes"""
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    # Resume after the last event the client saw when it reconnects
+    last_event_id = request.headers.get("last-event-id")
+    next_event_id = int(last_event_id) + 1 if last_event_id and last_event_id.isdigit() else 0
+
+    async def event_stream():
+        nonlocal next_event_id
+        while True:
+            finished = job.is_finished()
+            for event in job.events_since(next_event_id):
+                yield format_sse(event)
+                next_event_id = event["id"] + 1
+            if finished:
+                break
+            await asyncio.sleep(JOB_EVENT_POLL_SECONDS)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
         
 @app.post("/add-startup-info")
 def add_startup(data: StartupRequest):
@@ -253,6 +446,7 @@ def add_startup(data: StartupRequest):
             data.pre_money_valuation,
             data.post_money_valuation
         )
+        startup_index.add(data.startup_name)
         investorIntel_entity.map_startup_to_investors(
             data.startup_name,
             data.investor_usernames
@@ -366,6 +560,26 @@ def fetch_investor_by_username(req: InvestorByUsernameRequest):
     
 class ChatRequest(BaseModel):
     query: str
+
+def chat_response(query: str, results: list, ai_response: str) -> dict:
+    """Shape a Gemini answer and its search results into the /chat response body"""
+    # Count the results by source
+    startup_count = sum(1 for r in results if r.get("source") == "startup")
+    report_count = sum(1 for r in results if r.get("source") == "deloitte-report")
+    return {
+        "response": ai_response,
+        "query": query,
+        "results_count": len(results),
+        "startup_count": startup_count,
+        "report_count": report_count,
+        "sources": ["startup", "deloitte-report"] if startup_count > 0 and report_count > 0 else 
+                  ["startup"] if startup_count > 0 else ["deloitte-report"]
+    }
+
+def cache_chat_answer(query_embedding: list, response: dict, results: list):
+    """Keep a successful answer in the semantic cache, tied to the documents it was built from"""
+    if response["response"] and response["response"] != UNAVAILABLE_RESPONSE:
+        chat_cache.store(query_embedding, response, [r["id"] for r in results if r.get("id")])
     
 @app.post("/chat")
 async def chat(request: ChatRequest):
@@ -388,10 +602,20 @@ async def chat(request: ChatRequest):
         }
     
     try:
+        # A semantically similar question answered earlier is served from the cache
+        query_embedding = await run_blocking(embedding_manager.embed_query, query)
+        cached = chat_cache.lookup(query_embedding)
+        if cached:
+            payload, similarity = cached
+            print(f"Chat answer served from semantic cache (similarity {similarity:.3f})")
+            return {**payload, "query": query, "cached": True}
+        
         # Search for relevant information across both startup data and Deloitte reports
-        results = embedding_manager.search_similar_startups(
+        results = await run_blocking(
+            embedding_manager.search_similar_startups,
             query=query,
-            top_k=8  # Increased to get more combined results
+            top_k=8,  # Increased to get more combined results
+            query_embedding=query_embedding
         )
         
         # Check if we have any results
@@ -402,25 +626,16 @@ async def chat(request: ChatRequest):
                 "results_count": 0
             }
         
-        # Count the results by source
-        startup_count = sum(1 for r in results if r.get("source") == "startup")
-        report_count = sum(1 for r in results if r.get("source") == "deloitte-report")
-        
         # Process with Gemini
-        ai_response = gemini_assistant.process_query_with_results(
+        ai_response = await run_blocking(
+            gemini_assistant.process_query_with_results,
             query=query,
             search_results=results
         )
         
-        return {
-            "response": ai_response,
-            "query": query,
-            "results_count": len(results),
-            "startup_count": startup_count,
-            "report_count": report_count,
-            "sources": ["startup", "deloitte-report"] if startup_count > 0 and report_count > 0 else 
-                      ["startup"] if startup_count > 0 else ["deloitte-report"]
-        }
+        response = chat_response(query, results, ai_response)
+        cache_chat_answer(query_embedding, response, results)
+        return response
     except Exception as e:
         print(f"Chat error: {str(e)}", exc_info=True)
         # Return a user-friendly error message
@@ -431,6 +646,91 @@ async def chat(request: ChatRequest):
             "error": str(e)
         }
 
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Streaming variant of /chat.
+
+    Emits server-sent events: one "metadata" event with the result counts, a
+    "token" event per chunk of the Gemini answer as it is generated, and a final
+    "done" event (or "error" if generation fails part-way through).
+    """
+    query = request.query.strip()
+    event_ids = itertools.count()
+
+    def sse(event_type: str, **data) -> str:
+        return format_sse({"id": next(event_ids), "type": event_type, **data})
+
+    async def event_stream():
+        if not query:
+            yield sse("metadata", query=query, results_count=0)
+            yield sse("token", text="Please enter a question about startups or industry trends.")
+            yield sse("done")
+            return
+
+        try:
+            query_embedding = None
+            if query.lower() in ["test empty database", "test no results"]:
+                results = []
+            else:
+                query_embedding = await run_blocking(embedding_manager.embed_query, query)
+                cached = chat_cache.lookup(query_embedding)
+                if cached:
+                    payload, similarity = cached
+                    yield sse(
+                        "metadata",
+                        query=query,
+                        results_count=payload["results_count"],
+                        startup_count=payload["startup_count"],
+                        report_count=payload["report_count"],
+                        cached=True
+                    )
+                    yield sse("token", text=payload["response"])
+                    yield sse("done")
+                    return
+                results = await run_blocking(
+                    embedding_manager.search_similar_startups,
+                    query=query,
+                    top_k=8,
+                    query_embedding=query_embedding
+                )
+
+            startup_count = sum(1 for r in results if r.get("source") == "startup")
+            report_count = sum(1 for r in results if r.get("source") == "deloitte-report")
+            yield sse(
+                "metadata",
+                query=query,
+                results_count=len(results),
+                startup_count=startup_count,
+                report_count=report_count
+            )
+
+            if not results:
+                yield sse("token", text="I don't have any information about that in my database. Please try asking about a different startup or topic.")
+                yield sse("done")
+                return
+
+            # Pull each chunk on the bounded executor so the event loop never blocks on Gemini
+            chunks = gemini_assistant.stream_query_with_results(query=query, search_results=results)
+            answer = []
+            while True:
+                text = await run_blocking(next, chunks, None)
+                if text is None:
+                    break
+                answer.append(text)
+                yield sse("token", text=text)
+            yield sse("done")
+            cache_chat_answer(query_embedding, chat_response(query, results, "".join(answer)), results)
+        except Exception as e:
+            print(f"Chat stream error: {str(e)}")
+            yield sse("error", error=str(e), text="I'm having trouble processing your request right now. Please try again with a different question.")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/get-startup-column")
 def get_startup_column(req: ColumnRequest):
     """
@@ -452,6 +752,37 @@ def get_startup_column(req: ColumnRequest):
         # unexpected errors
         raise HTTPException(status_code=500, detail=str(e))
 
+# Upper bound on startups fetched by one /fetch-startup-columns request
+MAX_STARTUPS_PER_FETCH = 100
+
+@app.post("/fetch-startup-columns")
+def fetch_startup_columns(req: StartupColumnsRequest):
+    """
+    Fetch several columns for one startup (startup_id) or many (startup_ids) in one query.
+    """
+    startup_ids = list(req.startup_ids or [])
+    if req.startup_id is not None:
+        startup_ids.insert(0, req.startup_id)
+    if not startup_ids:
+        raise HTTPException(status_code=400, detail="Provide startup_id or startup_ids")
+    if len(startup_ids) > MAX_STARTUPS_PER_FETCH:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_STARTUPS_PER_FETCH} startups per request")
+
+    try:
+        startups = db_utils.get_startup_columns(startup_ids, req.columns)
+    except ValueError as ve:
+        # invalid column name
+        raise HTTPException(status_code=400, detail=str(ve))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if req.startup_id is not None and req.startup_id not in startups:
+        raise HTTPException(status_code=404, detail="Startup not found")
+    return {
+        "status": "success",
+        "startups": {str(startup_id): values for startup_id, values in startups.items()}
+    }
+
 @app.post("/update-startup-status")
 def update_startup_status(req: UpdateStatusRequest):
     """Update the status of a startup for a particular investor"""
@@ -489,53 +820,8 @@ def get_industry_competitors(req: CompetitorAnalysisRequest):
     try:
         print("Industry requested:", req.industry)
         
-        # Get a fresh connection since the global one might be closed
-        local_conn, local_cursor = get_connection()
-        
-        # Query to fetch top companies by revenue and growth percentage
-        query = """
-        WITH RankedCompanies AS (
-            SELECT 
-                Company,
-                Industry,
-                Emp_Growth_Percent,
-                Revenue,
-                Short_Description,
-                Employees,
-                City,
-                Country,
-                Homepage_URL,
-                LinkedIn_URL,
-                ROW_NUMBER() OVER (PARTITION BY Company ORDER BY Revenue DESC, Emp_Growth_Percent DESC) AS rn
-            FROM INVESTOR_INTEL_DB.GROWJO_SCHEMA.COMPANY_MERGED_VIEW
-            WHERE Industry = %s
-        )
-        SELECT 
-            Company,
-            Industry,
-            Emp_Growth_Percent,
-            Revenue,
-            Short_Description,
-            Employees,
-            City,
-            Country,
-            Homepage_URL,
-            LinkedIn_URL
-        FROM RankedCompanies
-        WHERE rn = 1
-        ORDER BY Revenue DESC, Emp_Growth_Percent DESC
-        LIMIT %s
-        """
-        
-        # Use the local connection we just created
-        local_cursor.execute(query, (req.industry, req.limit))
-        result = local_cursor.fetchall()
-        
-        # Get column names
-        columns = [col[0] for col in local_cursor.description]
-        
-        # Create list of dictionaries
-        competitors = [dict(zip(columns, row)) for row in result]
+        # Served from the shared competitor cache; each call gets its own row dicts
+        competitors = get_top_competitors(req.industry, req.limit)
         
         # Process the revenue values to be more readable
         for competitor in competitors:
@@ -571,10 +857,6 @@ def get_industry_competitors(req: CompetitorAnalysisRequest):
             if city:
                 city_counts[city] = city_counts.get(city, 0) + 1
         
-        # Close the local cursor and connection
-        local_cursor.close()
-        local_conn.close()
-        
         # Return the processed data
         return {
             "status": "success",
@@ -585,10 +867,47 @@ def get_industry_competitors(req: CompetitorAnalysisRequest):
         print(traceback.format_exc())
         raise HTTPException(status_code=500, detail=f"Error fetching competitors: {str(e)}")
 
-# Add a shutdown event to close connection when app terminates
+@app.post("/cache/competitors/invalidate", dependencies=[Depends(require_admin_token)])
+def invalidate_competitors(industry: Optional[str] = None):
+    """
+    Drop cached competitor lists, e.g. after the Growjo DAG refreshes COMPANY_MERGED_VIEW.
+    Pass an industry to only drop that industry's entries.
+    """
+    removed = invalidate_competitor_cache(industry)
+    print(f"Invalidated {removed} competitor cache entries (industry={industry})")
+    return {"status": "success", "invalidated": removed}
+
+@app.post("/vectors/compact", dependencies=[Depends(require_admin_token)])
+async def compact_vectors(dry_run: bool = False):
+    """
+    Delete superseded and duplicate startup vectors from the investor-intel index.
+    Pass dry_run=true to only count them.
+    """
+    try:
+        result = await run_blocking(embedding_manager.compact, dry_run)
+        return {"status": "success", **result}
+    except Exception as e:
+        print(f"Error compacting vectors: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error compacting vectors: {str(e)}")
+
+@app.post("/cache/chat/invalidate", dependencies=[Depends(require_admin_token)])
+def invalidate_chat_cache(doc_ids: Optional[List[str]] = None):
+    """
+    Drop cached /chat answers, e.g. after vectors were re-ingested by another process.
+    Pass Pinecone vector IDs in the body to only drop answers built from those documents.
+    """
+    removed = chat_cache.invalidate_documents(doc_ids) if doc_ids else chat_cache.invalidate()
+    print(f"Invalidated {removed} chat cache entries")
+    return {"status": "success", "invalidated": removed}
+
+@app.on_event("startup")
+def startup_event():
+    if WARM_UP_ON_STARTUP:
+        registry.warm_up()
+
+# Add a shutdown event to close pooled connections when app terminates
 @app.on_event("shutdown")
 def shutdown_event():
-    if cursor:
-        cursor.close()
-    if conn:
-        conn.close()
\ No newline at end of file
+    job_manager.shutdown()
+    shutdown_executors()
+    close_pool()
\ No newline at end of file
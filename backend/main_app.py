@@ -13,7 +13,6 @@ import shutil
 import json
 import traceback
 from typing import List, Optional
-from s3_utils import upload_pitch_deck_to_s3
 from pinecone_pipeline.embedding_manager import EmbeddingManager
 from database.snowflake_connect import get_connection
 
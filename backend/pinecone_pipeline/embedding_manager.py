@@ -1,9 +1,9 @@
 import os
 import logging
 import datetime
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any
 from dotenv import load_dotenv
-from sentence_transformers import SentenceTransformer
 from pinecone import Pinecone, ServerlessSpec
 
 # Use absolute import instead of relative import
@@ -17,9 +17,25 @@ except ImportError:
         print("Warning: SnowflakeManager could not be imported")
         SnowflakeManager = None
 
+from semantic_cache import chat_cache
+from embedding_cache import embedding_cache
+from startup_check import startup_index
+from vector_store import mirrored
+from text_store import text_store
+from embedding_backends import load_embedding_model
+from embedding_batcher import batched
+from vector_manifest import get_vector_manifest, content_vector_id, compact_index
+
 # Load environment variables
 load_dotenv()
 
+# Pinecone queries of one search run here in parallel. Searches are themselves
+# called from the API's blocking executor, so they get their own pool.
+_query_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("PINECONE_QUERY_WORKERS", "8")),
+    thread_name_prefix="pinecone-query"
+)
+
 class EmbeddingManager:
     """
     Class to manage embeddings for pitch deck summaries using a single chunk approach.
@@ -49,12 +65,14 @@ class EmbeddingManager:
         else:
             print(f"Index '{self.index_name}' already exists.")
         
-        # Connect to the index
-        self.index = self.pc.Index(self.index_name)
-        stats = self.index.describe_index_stats()
+        # Connect to the index, and to the industry reports index searched alongside it.
+        # Queries are answered from in-process mirrors of both once they have synced.
+        self.index = mirrored(self.index_name, self.pc.Index(self.index_name), self.dimension)
+        self.deloitte_index = mirrored("deloitte-reports", self.pc.Index("deloitte-reports"), self.dimension)
         
-        # Load Sentence Transformer Model
-        self.model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+        # Load the embedding model (torch or int8 ONNX, see EMBEDDING_BACKEND); single-text
+        # encodes from concurrent requests are micro-batched into shared forward passes
+        self.model = batched(load_embedding_model("sentence-transformers/all-MiniLM-L6-v2"))
         
         print("Initializing Snowflake manager")
         # Initialize Snowflake manager
@@ -68,8 +86,8 @@ class EmbeddingManager:
     
     def check_startup_exists(self, startup_name: str) -> bool:
         """
-        Check if a startup with the given name already exists in the database.
-        Case-insensitive search to match "Uber" with "uber", etc.
+        Check if a startup with the given name already has its pitch deck stored.
+        Case-insensitive, to match "Uber" with "uber", etc.
         
         Args:
             startup_name: Name of the startup to check
@@ -79,46 +97,7 @@ class EmbeddingManager:
         """
         if not startup_name:
             return False
-            
-        try:
-            # Since Pinecone doesn't support case-insensitive search directly,
-            # we'll fetch all results and then compare case-insensitively
-            query_embedding = self.model.encode("dummy query for checking existence").tolist()
-            
-            # First try an exact match (for efficiency)
-            exact_results = self.index.query(
-                vector=query_embedding,
-                top_k=1,
-                include_metadata=True,
-                filter={"startup_name": {"$eq": startup_name}}
-            )
-            
-            if exact_results.get("matches", []):
-                return True
-                
-            # If no exact match, get a larger set of results to check case-insensitively
-            all_results = self.index.query(
-                vector=query_embedding,
-                top_k=100,  # Get more results to increase chance of finding a match
-                include_metadata=True
-            )
-            
-            matches = all_results.get("matches", [])
-            
-            # Check each result for a case-insensitive match
-            for match in matches:
-                metadata = match.get("metadata", {})
-                db_startup_name = metadata.get("startup_name", "")
-                
-                if db_startup_name.lower() == startup_name.lower():
-                    print(f"Found case-insensitive match: '{db_startup_name}' matches '{startup_name}'")
-                    return True
-            
-            return False
-            
-        except Exception as e:
-            print(f"Error checking if startup exists: {e}", exc_info=True)
-            return False
+        return startup_index.has_pitch_deck(startup_name)
     
     def store_summary_embeddings(self, 
                                summary: str, 
@@ -127,18 +106,30 @@ class EmbeddingManager:
                                website_url: str,
                                linkedin_urls: List[str],
                                original_filename: str,
-                               s3_location: str) -> bool:
-        """Store the summary as a single chunk in both Pinecone and Snowflake"""
+                               s3_location: str,
+                               snowflake_writes: Dict[str, Any] = None,
+                               vector_id: str = None) -> bool:
+        """
+        Store the summary as a single chunk in both Pinecone and Snowflake.
+
+        Pass a dict as snowflake_writes to defer the Snowflake update: the STARTUP
+        columns are added to it instead, for the caller to write in one statement.
+        vector_id overrides the default Pinecone ID, which is derived from the
+        startup name and summary text so re-ingesting the same summary is a no-op.
+        A startup that already has a pitch deck is not refused: the vector manifest
+        skips an unchanged summary and replaces the vector of a changed one.
+        """
         print(f"Storing data for {startup_name} pitch deck")
         
-        # First check if the startup already exists (case-insensitive)
-        if self.check_startup_exists(startup_name):
-            print(f"Startup {startup_name} already exists in the database (case-insensitive match)")
-            return False
-        
         # Store in Snowflake first if available
         snowflake_success = False
-        if self.snowflake_manager:
+        if snowflake_writes is not None:
+            snowflake_writes.update({
+                "summary_report": summary,
+                "pitch_deck_link": s3_location,
+                "pitch_deck_filename": original_filename
+            })
+        elif self.snowflake_manager:
             try:
                 startup_name = self.snowflake_manager.store_startup_summary(
                     startup_name=startup_name,
@@ -159,13 +150,18 @@ class EmbeddingManager:
             timestamp = datetime.datetime.now().isoformat()
             print(f"Upload timestamp: {timestamp}")
             
-            # Generate a unique ID for this record
-            unique_id = f"{startup_name.replace(' ', '_')}_{timestamp}"
+            # Deterministic ID for this version of the startup's summary
+            unique_id = vector_id or content_vector_id(startup_name, summary)
+            manifest = get_vector_manifest()
+            if unique_id in manifest.live_ids(self.index_name, startup_name):
+                print(f"Vector {unique_id} is already stored, skipping upsert")
+                startup_index.add(startup_name, pitch_deck=True)
+                return True
             print(f"Creating embedding with ID: {unique_id}")
             
             # Generate embedding for the content
             print(f"Generating embedding")
-            embedding = self.model.encode(summary).tolist()
+            embedding = self.encode(summary).tolist()
             print(f"Generated embedding with {len(embedding)} dimensions")
             
             # Prepare metadata
@@ -177,8 +173,8 @@ class EmbeddingManager:
                 "s3_location": s3_location,
                 "upload_timestamp": timestamp,
                 "invested": "no",  # Default to 'no' as specified
-                "text": summary,  # Store the complete summary
-                "snowflake_status": "success" if snowflake_success else "skipped" 
+                "text_hash": text_store.put(summary),  # The summary itself is resolved from the text store
+                "snowflake_status": "deferred" if snowflake_writes is not None else "success" if snowflake_success else "skipped"
             }
             
             # Log metadata for debugging
@@ -186,16 +182,133 @@ class EmbeddingManager:
             
             # Insert into Pinecone
             print(f"Inserting into Pinecone with ID: {unique_id}")
+            manifest.begin(self.index_name, startup_name, [unique_id])
             self.index.upsert([(unique_id, embedding, metadata)])
             print(f"Successfully inserted into Pinecone")
+            superseded = manifest.commit(self.index_name, startup_name, [unique_id])
+            if superseded:
+                # Left for compact() to retry if this fails
+                try:
+                    self.index.delete(ids=superseded)
+                    print(f"Deleted superseded vectors: {superseded}")
+                except Exception as e:
+                    print(f"Failed to delete superseded vectors {superseded}: {e}")
+            # Chat answers built on the previous version of this vector are stale now
+            chat_cache.invalidate_documents([unique_id, *superseded])
+            startup_index.add(startup_name, pitch_deck=True)
             
             return True
         
         except Exception as e:
-            print(f"Error storing data in Pinecone: {e}", exc_info=True)
+            print(f"Error storing data in Pinecone: {e}")
             return False
     
-    def search_similar_startups(self, query: str, industry: str = None, top_k: int = 5):
+    def compact(self, dry_run: bool = False) -> Dict[str, Any]:
+        """Delete superseded and pre-manifest duplicate vectors of known startups from the investor-intel index"""
+        result = compact_index(self.index, self.index_name, "startup_name", dry_run=dry_run)
+        chat_cache.invalidate_documents(result.pop("deleted_ids"))
+        return result
+    
+    def encode(self, text: str):
+        """Embed text, reusing the cached embedding of an identical (normalized) text"""
+        return embedding_cache.encode(self.model, text)
+    
+    def embed_query(self, query: str) -> List[float]:
+        """Embed a search query with the same model used for the stored summaries"""
+        return self.encode(query).tolist()
+    
+    def _search_startup_index(self, query_embedding: List[float], top_k: int, filter_dict: Dict = None):
+        """Query the investor-intel index (startup information); errors yield no results"""
+        processed_results = []
+        try:
+            startup_results = self.index.query(
+                vector=query_embedding,
+                top_k=top_k,
+                include_metadata=True,
+                filter=filter_dict
+            )
+            
+            # Process startup results
+            startup_matches = startup_results.get("matches", [])
+            for match in startup_matches:
+                metadata = match["metadata"]
+                score = match["score"]
+                
+                # Create and add result entry
+                result = {
+                    "id": match["id"],
+                    "source": "startup",  # Mark the source as startup
+                    "startup_name": metadata.get("startup_name"),
+                    "industry": metadata.get("industry"),
+                    "s3_location": metadata.get("s3_location"),
+                    "score": score,
+                    "linkedin_urls": metadata.get("linkedin_urls", ""),
+                    "original_filename": metadata.get("original_filename", ""),
+                    "upload_timestamp": metadata.get("upload_timestamp", ""),
+                    "text": metadata.get("text"),
+                    "text_hash": metadata.get("text_hash"),
+                    "snowflake_status": metadata.get("snowflake_status", "unknown")
+                }
+                processed_results.append(result)
+            
+            print(f"Found {len(startup_matches)} results in investor-intel index")
+            
+        except Exception as e:
+            print(f"Error searching startup index: {e}")
+        return processed_results
+    
+    def _search_report_index(self, query_embedding: List[float], top_k: int, filter_dict: Dict = None):
+        """Query the deloitte-reports index (industry reports); errors yield no results"""
+        processed_results = []
+        try:
+            deloitte_results = self.deloitte_index.query(
+                vector=query_embedding,
+                top_k=top_k,
+                include_metadata=True,
+                filter=filter_dict
+            )
+            
+            # Process deloitte report results
+            deloitte_matches = deloitte_results.get("matches", [])
+            for match in deloitte_matches:
+                metadata = match["metadata"]
+                score = match["score"]
+                
+                # Create a structured result entry
+                result = {
+                    "id": match["id"],
+                    "source": "deloitte-report",  # Mark the source as deloitte report
+                    "report_title": metadata.get("title", "Untitled Report"),
+                    "industry": metadata.get("industry", "Unknown"),
+                    "score": score,
+                    "text": metadata.get("text"),
+                    "text_hash": metadata.get("text_hash"),
+                    "year": metadata.get("year", "Unknown"),
+                    "url": metadata.get("url", "")
+                }
+                processed_results.append(result)
+            
+            print(f"Found {len(deloitte_matches)} results in deloitte-reports index")
+            
+        except Exception as e:
+            print(f"Error searching deloitte-reports index: {e}")
+        return processed_results
+    
+    def _resolve_texts(self, results: List[Dict]) -> List[Dict]:
+        """
+        Fill in each result's "text" from the text store by its "text_hash".
+
+        Vectors written before the text store carry their text inline and are left as is.
+        """
+        texts = text_store.get_many(r["text_hash"] for r in results if not r.get("text") and r.get("text_hash"))
+        for result in results:
+            text_key = result.pop("text_hash", None)
+            if not result.get("text"):
+                result["text"] = texts.get(text_key, "No content available")
+        return results
+    
+    def search_similar_startups(self, query: str, industry: str = None, top_k: int = 5,
+                                query_embedding: List[float] = None):
         """
         Search for similar content based on a query and optional filters.
         Searches both the investor-intel (startups) and deloitte-reports indexes simultaneously.
@@ -204,6 +317,7 @@ class EmbeddingManager:
             query: The search query text
             industry: Filter by industry category (optional)
             top_k: Number of results to return from each index
+            query_embedding: Embedding of query, if the caller already computed it
             
         Returns:
             List of dictionary results with combined information from both indexes
@@ -213,88 +327,19 @@ class EmbeddingManager:
         
         try:
             # Generate embedding for the query
-            query_embedding = self.model.encode(query).tolist()
+            if query_embedding is None:
+                query_embedding = self.embed_query(query)
             
             # Prepare filter if industry filter is provided
             filter_dict = {}
             if industry:
                 filter_dict["industry"] = {"$eq": industry}
             
-            # Initialize combined results list
-            processed_results = []
-            
-            # SEARCH 1: Search in the investor-intel index (startup information)
-            try:
-                startup_results = self.index.query(
-                    vector=query_embedding,
-                    top_k=top_k,
-                    include_metadata=True,
-                    filter=filter_dict if filter_dict else None
-                )
-                
-                # Process startup results
-                startup_matches = startup_results.get("matches", [])
-                for match in startup_matches:
-                    metadata = match["metadata"]
-                    score = match["score"]
-                    
-                    # Create and add result entry
-                    result = {
-                        "id": match["id"],
-                        "source": "startup",  # Mark the source as startup
-                        "startup_name": metadata.get("startup_name"),
-                        "industry": metadata.get("industry"),
-                        "s3_location": metadata.get("s3_location"),
-                        "score": score,
-                        "linkedin_urls": metadata.get("linkedin_urls", ""),
-                        "original_filename": metadata.get("original_filename", ""),
-                        "upload_timestamp": metadata.get("upload_timestamp", ""),
-                        "text": metadata.get("text", "No content available"),
-                        "snowflake_status": metadata.get("snowflake_status", "unknown")
-                    }
-                    processed_results.append(result)
-                
-                print(f"Found {len(startup_matches)} results in investor-intel index")
-                
-            except Exception as e:
-                print(f"Error searching startup index: {e}", exc_info=True)
-            
-            # SEARCH 2: Search in the deloitte-reports index (industry reports)
-            try:
-                # Connect to the deloitte-reports index
-                deloitte_index = self.pc.Index("deloitte-reports")
-                
-                # Search in the deloitte-reports index
-                deloitte_results = deloitte_index.query(
-                    vector=query_embedding,
-                    top_k=top_k,
-                    include_metadata=True,
-                    filter=filter_dict if filter_dict else None
-                )
-                
-                # Process deloitte report results
-                deloitte_matches = deloitte_results.get("matches", [])
-                for match in deloitte_matches:
-                    metadata = match["metadata"]
-                    score = match["score"]
-                    
-                    # Create a structured result entry
-                    result = {
-                        "id": match["id"],
-                        "source": "deloitte-report",  # Mark the source as deloitte report
-                        "report_title": metadata.get("title", "Untitled Report"),
-                        "industry": metadata.get("industry", "Unknown"),
-                        "score": score,
-                        "text": metadata.get("text", "No content available"),
-                        "year": metadata.get("year", "Unknown"),
-                        "url": metadata.get("url", "")
-                    }
-                    processed_results.append(result)
-                
-                print(f"Found {len(deloitte_matches)} results in deloitte-reports index")
-                
-            except Exception as e:
-                print(f"Error searching deloitte-reports index: {e}", exc_info=True)
+            # Query both indexes at once so retrieval takes as long as the slower one
+            filter_arg = filter_dict if filter_dict else None
+            startup_future = _query_executor.submit(self._search_startup_index, query_embedding, top_k, filter_arg)
+            report_future = _query_executor.submit(self._search_report_index, query_embedding, top_k, filter_arg)
+            processed_results = startup_future.result() + report_future.result()
             
             # Sort all results by score (descending) to get best matches first
             processed_results.sort(key=lambda x: x.get('score', 0), reverse=True)
@@ -302,7 +347,8 @@ class EmbeddingManager:
             # Limit to top_k total results across both indexes
             processed_results = processed_results[:top_k]
             
-            return processed_results
+            # Only now fetch the document text, for the results actually returned
+            return self._resolve_texts(processed_results)
         
         except Exception as e:
             print(f"Error in search_similar_startups: {e}", exc_info=True)
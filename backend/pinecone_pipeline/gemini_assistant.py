@@ -5,10 +5,14 @@ from typing import List, Dict, Any, Optional
 import google.generativeai as genai
 from dotenv import load_dotenv
 import re
+from llm_cache import llm_cache
 
 # Load environment variables
 load_dotenv()
 
+# Returned instead of an answer when Gemini fails
+UNAVAILABLE_RESPONSE = "I'm unable to process this request at the moment. Please try again with a different question."
+
 class GeminiAssistant:
     """
     A class that processes user queries and Pinecone search results with Gemini 2.0
@@ -40,16 +44,16 @@ class GeminiAssistant:
             print(traceback.format_exc())
             raise Exception(f"Failed to configure Gemini API: {str(e)}")
     
-    def process_query_with_results(self, query: str, search_results: list):
+    def build_prompt(self, query: str, search_results: list) -> str:
         """
-        Process a query with search results from multiple sources and generate a response using Gemini.
-        
+        Build the Gemini prompt for a query and its search results from multiple sources.
+
         Args:
             query: The query string
             search_results: List of search results from both startup data and report data
-        
+
         Returns:
-            Generated response from Gemini
+            Combined prompt string
         """
         # Format the context based on the result sources
         formatted_context = []
@@ -104,28 +108,82 @@ class GeminiAssistant:
         - For startups, highlight business model, market potential, and competitive advantages
         - For industry reports, focus on market trends, growth forecasts, and key insights
         """
-        
-        # Generate content with Gemini
-        try:
-            # Combine system prompt with user query since Gemini doesn't support system messages
-            combined_prompt = f"""
+
+        # Combine system prompt with user query since Gemini doesn't support system messages
+        return f"""
             {system_prompt}
-            
+
             Based on the following search results, please answer this question: {query}
-            
+
             {context_text}
             """
-            
+
+    def process_query_with_results(self, query: str, search_results: list, use_cache: bool = True):
+        """
+        Process a query with search results from multiple sources and generate a response using Gemini.
+
+        Args:
+            query: The query string
+            search_results: List of search results from both startup data and report data
+            use_cache: Reuse the cached response to an identical prompt, if any
+
+        Returns:
+            Generated response from Gemini
+        """
+        combined_prompt = self.build_prompt(query, search_results)
+
+        # Generate content with Gemini
+        def generate():
+            try:
+                response = self.model.generate_content(
+                    [
+                        {"role": "user", "parts": [combined_prompt]}
+                    ]
+                )
+                return response.text
+            except Exception as e:
+                print(f"Error generating Gemini response: {e}")
+                return None
+
+        response_text = llm_cache.generate(self.model_name, combined_prompt, generate, bypass=not use_cache)
+        return response_text or UNAVAILABLE_RESPONSE
+
+    def stream_query_with_results(self, query: str, search_results: list):
+        """
+        Streaming variant of process_query_with_results.
+
+        Args:
+            query: The query string
+            search_results: List of search results from both startup data and report data
+
+        Yields:
+            Text chunks from Gemini as soon as they are generated
+
+        Raises:
+            Exception: If Gemini fails, including part-way through the answer, so the
+                caller can report an error instead of treating a partial answer as complete
+        """
+        combined_prompt = self.build_prompt(query, search_results)
+
+        try:
             response = self.model.generate_content(
                 [
                     {"role": "user", "parts": [combined_prompt]}
-                ]
+                ],
+                stream=True
             )
-            return response.text
+            for chunk in response:
+                try:
+                    text = chunk.text
+                except ValueError:
+                    # Chunks with no text parts (e.g. only safety metadata) have nothing to show
+                    continue
+                if text:
+                    yield text
         except Exception as e:
-            print(f"Error generating Gemini response: {e}")
-            return "I'm unable to process this request at the moment. Please try again with a different question."
-    
+            print(f"Error streaming Gemini response: {e}")
+            raise
+
     def _format_search_results(self, search_results: List[Dict[str, Any]]) -> str:
         """
         Format search results from Pinecone into a context string for Gemini.
@@ -48,13 +48,13 @@ except ImportError:
         GeminiAssistant = None
 
 try:
-    from s3_utils import upload_pitch_deck_to_s3
+    from s3_utils import upload_pitch_deck
 except ImportError:
     try:
-        from pinecone_pipeline.s3_utils import upload_pitch_deck_to_s3
+        from pinecone_pipeline.s3_utils import upload_pitch_deck
     except ImportError:
         logger.error("Error: Unable to import S3 utilities")
-        def upload_pitch_deck_to_s3(*args, **kwargs):
+        def upload_pitch_deck(*args, **kwargs):
             raise NotImplementedError("S3 upload functionality not available")
 
 # Define request models for better validation
@@ -209,7 +209,7 @@ async def process_pitch_deck(
         
         # Upload the file to S3
         try:
-            s3_location = upload_pitch_deck_to_s3(
+            s3_key, s3_location = upload_pitch_deck(
                 file_path=file_path,
                 startup_name=startup_name,
                 industry=industry,
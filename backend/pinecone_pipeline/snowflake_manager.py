@@ -1,7 +1,7 @@
 import os
 import uuid
-from snowflake.connector import connect
 from dotenv import load_dotenv
+from database.snowflake_connect import get_pool
 
 # Load environment variables
 load_dotenv()
@@ -26,15 +26,12 @@ class SnowflakeManager:
         # self.initialize_snowflake_objects()
         
     def get_connection(self):
-        """Create and return a Snowflake connection"""
-        return connect(
-            account=self.account,
-            user=self.user,
-            password=self.password,
-            role=self.role,
-            warehouse=self.warehouse,
-            database=self.database
-        )
+        """Check out a connection from the shared pool; release it with release_connection()"""
+        return get_pool().checkout()
+
+    def release_connection(self, conn):
+        """Return a connection obtained from get_connection() to the shared pool"""
+        get_pool().checkin(conn)
         
     # def initialize_snowflake_objects(self):
     #     """Initialize Snowflake database, schema, and table"""
@@ -120,4 +117,4 @@ class SnowflakeManager:
             raise e
         finally:
             cur.close()
-            conn.close() 
\ No newline at end of file
+            self.release_connection(conn)
@@ -5,6 +5,7 @@ import time
 import datetime
 from pathlib import Path
 from dotenv import load_dotenv
+from llm_cache import llm_cache, sha256_file
 
 
 load_dotenv()
@@ -18,6 +19,12 @@ AWS_REGION = os.getenv('AWS_REGION')
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 GEMINI_MODEL = os.getenv('GEMINI_MODEL', 'gemini-2.0-flash')
 
+# Polling of uploaded files while Gemini processes them: starts fast and backs
+# off exponentially, so small decks are picked up in well under a second
+GEMINI_FILE_POLL_INITIAL_SECONDS = float(os.getenv('GEMINI_FILE_POLL_INITIAL_SECONDS', '0.25'))
+GEMINI_FILE_POLL_MAX_SECONDS = float(os.getenv('GEMINI_FILE_POLL_MAX_SECONDS', '5'))
+GEMINI_FILE_PROCESSING_TIMEOUT_SECONDS = float(os.getenv('GEMINI_FILE_PROCESSING_TIMEOUT_SECONDS', '300'))
+
 
 # --- Functions ---
 def validate_environment():
@@ -36,49 +43,54 @@ def validate_environment():
     missing_vars = [name for name, value in required_vars.items() if value is None]
     return len(missing_vars) == 0, missing_vars
 
-def summarize_pitch_deck_with_gemini(file_path, api_key, model_name):
-    """
-    Uploads a PDF to the Gemini API and generates a summary tailored for investors.
+def delete_gemini_file(file_name):
+    """Delete an uploaded file from the Gemini service, logging instead of raising on failure"""
+    try:
+        genai.delete_file(file_name)
+        print(f"Deleted Gemini file {file_name}")
+    except Exception as e:
+        print(f"Warning: Could not delete Gemini file {file_name}: {e}")
+
+def upload_file_to_gemini(file_path, deadline_seconds=GEMINI_FILE_PROCESSING_TIMEOUT_SECONDS):
     """
-    if not os.path.exists(file_path):
-        print(f"Error: File not found at {file_path}")
-        return None
+    Upload a file to the Gemini API and wait until it is ready to be used in prompts.
 
-    uploaded_file_resource = None # Keep track of the uploaded file resource for cleanup
-    try:
-        print(f"\nConfiguring Gemini API with model '{model_name}'...")
-        genai.configure(api_key=api_key)
+    Polls with exponential backoff from GEMINI_FILE_POLL_INITIAL_SECONDS up to
+    GEMINI_FILE_POLL_MAX_SECONDS. The file is deleted again if processing fails
+    or does not finish within deadline_seconds.
 
-        # 1. Upload the file to the Gemini API service
-        print(f"Uploading '{os.path.basename(file_path)}' to Google for analysis...")
-        uploaded_file_resource = genai.upload_file(
-            path=file_path,
-            display_name=os.path.basename(file_path)
-        )
-        print(f"Uploaded file '{uploaded_file_resource.display_name}' as: {uploaded_file_resource.uri}")
-        print(f"File State: {uploaded_file_resource.state.name}")
-
-        # 2. Wait for the file to be processed by the API
-        print("Waiting for file processing...")
-        while uploaded_file_resource.state.name == "PROCESSING":
-            print('.', end='', flush=True)
-            time.sleep(5) # Check status every 5 seconds
-            uploaded_file_resource = genai.get_file(uploaded_file_resource.name) # Fetch updated status
-
-        if uploaded_file_resource.state.name != "ACTIVE":
-            print(f"\nFile processing failed. Final state: {uploaded_file_resource.state.name}")
-            if uploaded_file_resource:
-                 print(f"Attempting to delete non-active file: {uploaded_file_resource.name}")
-                 genai.delete_file(uploaded_file_resource.name)
-            return None
-
-        print("\nFile processed successfully. Generating investor summary...")
+    Args:
+        file_path: Path of the file to upload
+        deadline_seconds: Maximum time to wait for processing
 
-        # 3. Configure the generative model
-        model = genai.GenerativeModel(model_name=model_name)
+    Returns:
+        The ACTIVE file resource; the caller is responsible for deleting it
+    """
+    print(f"Uploading '{os.path.basename(file_path)}' to Google for analysis...")
+    file_resource = genai.upload_file(path=file_path, display_name=os.path.basename(file_path))
+    print(f"Uploaded file '{file_resource.display_name}' as: {file_resource.uri}")
 
-        # 4. Create a detailed prompt for investor-focused summarization
-        prompt = """
+    try:
+        deadline = time.monotonic() + deadline_seconds
+        interval = GEMINI_FILE_POLL_INITIAL_SECONDS
+        while file_resource.state.name == "PROCESSING":
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"Gemini file processing exceeded {deadline_seconds}s")
+            time.sleep(min(interval, remaining))
+            interval = min(interval * 2, GEMINI_FILE_POLL_MAX_SECONDS)
+            file_resource = genai.get_file(file_resource.name)
+
+        if file_resource.state.name != "ACTIVE":
+            raise RuntimeError(f"File processing failed. Final state: {file_resource.state.name}")
+    except Exception:
+        delete_gemini_file(file_resource.name)
+        raise
+
+    return file_resource
+
+# Prompt for investor-focused summarization
+INVESTOR_SUMMARY_PROMPT = """
         Analyze the provided startup pitch deck PDF from the perspective of a venture capital investor.
         Generate a concise summary covering the key aspects an investor needs to evaluate the opportunity.
         Structure the summary clearly, addressing the following points based *only* on the document's content:
@@ -98,8 +110,41 @@ def summarize_pitch_deck_with_gemini(file_path, api_key, model_name):
         Be objective and extract information accurately. If information for a section is not present in the PDF, state that clearly (e.g., "Financial projections were not provided.").
         """
 
-        # 5. Generate the summary using the prompt and the uploaded file
-        response = model.generate_content([prompt, uploaded_file_resource])
+def summarize_pitch_deck_with_gemini(file_path, api_key, model_name, use_cache=True):
+    """
+    Uploads a PDF to the Gemini API and generates a summary tailored for investors.
+
+    The uploaded file is deleted again once the summary is generated or fails.
+    Summaries are cached by model, prompt and PDF content; use_cache=False regenerates.
+    """
+    if not os.path.exists(file_path):
+        print(f"Error: File not found at {file_path}")
+        return None
+
+    return llm_cache.generate(
+        model_name,
+        INVESTOR_SUMMARY_PROMPT,
+        lambda: _generate_pitch_deck_summary(file_path, api_key, model_name),
+        file_hash=sha256_file(file_path),
+        bypass=not use_cache
+    )
+
+def _generate_pitch_deck_summary(file_path, api_key, model_name):
+    uploaded_file_resource = None # Keep track of the uploaded file resource for cleanup
+    try:
+        print(f"\nConfiguring Gemini API with model '{model_name}'...")
+        genai.configure(api_key=api_key)
+
+        # 1-2. Upload the file to the Gemini API service and wait for it to be processed
+        uploaded_file_resource = upload_file_to_gemini(file_path)
+
+        print("File processed successfully. Generating investor summary...")
+
+        # 3. Configure the generative model
+        model = genai.GenerativeModel(model_name=model_name)
+
+        # 4. Generate the summary using the prompt and the uploaded file
+        response = model.generate_content([INVESTOR_SUMMARY_PROMPT, uploaded_file_resource])
 
         print("Summary generated.")
         return response.text
@@ -109,14 +154,9 @@ def summarize_pitch_deck_with_gemini(file_path, api_key, model_name):
         return None
 
     finally:
-        # 6. Clean up: Delete the file from the Gemini service
-        if uploaded_file_resource and genai.get_file(uploaded_file_resource.name).state.name != "DELETED":
-            try:
-                print(f"Attempting to delete uploaded file: {uploaded_file_resource.name}")
-                genai.delete_file(uploaded_file_resource.name)
-                print(f"Successfully deleted file {uploaded_file_resource.name}.")
-            except Exception as delete_e:
-                print(f"Warning: Could not delete file {uploaded_file_resource.name}: {delete_e}")
+        # 5. Clean up: Delete the file from the Gemini service
+        if uploaded_file_resource:
+            delete_gemini_file(uploaded_file_resource.name)
 
 # This will only run if summary.py is executed directly (not when imported)
 if __name__ == "__main__":
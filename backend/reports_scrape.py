@@ -5,9 +5,10 @@ from pathlib import Path
 from playwright.sync_api import sync_playwright
 import google.generativeai as genai
 from chunking_strategies import markdown_header_chunks
-from vector_storage_service import generate_embeddings, store_in_pinecone
+from vector_storage_service import embed_chunks, store_in_pinecone, compact_pinecone
 from s3_utils import upload_pdf_to_s3
 from snowflake_utils import initialize_snowflake_objects, store_report_summary
+from llm_cache import llm_cache, sha256_bytes
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -57,24 +58,8 @@ DIRECT_PDFS = {
     "Defense_2024_Report_PwC": "https://www.pwc.com/us/en/industries/industrial-products/library/assets/pwc-aerospace-defense-annual-industry-performance-outlook-2024.pdf",
 }
 
-def get_report_summary_with_gemini(pdf_content: bytes, filename: str) -> str:
-    """Generate comprehensive summary of report using Gemini"""
-    temp_pdf = None
-    try:
-        model = genai.GenerativeModel(model_name=GEMINI_MODEL)
-        
-        # Create a temporary file with a unique name
-        temp_pdf = tempfile.NamedTemporaryFile(suffix='.pdf', delete=False)
-        temp_pdf_path = temp_pdf.name
-        
-        # Write content and close file handle immediately
-        temp_pdf.write(pdf_content)
-        temp_pdf.close()
-        
-        # Upload the file to Gemini
-        file = genai.upload_file(temp_pdf_path)
-        
-        prompt = """
+# Prompt for industry/market report summaries
+REPORT_SUMMARY_PROMPT = """
         Analyze this industry/market report comprehensively and generate a detailed summary. Consider text as well as images or graphs in the report. 
         Dont add any additional information or make any assumptions apart from the information provided in the report.
         Focus on the following aspects:
@@ -117,8 +102,34 @@ def get_report_summary_with_gemini(pdf_content: bytes, filename: str) -> str:
         Structure the response in clear sections with detailed explanations.
         """
 
+def get_report_summary_with_gemini(pdf_content: bytes, filename: str, use_cache: bool = True) -> str:
+    """Generate comprehensive summary of report using Gemini, cached by model, prompt and PDF content"""
+    return llm_cache.generate(
+        GEMINI_MODEL,
+        REPORT_SUMMARY_PROMPT,
+        lambda: _generate_report_summary(pdf_content, filename),
+        file_hash=sha256_bytes(pdf_content),
+        bypass=not use_cache
+    )
+
+def _generate_report_summary(pdf_content: bytes, filename: str) -> str:
+    temp_pdf = None
+    try:
+        model = genai.GenerativeModel(model_name=GEMINI_MODEL)
+        
+        # Create a temporary file with a unique name
+        temp_pdf = tempfile.NamedTemporaryFile(suffix='.pdf', delete=False)
+        temp_pdf_path = temp_pdf.name
+        
+        # Write content and close file handle immediately
+        temp_pdf.write(pdf_content)
+        temp_pdf.close()
+        
+        # Upload the file to Gemini
+        file = genai.upload_file(temp_pdf_path)
+        
         # Generate summary using the file and prompt
-        response = model.generate_content([prompt, file])
+        response = model.generate_content([REPORT_SUMMARY_PROMPT, file])
         
         # Clean up: Delete the temporary file
         try:
@@ -174,18 +185,11 @@ def process_reports_pipeline():
                         
                         # Store in Pinecone
                         chunks = markdown_header_chunks(summary)
-                        embeddings_data = []
-                        for chunk in chunks:
-                            embedding = generate_embeddings(chunk)
-                            embeddings_data.append({
-                                'content': chunk,
-                                'embedding': embedding,
-                                'metadata': {
-                                    'industry': industry,
-                                    'year': '2024',
-                                    'document_id': name
-                                }
-                            })
+                        embeddings_data = embed_chunks(chunks, {
+                            'industry': industry,
+                            'year': '2024',
+                            'document_id': name
+                        })
                         
                         store_in_pinecone(embeddings_data, index_name="deloitte-reports")
                         print(f"Successfully processed and stored {name}")
@@ -232,18 +236,11 @@ def process_reports_pipeline():
                             
                             # Store in Pinecone
                             chunks = markdown_header_chunks(summary)
-                            embeddings_data = []
-                            for chunk in chunks:
-                                embedding = generate_embeddings(chunk)
-                                embeddings_data.append({
-                                    'content': chunk,
-                                    'embedding': embedding,
-                                    'metadata': {
-                                        'industry': industry,
-                                        'year': '2024',
-                                        'document_id': pdf_name
-                                    }
-                                })
+                            embeddings_data = embed_chunks(chunks, {
+                                'industry': industry,
+                                'year': '2024',
+                                'document_id': pdf_name
+                            })
                             
                             store_in_pinecone(embeddings_data, index_name="deloitte-reports")
                             print(f"Successfully processed and stored {pdf_name}")
@@ -251,6 +248,9 @@ def process_reports_pipeline():
                 except Exception as e:
                     print(f"Error processing {url}: {str(e)}")
 
+        # Step 3: Remove chunks superseded by this run or left over from older chunk IDs
+        compact_pinecone(index_name="deloitte-reports")
+
     except Exception as e:
         print(f"Error in pipeline: {str(e)}")
 
@@ -1,5 +1,6 @@
 import os
 import boto3
+from boto3.s3.transfer import TransferConfig
 from dotenv import load_dotenv
 import datetime
 import os.path
@@ -21,6 +22,18 @@ s3_client = boto3.client(
     aws_secret_access_key=aws_secret_access_key
 )
 
+# Pitch decks are streamed to S3 as a managed multipart upload. At most
+# S3_MULTIPART_CHUNK_MB * S3_UPLOAD_CONCURRENCY of a deck is held in memory at once.
+S3_MULTIPART_CHUNK_MB = int(os.getenv("S3_MULTIPART_CHUNK_MB", "8"))
+S3_UPLOAD_CONCURRENCY = int(os.getenv("S3_UPLOAD_CONCURRENCY", "4"))
+
+pitch_deck_transfer_config = TransferConfig(
+    multipart_threshold=S3_MULTIPART_CHUNK_MB * 1024 * 1024,
+    multipart_chunksize=S3_MULTIPART_CHUNK_MB * 1024 * 1024,
+    max_concurrency=S3_UPLOAD_CONCURRENCY,
+    max_io_queue=S3_UPLOAD_CONCURRENCY
+)
+
 def generate_presigned_url(bucket_name: str, object_key: str, expiration: int = 3600) -> str:
     """
     Generate a presigned URL for an S3 object
@@ -141,26 +154,22 @@ def get_s3_object(s3_key: str) -> str:
         print(f"Error getting S3 object: {e}")
         return None
 
-def upload_pitch_deck_to_s3(file_path, startup_name=None, industry=None, original_filename=None):
+def upload_pitch_deck(file_path, startup_name=None, industry=None, original_filename=None, content_hash=None):
     """
-    Uploads a pitch deck PDF file to S3 and returns a presigned URL for access.
-    This function combines the naming logic from summary.py's upload_to_s3 and
-    the presigned URL generation from s3_utils.py's upload_pdf_to_s3.
+    Uploads a pitch deck PDF file to S3 and returns its key and a presigned URL.
+    The key lets the object be re-signed later without uploading it again.
     
-    Args:
-        file_path: Path to the PDF file
-        startup_name: Name of the startup
-        industry: Industry category
-        original_filename: Original filename of the PDF
+    The file is streamed from disk in multipart chunks rather than read into memory.
+    content_hash, if given, is stored as the object's sha256 metadata.
     
     Returns:
-        Presigned URL of the uploaded file
+        Tuple of (s3_key, presigned_url), or (None, None) on failure
     """
     try:
         # Validate file exists
         if not os.path.exists(file_path):
             print(f"Error: File not found at {file_path}")
-            return None
+            return None, None
         print("File exists")
         # Generate a timestamp
         timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -198,12 +207,18 @@ def upload_pitch_deck_to_s3(file_path, startup_name=None, industry=None, origina
         # Store pitch decks in pitchdecks/{industry} folder
         s3_key = f"pitchdecks/{industry}/{s3_object_name}"
         
-        # Upload the file to S3
+        extra_args = {"ContentType": "application/pdf"}
+        if content_hash:
+            extra_args["Metadata"] = {"sha256": content_hash}
+        
+        # Stream the file to S3
         with open(file_path, 'rb') as file_data:
-            s3_client.put_object(
-                Bucket=bucket_name,
-                Key=s3_key,
-                Body=file_data.read()
+            s3_client.upload_fileobj(
+                file_data,
+                bucket_name,
+                s3_key,
+                ExtraArgs=extra_args,
+                Config=pitch_deck_transfer_config
             )
         print(f"Pitch deck uploaded successfully to {bucket_name}/{s3_key}")
         
@@ -211,10 +226,10 @@ def upload_pitch_deck_to_s3(file_path, startup_name=None, industry=None, origina
         presigned_url = generate_presigned_url(bucket_name, s3_key)
         if presigned_url:
             print(f"Generated presigned URL for {s3_object_name}")
-            return presigned_url
+            return s3_key, presigned_url
         else:
             raise Exception("Failed to generate presigned URL")
     
     except Exception as e:
         print(f"Error uploading pitch deck to S3: {e}")
-        return None
+        return None, None
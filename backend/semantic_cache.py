@@ -0,0 +1,117 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Reuse a /chat answer for a new query whose embedding is at least this cosine-similar
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "500"))
+SEMANTIC_CACHE_TTL_SECONDS = float(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "3600"))
+
+
+class SemanticCache:
+    """
+    Cache of answers looked up by query-embedding similarity rather than exact text.
+
+    Each entry keeps the normalized query embedding, the answer payload and the
+    IDs of the documents the answer was generated from, so entries can be dropped
+    when any of those documents change.
+    """
+
+    def __init__(self, threshold: float = 0.92, max_entries: int = 500, ttl_seconds: float = 3600):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # entry id -> (stored_at, embedding, payload, doc_ids), oldest first
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, embedding):
+        """
+        Return the payload of the most similar fresh entry, or None if none reaches the threshold.
+
+        Args:
+            embedding: Query embedding
+
+        Returns:
+            Tuple of (payload, similarity), or None
+        """
+        query = self._normalize(embedding)
+        with self._lock:
+            now = time.monotonic()
+            expired = [key for key, (stored_at, *_) in self._entries.items() if now - stored_at > self.ttl_seconds]
+            for key in expired:
+                del self._entries[key]
+            if self._entries:
+                keys = list(self._entries)
+                matrix = np.stack([self._entries[key][1] for key in keys])
+                similarities = matrix @ query
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    self._entries.move_to_end(keys[best])
+                    self._stats["hits"] += 1
+                    return self._entries[keys[best]][2], float(similarities[best])
+            self._stats["misses"] += 1
+            return None
+
+    def store(self, embedding, payload, doc_ids):
+        """
+        Cache an answer.
+
+        Args:
+            embedding: Embedding of the query that was answered
+            payload: Answer to return for similar queries
+            doc_ids: IDs of the retrieved documents the answer is based on
+        """
+        with self._lock:
+            self._entries[self._next_id] = (time.monotonic(), self._normalize(embedding), payload, frozenset(doc_ids))
+            self._next_id += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def invalidate_documents(self, doc_ids) -> int:
+        """Drop every entry whose answer used any of doc_ids; returns the number removed"""
+        doc_ids = set(doc_ids)
+        with self._lock:
+            keys = [key for key, (_, _, _, used) in self._entries.items() if used & doc_ids]
+            for key in keys:
+                del self._entries[key]
+            self._stats["invalidations"] += len(keys)
+            return len(keys)
+
+    def invalidate(self) -> int:
+        """Drop every entry"""
+        with self._lock:
+            removed = len(self._entries)
+            self._entries.clear()
+            self._stats["invalidations"] += removed
+            return removed
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "threshold": self.threshold,
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "size": len(self._entries),
+                **self._stats,
+            }
+
+
+chat_cache = SemanticCache(
+    threshold=SEMANTIC_CACHE_THRESHOLD,
+    max_entries=SEMANTIC_CACHE_MAX_ENTRIES,
+    ttl_seconds=SEMANTIC_CACHE_TTL_SECONDS
+)
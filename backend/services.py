@@ -0,0 +1,154 @@
+import os
+import time
+import threading
+import traceback
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Load heavy services in a background thread when the app starts
+WARM_UP_ON_STARTUP = os.getenv("WARM_UP_ON_STARTUP", "true").lower() == "true"
+
+SERVICE_PENDING = "pending"
+SERVICE_LOADING = "loading"
+SERVICE_READY = "ready"
+SERVICE_FAILED = "failed"
+
+
+class ServiceRegistry:
+    """
+    Process-wide registry of lazily created, shared backend services.
+
+    Each service is built by its factory the first time it is requested, so
+    importing the API does no network or model-loading work and every module
+    shares one instance. warm_up() builds everything in a background thread.
+    """
+
+    def __init__(self):
+        self._factories = {}
+        self._warmers = {}
+        self._instances = {}
+        self._status = {}
+        self._errors = {}
+        self._load_times = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+        self._warm_up_thread = None
+
+    def register(self, name: str, factory, warm=None):
+        """
+        Register a service.
+
+        Args:
+            name: Service name used with get()
+            factory: Zero-argument callable that builds the service
+            warm: Optional callable run on the built instance during warm_up(),
+                e.g. a dummy inference to page the model into memory
+        """
+        with self._lock:
+            self._factories[name] = factory
+            self._warmers[name] = warm
+            self._status[name] = SERVICE_PENDING
+            self._locks[name] = threading.Lock()
+
+    def get(self, name: str):
+        """Return the shared instance, building it on first use; failed builds are retried on the next call"""
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+
+        with self._locks[name]:
+            instance = self._instances.get(name)
+            if instance is not None:
+                return instance
+
+            self._status[name] = SERVICE_LOADING
+            started = time.monotonic()
+            try:
+                instance = self._factories[name]()
+            except Exception as e:
+                self._status[name] = SERVICE_FAILED
+                self._errors[name] = str(e)
+                raise
+            self._load_times[name] = round(time.monotonic() - started, 3)
+            self._instances[name] = instance
+            self._status[name] = SERVICE_READY
+            self._errors.pop(name, None)
+            print(f"Service '{name}' initialized in {self._load_times[name]}s")
+            return instance
+
+    def proxy(self, name: str):
+        """Module-level stand-in for a service that resolves it on first attribute access"""
+        return LazyService(self, name)
+
+    def warm_up(self):
+        """Build (and warm) every registered service in a background thread"""
+        with self._lock:
+            if self._warm_up_thread is not None:
+                return self._warm_up_thread
+            self._warm_up_thread = threading.Thread(target=self._warm_up_all, name="service-warm-up", daemon=True)
+        self._warm_up_thread.start()
+        return self._warm_up_thread
+
+    def _warm_up_all(self):
+        for name in list(self._factories):
+            try:
+                instance = self.get(name)
+                if self._warmers[name]:
+                    self._warmers[name](instance)
+            except Exception as e:
+                print(f"Warm-up of service '{name}' failed: {e}")
+                print(traceback.format_exc())
+
+    def is_ready(self) -> bool:
+        return all(status == SERVICE_READY for status in self._status.values())
+
+    def status(self) -> dict:
+        """Per-service load status, load time and last error"""
+        return {
+            name: {
+                "status": self._status[name],
+                "load_seconds": self._load_times.get(name),
+                "error": self._errors.get(name),
+            }
+            for name in self._factories
+        }
+
+
+class LazyService:
+    """Attribute-forwarding proxy for a registry service"""
+
+    def __init__(self, registry: ServiceRegistry, name: str):
+        self._registry = registry
+        self._name = name
+
+    def __getattr__(self, attr):
+        return getattr(self._registry.get(self._name), attr)
+
+
+def _create_embedding_manager():
+    from pinecone_pipeline.embedding_manager import EmbeddingManager
+    return EmbeddingManager()
+
+
+def _create_gemini_assistant():
+    from pinecone_pipeline.gemini_assistant import GeminiAssistant
+    return GeminiAssistant()
+
+
+def _warm_embedding_model(manager):
+    # The first encode pays for lazy weight loading and kernel selection
+    manager.model.encode("warm up")
+
+
+registry = ServiceRegistry()
+registry.register("embedding_manager", _create_embedding_manager, warm=_warm_embedding_model)
+registry.register("gemini_assistant", _create_gemini_assistant)
+
+
+def get_embedding_manager():
+    return registry.get("embedding_manager")
+
+
+def get_gemini_assistant():
+    return registry.get("gemini_assistant")
@@ -1,45 +1,132 @@
-from pydantic import BaseModel
-import snowflake.connector
 import os
+import time
+import threading
+from pydantic import BaseModel
+from dotenv import load_dotenv
+from database.snowflake_connect import pooled_connection
 
-# Snowflake connection parameters from environment variables
-SNOWFLAKE_USER = os.getenv("SNOWFLAKE_USER")
-SNOWFLAKE_PASSWORD = os.getenv("SNOWFLAKE_PASSWORD")
-SNOWFLAKE_ACCOUNT = os.getenv("SNOWFLAKE_ACCOUNT")
-SNOWFLAKE_WAREHOUSE = os.getenv("SNOWFLAKE_WAREHOUSE")
+load_dotenv()
 
 class StartupCheckRequest(BaseModel):
     startup_name: str
 
+# Full reload interval of the startup name index, to pick up rows inserted by other processes
+STARTUP_INDEX_REFRESH_SECONDS = float(os.getenv("STARTUP_INDEX_REFRESH_SECONDS", "600"))
+# Wait after a failed load before querying Snowflake again; lookups use the names already loaded meanwhile
+STARTUP_INDEX_RETRY_SECONDS = float(os.getenv("STARTUP_INDEX_RETRY_SECONDS", "30"))
+
+STARTUP_NAMES_QUERY = """
+SELECT startup_name, summary_report IS NOT NULL
+FROM INVESTOR_INTEL_DB.STARTUP_INFORMATION.STARTUP
+"""
+
+def normalize_startup_name(startup_name: str) -> str:
+    """Key used for existence checks; names match case-insensitively, like LOWER(startup_name)"""
+    return startup_name.strip().lower()
+
+def _load_startup_names():
+    with pooled_connection() as (conn, cursor):
+        cursor.execute(STARTUP_NAMES_QUERY)
+        return cursor.fetchall()
+
+class StartupNameIndex:
+    """
+    In-process index of startup names, the single source for existence checks.
+
+    Maps each normalized STARTUP.STARTUP_NAME to whether the startup already has a
+    processed pitch deck (summary). Loaded from Snowflake on first use, updated
+    incrementally when this process adds a startup or a pitch deck, and reloaded
+    in full every refresh_seconds to pick up changes made elsewhere. After a
+    failed load, no reload is attempted for retry_seconds.
+    """
+
+    def __init__(self, load=_load_startup_names, refresh_seconds: float = STARTUP_INDEX_REFRESH_SECONDS,
+                 retry_seconds: float = STARTUP_INDEX_RETRY_SECONDS):
+        self._load = load
+        self.refresh_seconds = refresh_seconds
+        self.retry_seconds = retry_seconds
+        self._names = {}  # normalized name -> has pitch deck
+        self._added_during_load = {}
+        self._loading = False
+        self._loaded_at = None
+        self._failed_at = None
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._stats = {"loads": 0, "load_errors": 0, "lookups": 0}
+
+    def _load_due(self) -> bool:
+        now = time.monotonic()
+        if self._failed_at is not None and now - self._failed_at < self.retry_seconds:
+            return False
+        return self._loaded_at is None or now - self._loaded_at >= self.refresh_seconds
+
+    def _ensure_loaded(self):
+        if not self._load_due():
+            return
+        with self._load_lock:
+            if not self._load_due():
+                return
+            with self._lock:
+                self._loading = True
+                self._added_during_load = {}
+            try:
+                rows = self._load()
+            except Exception as e:
+                with self._lock:
+                    self._loading = False
+                    self._failed_at = time.monotonic()
+                    self._stats["load_errors"] += 1
+                print(f"Error loading startup names: {str(e)}")
+                return
+            names = {normalize_startup_name(name): bool(has_pitch_deck) for name, has_pitch_deck in rows if name}
+            with self._lock:
+                # Keep additions made while the query was running
+                for key, has_pitch_deck in self._added_during_load.items():
+                    names[key] = names.get(key, False) or has_pitch_deck
+                self._names = names
+                self._loading = False
+                self._loaded_at = time.monotonic()
+                self._failed_at = None
+                self._stats["loads"] += 1
+
+    def exists(self, startup_name: str) -> bool:
+        """True if a startup with this name is in the STARTUP table"""
+        self._ensure_loaded()
+        with self._lock:
+            self._stats["lookups"] += 1
+            return normalize_startup_name(startup_name) in self._names
+
+    def has_pitch_deck(self, startup_name: str) -> bool:
+        """True if the startup exists and its pitch deck has already been processed"""
+        self._ensure_loaded()
+        with self._lock:
+            self._stats["lookups"] += 1
+            return self._names.get(normalize_startup_name(startup_name), False)
+
+    def add(self, startup_name: str, pitch_deck: bool = False):
+        """Record a startup (and optionally its processed pitch deck) added by this process"""
+        key = normalize_startup_name(startup_name)
+        with self._lock:
+            self._names[key] = self._names.get(key, False) or pitch_deck
+            if self._loading:
+                self._added_during_load[key] = self._added_during_load.get(key, False) or pitch_deck
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._names),
+                "age_seconds": round(time.monotonic() - self._loaded_at, 1) if self._loaded_at is not None else None,
+                **self._stats,
+            }
+
+startup_index = StartupNameIndex()
+
 def check_startup_exists(startup_name: str) -> bool:
     """
     Check if a startup with the given name already exists in Snowflake.
     Returns True if exists, False otherwise.
     """
-    query = """
-    SELECT startup_name
-    FROM INVESTOR_INTEL_DB.STARTUP_INFORMATION.STARTUP
-    WHERE LOWER(startup_name) = LOWER(%s)
-    LIMIT 1
-    """
-    
-    try:
-        conn = snowflake.connector.connect(
-            user=SNOWFLAKE_USER,
-            password=SNOWFLAKE_PASSWORD,
-            account=SNOWFLAKE_ACCOUNT,
-            warehouse=SNOWFLAKE_WAREHOUSE,
-        )
-        cursor = conn.cursor()
-        cursor.execute(query, (startup_name,))
-        result = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        
-        return len(result) > 0
-    except Exception as e:
-        print(f"Error checking startup existence: {str(e)}")
-        return False
+    return startup_index.exists(startup_name)
 
 # Function to be used in the main.py API
 def startup_exists_check(startup_name: str) -> dict:
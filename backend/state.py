@@ -1,19 +1,32 @@
 from pydantic import BaseModel
 from typing import List, Dict, Optional
-from typing_extensions import TypedDict
+from typing_extensions import TypedDict, Annotated
+
+
+def merge_startup_writes(current: Optional[Dict], update: Optional[Dict]) -> Dict:
+    """Reducer for startup_writes: nodes add or overwrite queued column values"""
+    return {**(current or {}), **(update or {})}
 
 
 class AnalysisState(TypedDict):
     pdf_file_path: str
+    content_hash: Optional[str]  # SHA-256 of the uploaded deck
     startup_name: str
     industry: str
     linkedin_urls: Optional[List[str]]
     website_url: Optional[str]
     original_filename: Optional[str]
+    funding_info: Optional[Dict]
+    s3_location: Optional[str]
+    embedding_status: Optional[str]
+    error: Optional[str]
+    refresh: Optional[bool]  # Bypass the LLM response cache
     summary: Dict
     industry_report: str
     competitors: List[Dict]
     competitor_visualizations: Optional[Dict]  # Store plotly graph JSONs
     final_report: str
     news: List[Dict]
+    # STARTUP columns produced during the run, written in one UPDATE by store_report
+    startup_writes: Annotated[Dict, merge_startup_writes]
 
@@ -20,7 +20,8 @@ os.environ.update({
     "SNOWFLAKE_ACCOUNT": "test",
     "SNOWFLAKE_WAREHOUSE": "test",
     "SNOWFLAKE_DATABASE": "test_db",
-    "SNOWFLAKE_ROLE": "test_role"
+    "SNOWFLAKE_ROLE": "test_role",
+    "TEXT_STORE_S3_PREFIX": "",
 })
 
 # Mock classes for Snowflake
@@ -111,6 +112,8 @@ def setup_environment():
 @pytest.fixture(autouse=True)
 def mock_graph_and_deps():
     fake_graph = MagicMock()
+    # No checkpoint exists yet for the run, so it starts from the initial state
+    fake_graph.aget_state = AsyncMock(return_value=MagicMock(values={}, next=()))
     fake_graph.ainvoke = AsyncMock(return_value={
         "s3_location": "https://mock-s3.com/pitchdeck.pdf",
         "summary_text": "This is a mocked summary.",
@@ -160,4 +163,39 @@ def test_startup_exists_check_integration(setup_environment, mock_graph_and_deps
         )
         
         assert response.status_code == 200
-        assert response.json().get("exists") is True
\ No newline at end of file
+        assert response.json().get("exists") is True
+
+def test_pitch_deck_job_integration(setup_environment):
+    """Submitting a job returns immediately; status and SSE events follow the graph run"""
+    async def fake_astream(state, config=None, stream_mode=None):
+        yield "updates", {"process_pitch_deck": {}}
+        yield "values", {**state, "s3_location": "https://mock-s3.com/pitchdeck.pdf", "final_report": "Job report."}
+
+    fake_graph = MagicMock()
+    fake_graph.aget_state = AsyncMock(return_value=MagicMock(values={}, next=()))
+    fake_graph.astream = fake_astream
+
+    with patch('main.get_graph', return_value=fake_graph):
+        with open(SAMPLE_PDF_PATH, "rb") as file:
+            response = client.post(
+                "/jobs/process-pitch-deck",
+                files={"file": ("sample_pitch_deck.pdf", file, "application/pdf")},
+                data={"startup_name": SAMPLE_STARTUP_NAME, "industry": SAMPLE_INDUSTRY}
+            )
+
+        assert response.status_code == 202
+        job_id = response.json()["job_id"]
+
+        # The SSE stream ends once the job has finished
+        events = client.get(f"/jobs/{job_id}/events")
+        assert events.headers["content-type"].startswith("text/event-stream")
+        assert "event: node_completed" in events.text
+        assert "event: completed" in events.text
+
+    job = client.get(f"/jobs/{job_id}").json()
+    assert job["status"] == "completed"
+    assert job["completed_nodes"] == ["process_pitch_deck"]
+    assert job["result"]["final_report"] == "Job report."
+    assert job["result"]["startup_name"] == SAMPLE_STARTUP_NAME
+
+    assert client.get("/jobs/does-not-exist").status_code == 404
@@ -0,0 +1,167 @@
+import os
+import hashlib
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from cache import LRUTTLCache
+
+load_dotenv()
+
+# Document text referenced from Pinecone metadata by SHA-256 ("text_hash") instead of stored inline
+TEXT_STORE_DIR = os.getenv("TEXT_STORE_DIR", os.path.join(tempfile.gettempdir(), "investorintel_text_store"))
+TEXT_STORE_CACHE_ENTRIES = int(os.getenv("TEXT_STORE_CACHE_ENTRIES", "512"))
+# S3 prefix the texts are also written under, so processes on other hosts (e.g. the
+# Airflow workers writing report chunks) and the backend resolve the same hashes. Empty disables it.
+TEXT_STORE_S3_PREFIX = os.getenv("TEXT_STORE_S3_PREFIX", "text-store/")
+# Remote reads of one get_many call run in parallel on this pool
+TEXT_STORE_FETCH_WORKERS = int(os.getenv("TEXT_STORE_FETCH_WORKERS", "8"))
+
+_fetch_executor = ThreadPoolExecutor(max_workers=TEXT_STORE_FETCH_WORKERS, thread_name_prefix="text-store-fetch")
+
+_MISSING = object()
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class S3TextTier:
+    """Texts stored as S3 objects named <prefix><hash>.txt"""
+
+    def __init__(self, client, bucket: str, prefix: str):
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def get(self, key: str):
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=f"{self.prefix}{key}.txt")
+            return response["Body"].read().decode("utf-8")
+        except Exception as e:
+            print(f"Text {key} not found in S3: {e}")
+            return None
+
+    def put(self, key: str, text: str):
+        self.client.put_object(
+            Bucket=self.bucket,
+            Key=f"{self.prefix}{key}.txt",
+            Body=text.encode("utf-8"),
+            ContentType="text/plain; charset=utf-8"
+        )
+
+
+class TextStore:
+    """
+    Content-addressed store of document texts.
+
+    Texts live on local disk under their SHA-256, optionally backed by a remote
+    tier (S3), with an LRU of recently read texts in front. Since a hash always
+    names the same text, entries never need invalidating. A text is only written
+    to disk once the remote tier has it, so a local copy means it is stored everywhere.
+    """
+
+    def __init__(self, directory: str, cache_entries: int = 512, remote=None):
+        self.directory = directory
+        self.remote = remote
+        self._cache = LRUTTLCache(max_entries=cache_entries, ttl_seconds=float("inf"))
+        self._lock = threading.Lock()
+        self._stats = {"puts": 0, "disk_hits": 0, "remote_hits": 0, "missing": 0}
+        os.makedirs(directory, exist_ok=True)
+
+    def _count(self, stat: str, n: int = 1):
+        with self._lock:
+            self._stats[stat] += n
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.txt")
+
+    def _write_local(self, key: str, text: str) -> bool:
+        """Write text to disk unless already there; returns whether it was new"""
+        path = self._path(key)
+        if os.path.exists(path):
+            return False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file and rename so readers never see a partial text
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+        return True
+
+    def put(self, text: str) -> str:
+        """
+        Store text and return its hash, to be kept in vector metadata as "text_hash".
+
+        Args:
+            text: Document or chunk text
+
+        Returns:
+            Hex SHA-256 of the UTF-8 text
+
+        Raises:
+            Exception: If the remote tier rejects the text; nothing is stored, so the
+                caller must not reference the hash and a later put retries
+        """
+        key = text_hash(text)
+        if os.path.exists(self._path(key)):
+            return key
+        if self.remote is not None:
+            self.remote.put(key, text)
+        if self._write_local(key, text):
+            self._count("puts")
+        return key
+
+    def get(self, key: str):
+        """Return the text stored under key, or None if no tier has it"""
+        text = self._cache.get(key, _MISSING)
+        if text is not _MISSING:
+            return text
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                text = f.read()
+            self._count("disk_hits")
+        except OSError:
+            text = self.remote.get(key) if self.remote is not None else None
+            if text is None or text_hash(text) != key:
+                self._count("missing")
+                return None
+            self._count("remote_hits")
+            self._write_local(key, text)
+        self._cache.set(key, text)
+        return text
+
+    def get_many(self, keys) -> dict:
+        """Resolve several hashes at once, reading from the remote tier in parallel; missing texts are left out"""
+        keys = list(set(keys))
+        if self.remote is not None and len(keys) > 1:
+            texts = _fetch_executor.map(self.get, keys)
+        else:
+            texts = map(self.get, keys)
+        return {key: text for key, text in zip(keys, texts) if text is not None}
+
+    def metrics(self) -> dict:
+        cache = self._cache.metrics()
+        with self._lock:
+            stats = dict(self._stats)
+        return {
+            "directory": self.directory,
+            "remote": self.remote is not None,
+            "cache_size": cache["size"],
+            "cache_hits": cache["hits"],
+            **stats,
+        }
+
+
+def _create_text_store() -> TextStore:
+    remote = None
+    if TEXT_STORE_S3_PREFIX:
+        try:
+            from s3_utils import s3_client, bucket_name
+        except ImportError:
+            from .s3_utils import s3_client, bucket_name
+        remote = S3TextTier(s3_client, bucket_name, TEXT_STORE_S3_PREFIX)
+    return TextStore(TEXT_STORE_DIR, cache_entries=TEXT_STORE_CACHE_ENTRIES, remote=remote)
+
+
+text_store = _create_text_store()
@@ -0,0 +1,380 @@
+import os
+import json
+import time
+import tempfile
+import threading
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Serve similarity search from an in-process mirror of the Pinecone indexes
+LOCAL_VECTOR_INDEX_ENABLED = os.getenv("LOCAL_VECTOR_INDEX_ENABLED", "true").lower() == "true"
+# Full resync from Pinecone, to pick up vectors written by other processes (e.g. the Airflow DAGs)
+LOCAL_VECTOR_INDEX_REFRESH_SECONDS = float(os.getenv("LOCAL_VECTOR_INDEX_REFRESH_SECONDS", "900"))
+# Wait after a failed sync before retrying, doubled per consecutive failure up to the refresh interval
+LOCAL_VECTOR_INDEX_RETRY_SECONDS = float(os.getenv("LOCAL_VECTOR_INDEX_RETRY_SECONDS", "30"))
+# Optional directory to persist mirrors in; they are memory-mapped from there on startup
+LOCAL_VECTOR_INDEX_DIR = os.getenv("LOCAL_VECTOR_INDEX_DIR")
+
+PINECONE_FETCH_BATCH_SIZE = 100
+# Written last by LocalVectorIndex.save(); vectors.npy and metadata.json are only trusted if they match it
+LOCAL_VECTOR_INDEX_MARKER = "marker.json"
+
+
+def _matches_filter(metadata: dict, filter_dict: dict) -> bool:
+    """Evaluate the subset of Pinecone's metadata filter language used here ($eq, $ne, $in, $nin)"""
+    for field, condition in filter_dict.items():
+        value = metadata.get(field)
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        for op, expected in condition.items():
+            if op == "$eq" and value != expected:
+                return False
+            if op == "$ne" and value == expected:
+                return False
+            if op == "$in" and value not in expected:
+                return False
+            if op == "$nin" and value in expected:
+                return False
+    return True
+
+
+class LocalVectorIndex:
+    """
+    In-process cosine-similarity index with Pinecone's upsert/query interface.
+
+    Vectors are kept L2-normalized in one float32 matrix (grown by doubling), with
+    a metadata side table. Query is a single matrix-vector product, which is
+    fast enough for a few tens of thousands of vectors. Responses have the same
+    shape as Pinecone's, so the index can stand in for a Pinecone index handle.
+    """
+
+    def __init__(self, dimension: int):
+        self.dimension = dimension
+        self._vectors = np.zeros((0, dimension), dtype=np.float32)
+        self._ids = []
+        self._metadata = []
+        self._rows = {}  # id -> row
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._ids)
+
+    def _ensure_capacity(self, rows: int):
+        if rows <= self._vectors.shape[0] and self._vectors.flags.writeable:
+            return
+        grown = np.zeros((max(rows, 2 * self._vectors.shape[0], 64), self.dimension), dtype=np.float32)
+        grown[:len(self._ids)] = self._vectors[:len(self._ids)]
+        self._vectors = grown
+
+    def upsert(self, vectors=None, **kwargs):
+        """
+        Insert or replace vectors.
+
+        Args:
+            vectors: (id, values, metadata) tuples or {"id", "values", "metadata"} dicts
+        """
+        with self._lock:
+            for vector in vectors:
+                if isinstance(vector, dict):
+                    vector_id, values, metadata = vector["id"], vector["values"], vector.get("metadata")
+                else:
+                    vector_id, values, metadata = (tuple(vector) + (None,))[:3]
+                values = np.asarray(values, dtype=np.float32)
+                norm = np.linalg.norm(values)
+                row = self._rows.get(vector_id)
+                if row is None:
+                    row = len(self._ids)
+                    self._ensure_capacity(row + 1)
+                    self._ids.append(vector_id)
+                    self._metadata.append(None)
+                    self._rows[vector_id] = row
+                else:
+                    self._ensure_capacity(len(self._ids))
+                self._vectors[row] = values / norm if norm else values
+                self._metadata[row] = dict(metadata or {})
+
+    def delete(self, ids=None, **kwargs):
+        """Remove vectors by ID; the last row is moved into each freed slot"""
+        with self._lock:
+            self._ensure_capacity(len(self._ids))
+            for vector_id in ids or []:
+                row = self._rows.pop(vector_id, None)
+                if row is None:
+                    continue
+                last = len(self._ids) - 1
+                if row != last:
+                    self._vectors[row] = self._vectors[last]
+                    self._ids[row] = self._ids[last]
+                    self._metadata[row] = self._metadata[last]
+                    self._rows[self._ids[row]] = row
+                self._ids.pop()
+                self._metadata.pop()
+
+    def query(self, vector=None, top_k: int = 10, include_metadata: bool = True, filter: dict = None, **kwargs):
+        """Top-k cosine search; returns {"matches": [{"id", "score", "metadata"}]} like Pinecone"""
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+        with self._lock:
+            count = len(self._ids)
+            scores = self._vectors[:count] @ query
+            if filter:
+                allowed = np.fromiter(
+                    (_matches_filter(metadata, filter) for metadata in self._metadata), dtype=bool, count=count
+                )
+                scores = np.where(allowed, scores, -np.inf)
+            k = min(top_k, count)
+            if k == 0:
+                return {"matches": []}
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return {
+                "matches": [
+                    {
+                        "id": self._ids[row],
+                        "score": float(scores[row]),
+                        "metadata": dict(self._metadata[row]) if include_metadata else None,
+                    }
+                    for row in top if np.isfinite(scores[row])
+                ]
+            }
+
+    def save(self, directory: str):
+        """
+        Write the index to directory as vectors.npy plus a JSON side table.
+
+        Both files are written to temp files and renamed into place, so a mirror
+        still memory-mapping the previous vectors.npy keeps reading the old file.
+        The marker naming the new version and row count is written last; until
+        it is, load() rejects the directory instead of pairing mismatched files.
+        """
+        os.makedirs(directory, exist_ok=True)
+        marker_path = os.path.join(directory, LOCAL_VECTOR_INDEX_MARKER)
+        try:
+            with open(marker_path, "r", encoding="utf-8") as f:
+                version = json.load(f)["version"] + 1
+        except (OSError, ValueError, KeyError):
+            version = 1
+        with self._lock:
+            count = len(self._ids)
+            side_table = {"version": version, "dimension": self.dimension, "ids": self._ids, "metadata": self._metadata}
+            metadata_tmp = _write_file(directory, "metadata.json",
+                                       lambda f: f.write(json.dumps(side_table).encode("utf-8")))
+            try:
+                vectors_tmp = _write_file(directory, "vectors.npy", lambda f: np.save(f, self._vectors[:count]))
+            except BaseException:
+                os.remove(metadata_tmp)
+                raise
+        os.replace(metadata_tmp, os.path.join(directory, "metadata.json"))
+        os.replace(vectors_tmp, os.path.join(directory, "vectors.npy"))
+        marker = {"version": version, "count": count}
+        marker_tmp = _write_file(directory, LOCAL_VECTOR_INDEX_MARKER,
+                                 lambda f: f.write(json.dumps(marker).encode("utf-8")))
+        os.replace(marker_tmp, marker_path)
+        _fsync_dir(directory)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> "LocalVectorIndex":
+        """Open an index written by save(); vectors are memory-mapped read-only until the first write"""
+        with open(os.path.join(directory, LOCAL_VECTOR_INDEX_MARKER), "r", encoding="utf-8") as f:
+            marker = json.load(f)
+        with open(os.path.join(directory, "metadata.json"), "r", encoding="utf-8") as f:
+            side_table = json.load(f)
+        vectors = np.load(os.path.join(directory, "vectors.npy"), mmap_mode="r" if mmap else None)
+        if (side_table.get("version") != marker["version"]
+                or not len(side_table["ids"]) == len(vectors) == marker["count"]):
+            raise ValueError(f"Incomplete save in {directory}: marker does not match vectors.npy and metadata.json")
+        index = cls(side_table["dimension"])
+        index._vectors = vectors
+        index._ids = side_table["ids"]
+        index._metadata = side_table["metadata"]
+        index._rows = {vector_id: row for row, vector_id in enumerate(index._ids)}
+        return index
+
+
+def _write_file(directory: str, name: str, write):
+    """Write a temp file in directory with write(f) and fsync it; returns its path"""
+    fd, path = tempfile.mkstemp(dir=directory, prefix=f".{name}.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
+
+
+def _fsync_dir(directory: str):
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def fetch_all_vectors(pinecone_index, batch_size: int = PINECONE_FETCH_BATCH_SIZE):
+    """
+    Yield every (id, values, metadata) in a Pinecone serverless index.
+
+    Uses list() to page through IDs and fetch() to pull vectors batch by batch.
+    """
+    for ids in pinecone_index.list(limit=batch_size):
+        ids = list(ids)
+        if not ids:
+            continue
+        response = pinecone_index.fetch(ids=ids)
+        vectors = response.vectors if hasattr(response, "vectors") else response["vectors"]
+        for vector_id, vector in vectors.items():
+            if isinstance(vector, dict):
+                yield vector_id, vector["values"], vector.get("metadata")
+            else:
+                yield vector_id, vector.values, vector.metadata
+
+
+class MirroredVectorStore:
+    """
+    Pinecone index handle that answers queries from a local mirror once it is in sync.
+
+    Pinecone stays the source of truth: writes go to Pinecone first and are then
+    applied to the mirror. The mirror is filled by a full sync in a background
+    thread and re-synced every refresh_seconds; until the first sync completes,
+    queries go to Pinecone. A failed sync is retried after retry_seconds, backing
+    off exponentially while Pinecone keeps failing.
+    """
+
+    def __init__(self, name: str, remote, dimension: int, refresh_seconds: float = LOCAL_VECTOR_INDEX_REFRESH_SECONDS,
+                 persist_dir: str = LOCAL_VECTOR_INDEX_DIR, retry_seconds: float = LOCAL_VECTOR_INDEX_RETRY_SECONDS):
+        self.name = name
+        self.remote = remote
+        self.dimension = dimension
+        self.refresh_seconds = refresh_seconds
+        self.retry_seconds = retry_seconds
+        self.persist_dir = os.path.join(persist_dir, name) if persist_dir else None
+        self.local = None
+        self._synced_at = None
+        self._failed_at = None
+        self._consecutive_failures = 0
+        self._sync_thread = None
+        self._pending = None  # writes made while a sync is running, replayed onto the new mirror
+        self._lock = threading.Lock()
+        self._stats = {"local_queries": 0, "remote_queries": 0, "syncs": 0, "sync_errors": 0}
+
+        if self.persist_dir and os.path.exists(os.path.join(self.persist_dir, LOCAL_VECTOR_INDEX_MARKER)):
+            try:
+                self.local = LocalVectorIndex.load(self.persist_dir)
+                print(f"Loaded local mirror of '{name}' with {len(self.local)} vectors")
+            except Exception as e:
+                print(f"Could not load local mirror of '{name}': {e}")
+
+    def sync(self):
+        """Rebuild the mirror from Pinecone and swap it in"""
+        started = time.monotonic()
+        with self._lock:
+            self._pending = []
+        try:
+            mirror = LocalVectorIndex(self.dimension)
+            mirror.upsert(fetch_all_vectors(self.remote))
+        except Exception as e:
+            with self._lock:
+                self._pending = None
+                self._failed_at = time.monotonic()
+                self._consecutive_failures += 1
+                self._stats["sync_errors"] += 1
+            print(f"Sync of local mirror '{self.name}' failed, retrying in {self._retry_delay():.0f}s: {e}")
+            return
+        with self._lock:
+            # Pinecone reads are eventually consistent, so the listing may predate recent writes
+            for operation, argument in self._pending:
+                getattr(mirror, operation)(argument)
+            self._pending = None
+            self.local = mirror
+            self._synced_at = time.monotonic()
+            self._failed_at = None
+            self._consecutive_failures = 0
+            self._stats["syncs"] += 1
+        print(f"Synced local mirror of '{self.name}': {len(mirror)} vectors in {time.monotonic() - started:.1f}s")
+        if self.persist_dir:
+            mirror.save(self.persist_dir)
+
+    def sync_in_background(self):
+        """Start a sync unless one is already running"""
+        with self._lock:
+            if self._sync_thread is not None and self._sync_thread.is_alive():
+                return self._sync_thread
+            self._sync_thread = threading.Thread(target=self.sync, name=f"vector-sync-{self.name}", daemon=True)
+        self._sync_thread.start()
+        return self._sync_thread
+
+    def _retry_delay(self) -> float:
+        return min(self.retry_seconds * 2 ** max(self._consecutive_failures - 1, 0), self.refresh_seconds)
+
+    def _sync_due(self) -> bool:
+        now = time.monotonic()
+        if self._failed_at is not None and now - self._failed_at < self._retry_delay():
+            return False
+        return self._synced_at is None or now - self._synced_at > self.refresh_seconds
+
+    def query(self, **kwargs):
+        if self._sync_due():
+            self.sync_in_background()
+        local = self.local
+        if local is not None:
+            with self._lock:
+                self._stats["local_queries"] += 1
+            return local.query(**kwargs)
+        with self._lock:
+            self._stats["remote_queries"] += 1
+        return self.remote.query(**kwargs)
+
+    def _apply_locally(self, operation: str, argument):
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((operation, argument))
+            if self.local is not None:
+                getattr(self.local, operation)(argument)
+
+    def upsert(self, vectors=None, **kwargs):
+        vectors = list(vectors)
+        response = self.remote.upsert(vectors, **kwargs)
+        self._apply_locally("upsert", vectors)
+        return response
+
+    def delete(self, ids=None, **kwargs):
+        response = self.remote.delete(ids=ids, **kwargs)
+        self._apply_locally("delete", list(ids or []))
+        return response
+
+    def __getattr__(self, attr):
+        # Everything else (fetch, describe_index_stats, ...) goes straight to Pinecone
+        return getattr(self.remote, attr)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "vectors": len(self.local) if self.local is not None else None,
+                "synced_seconds_ago": round(time.monotonic() - self._synced_at, 1) if self._synced_at is not None else None,
+                **self._stats,
+            }
+
+
+# Mirrors created by mirrored(), by index name
+mirrors = {}
+
+
+def mirrored(name: str, remote, dimension: int):
+    """Wrap a Pinecone index handle in a local mirror when LOCAL_VECTOR_INDEX_ENABLED is set"""
+    if not LOCAL_VECTOR_INDEX_ENABLED:
+        return remote
+    store = MirroredVectorStore(name, remote, dimension)
+    store.sync_in_background()
+    mirrors[name] = store
+    return store
+
+
+def mirror_metrics() -> dict:
+    return {"enabled": LOCAL_VECTOR_INDEX_ENABLED, **{name: store.metrics() for name, store in mirrors.items()}}
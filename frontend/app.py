@@ -9,6 +9,7 @@ import re
 from PIL import Image
 import plotly.graph_objects as go
 import plotly.express as px
+from chat_stream import stream_chat_response
 import plotly.io as pio
 
 FAST_API_URL = "https://investorintel-backend-x4s2izvkca-uk.a.run.app/"
@@ -397,26 +398,28 @@ elif st.session_state.page == 'chatbot':
                 # Add user message to chat history
                 st.session_state.chat_history.append({"role": "user", "content": query})
                 
-                # Send query to backend
+                # Show the question and stream the answer into the chat as it is generated
+                with chat_container:
+                    st.markdown(f"""
+                    <div class="question-box">
+                    {query}
+                    </div>
+                    """, unsafe_allow_html=True)
+                    answer_placeholder = st.empty()
+
                 with st.spinner('Searching database...'):
                     try:
-                        response = requests.post(
-                            f"{FAST_API_URL}/chat",
-                            json={"query": query}
+                        ai_response = stream_chat_response(
+                            FAST_API_URL,
+                            query,
+                            answer_placeholder,
+                            '<div class="answer-box">{}</div>',
+                            convert_to_plain_text
                         )
-                        
-                        if response.status_code == 200:
-                            result = response.json()
-                            ai_response = result.get("response", "Sorry, I couldn't find an answer to your question.")
-                            
-                            # Add assistant message to chat history
-                            st.session_state.chat_history.append({"role": "assistant", "content": ai_response})
-                        else:
-                            error_msg = f"Error: {response.status_code} - {response.text}"
-                            
-                            # Add error message to chat history
-                            st.session_state.chat_history.append({"role": "assistant", "content": error_msg})
-                            
+
+                        # Add assistant message to chat history
+                        st.session_state.chat_history.append({"role": "assistant", "content": ai_response})
+
                     except Exception as e:
                         error_msg = f"An error occurred: {str(e)}"
                         
@@ -0,0 +1,31 @@
+import json
+import requests
+
+
+def stream_chat_response(api_url, query, placeholder, bubble_html, format_text=lambda text: text):
+    """
+    Stream a /chat/stream answer into a Streamlit placeholder as it arrives.
+
+    Args:
+        api_url: Base URL of the FastAPI backend
+        query: The user's question
+        placeholder: st.empty() slot the growing answer is rendered into
+        bubble_html: HTML template with one {} for the answer text
+        format_text: Applied to the answer before each render
+
+    Returns:
+        The full answer text
+    """
+    answer = ""
+    with requests.post(f"{api_url}/chat/stream", json={"query": query}, stream=True, timeout=120) as response:
+        if response.status_code != 200:
+            return f"Error: {response.status_code} - {response.text}"
+        for line in response.iter_lines(decode_unicode=True):
+            # Each server-sent event carries its JSON payload on a "data:" line
+            if not line or not line.startswith("data: "):
+                continue
+            event = json.loads(line[len("data: "):])
+            if event["type"] in ("token", "error"):
+                answer += event.get("text", "")
+                placeholder.markdown(bubble_html.format(format_text(answer)), unsafe_allow_html=True)
+    return answer or "Sorry, I couldn't find an answer to your question."
@@ -16,6 +16,55 @@ if PROJECT_ROOT not in sys.path:
 # ✅ Now do the imports
 #from backend.database import investor_auth, investorIntel_entity
 
+def submit_pitch_deck_job(file, form_data):
+    """Queue a pitch deck job and remember the request so a failed run can be resumed"""
+    pitch_response = requests.post(
+        f"{FAST_API_URL}/jobs/process-pitch-deck",
+        files={"file": file},
+        data=form_data
+    )
+    if pitch_response.status_code != 202:
+        print(f"Error processing pitch deck: {pitch_response.status_code} - {pitch_response.text}")
+        return None
+
+    queued = pitch_response.json()
+    st.session_state.pitch_deck_job_id = queued.get("job_id")
+    # Resubmitting with the same run_id resumes from the last completed step
+    st.session_state.pitch_deck_retry = {"file": file, "form_data": {**form_data, "run_id": queued.get("run_id")}}
+    return queued.get("job_id")
+
+def show_pitch_deck_job_status(job_id):
+    """Render the status of a background pitch deck job with a manual refresh"""
+    try:
+        resp = requests.get(f"{FAST_API_URL}/jobs/{job_id}", timeout=10)
+    except requests.RequestException as e:
+        st.warning(f"Could not fetch pitch deck processing status: {e}")
+        return
+
+    if resp.status_code != 200:
+        st.session_state.pitch_deck_job_id = None
+        return
+
+    job = resp.json()
+    status = job.get("status")
+    if status == "completed":
+        st.success("✅ Your pitch deck has been analyzed.")
+        st.session_state.pitch_deck_job_id = None
+        st.session_state.pitch_deck_retry = None
+    elif status == "failed":
+        st.error(f"❌ Pitch deck processing failed: {job.get('error')}")
+        retry = st.session_state.get("pitch_deck_retry")
+        if not retry:
+            st.session_state.pitch_deck_job_id = None
+        elif st.button("Retry processing"):
+            submit_pitch_deck_job(retry["file"], retry["form_data"])
+            st.rerun()
+    else:
+        completed = job.get("completed_nodes", [])
+        st.info(f"⏳ Your pitch deck is being analyzed ({len(completed)} steps done). You can keep using the app.")
+        if st.button("Refresh status"):
+            st.rerun()
+
 def render():
     # Session state defaults
     st.session_state.setdefault("user_type", None)
@@ -349,14 +398,17 @@ def render():
                             
                         # Show success message immediately after /add-startup-info response
                         if startup_response.ok:
-                            # Process the pitch deck file directly (no threading)
+                            # Queue the pitch deck for background processing
                             if st.session_state.pitch_deck_file:
                                 try:
                                     # Prepare founder LinkedIn URLs
                                     linkedin_urls_json = json.dumps(st.session_state.founder_linkedin_urls)
                                     
+                                    # Keep the file contents so a failed job can be resubmitted
+                                    uploaded = st.session_state.pitch_deck_file
+                                    file = (uploaded.name, uploaded.getvalue(), "application/pdf")
+                                    
                                     # Create form data for file upload with all funding-related information
-                                    files = {"file": st.session_state.pitch_deck_file}
                                     form_data = {
                                         "startup_name": st.session_state.startup_name,
                                         "industry": st.session_state.industry,
@@ -370,17 +422,10 @@ def render():
                                         "post_money_valuation": str(post_money_valuation)
                                     }
                                     
-                                    # Direct API call
-                                    pitch_response = requests.post(
-                                        f"{FAST_API_URL}/process-pitch-deck",
-                                        files=files,
-                                        data=form_data
-                                    )
-                                    
-                                    if pitch_response.status_code == 200:
-                                        print(f"Pitch deck processed successfully for {st.session_state.startup_name}")
-                                    else:
-                                        print(f"Error processing pitch deck: {pitch_response.status_code} - {pitch_response.text}")
+                                    # Submit as a job; the backend returns a job ID right away
+                                    job_id = submit_pitch_deck_job(file, form_data)
+                                    if job_id:
+                                        print(f"Pitch deck job {job_id} queued for {st.session_state.startup_name}")
                                     
                                 except Exception as e:
                                     print(f"Error processing pitch deck: {e}")
@@ -408,6 +453,10 @@ def render():
                     except Exception as e:
                         st.error(f"❌ Error during submission: {e}")
 
+            # Show progress of the last submitted pitch deck without blocking the session
+            if st.session_state.get("pitch_deck_job_id"):
+                show_pitch_deck_job_status(st.session_state.pitch_deck_job_id)
+
         # -------- INVESTOR SECTION --------
         elif st.session_state.user_type == "Investor":
             st.markdown("---")
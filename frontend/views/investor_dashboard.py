@@ -9,6 +9,7 @@ import plotly.graph_objects as go
 import json
 import re
 import plotly.express as px
+from chat_stream import stream_chat_response
 
 FAST_API_URL = "https://investorintel-backend-x4s2izvkca-uk.a.run.app/"
 
@@ -105,43 +106,40 @@ def fetch_startups_by_status(investor_id, status):
     data = resp.json()
     return data.get("startups", [])
 
-# Cache startup details to prevent repeated API calls
+# Every column the startup detail page renders, fetched in one request
+STARTUP_DETAIL_COLUMNS = [
+    "startup_name", "industry", "email_address", "website_url", "pitch_deck_link",
+    "funding_amount_requested", "round_type", "equity_offered",
+    "pre_money_valuation", "post_money_valuation",
+    "summary_report", "analytics_report", "news_report", "competitor_visualizations",
+]
+
+# Cache the detail page data to prevent repeated API calls
 @st.cache_data(ttl=300)  # Cache for 5 minutes
-def fetch_startup_info(startup_id):
+def fetch_startup_details(startup_id):
     resp = requests.post(
-        f"{FAST_API_URL}/fetch-startup-info",
-        json={"startup_id": startup_id}
+        f"{FAST_API_URL}/fetch-startup-columns",
+        json={"startup_id": startup_id, "columns": STARTUP_DETAIL_COLUMNS}
     )
-    data = resp.json()
-    if data.get("status") == "success":
-        return data["startup"]
+    if resp.status_code == 200:
+        return resp.json()["startups"].get(str(startup_id))
     return None
 
-# Cache report data to prevent repeated API calls
+# Fetch the fields shown on the startup cards for a whole list of startups at once
 @st.cache_data(ttl=300)  # Cache for 5 minutes
-def fetch_report(column_name, startup_id):
+def fetch_startup_card_data(startup_ids):
+    if not startup_ids:
+        return {}
     resp = requests.post(
-        f"{FAST_API_URL}/get-startup-column",
-        json={"column_name": column_name, "startup_id": startup_id}
+        f"{FAST_API_URL}/fetch-startup-columns",
+        json={"startup_ids": list(startup_ids), "columns": ["industry", "funding_amount_requested", "round_type"]}
     )
     if resp.status_code == 200:
-        value = resp.json().get("value")
-        # For visualization data, we need to ensure it's valid JSON
-        if column_name == "competitor_visualizations" and value:
-            try:
-                # Try to parse JSON if it's not already parsed
-                if isinstance(value, str):
-                    return json.loads(value)
-                return value
-            except json.JSONDecodeError:
-                print(f"Failed to parse visualization JSON: {value}")
-                return None
-        return value
-    else:
-        return None
+        return resp.json()["startups"]
+    return {}
 
 # Add a new function to fetch competitors based on industry
-@st.cache_data(ttl=3)  # Cache for 5 minutes
+@st.cache_data(ttl=300)  # Cache for 5 minutes; the backend caches the query itself
 def fetch_industry_competitors(industry, limit=5):
     resp = requests.post(
         f"{FAST_API_URL}/get-industry-competitors",
@@ -329,6 +327,9 @@ def display_startup_cards(startup_list, main_col):
             "SAFE": "#795548"        # Brown
         }
         
+        # Card fields for every listed startup come back from a single request
+        card_data = fetch_startup_card_data(tuple(startup['startup_id'] for startup in startup_list))
+        
         # Create rows based on number of startups
         for i in range(0, len(startup_list), startups_per_row):
             # Get startups for this row
@@ -342,9 +343,7 @@ def display_startup_cards(startup_list, main_col):
                 # Get startup details for display
                 startup_id = startup['startup_id']
                 
-                # Use the existing function to get full startup data
-                # This makes an API call but we benefit from caching
-                full_startup_data = fetch_startup_info(startup_id)
+                full_startup_data = card_data.get(str(startup_id))
                 
                 if full_startup_data:
                     # Extract the correct fields from the database
@@ -512,25 +511,31 @@ def display_chatbot(main_col):
         if send_button and user_input:
             # Add user message to chat history
             st.session_state.chat_history.append({"role": "user", "content": user_input})
-            
-            # Send query to backend
+
+            # Show the question and stream the answer into the chat as it is generated
+            with chat_container:
+                st.markdown(f"""
+                <div class="user-message-container">
+                    <div class="message-content">
+                        {user_input}
+                    </div>
+                </div>
+                """, unsafe_allow_html=True)
+                answer_placeholder = st.empty()
+
             with st.spinner('Searching database...'):
                 try:
-                    response = requests.post(
-                        f"{FAST_API_URL}/chat",
-                        json={"query": user_input}
+                    ai_response = stream_chat_response(
+                        FAST_API_URL,
+                        user_input,
+                        answer_placeholder,
+                        '<div class="assistant-message-container"><div class="message-content">{}</div></div>',
+                        convert_to_plain_text
                     )
-                    
-                    if response.status_code == 200:
-                        result = response.json()
-                        ai_response = result.get("response", "Sorry, I couldn't find an answer to your question.")
-                        
-                        # Add assistant message to chat history
-                        st.session_state.chat_history.append({"role": "assistant", "content": ai_response})
-                    else:
-                        error_msg = f"Error: {response.status_code} - {response.text}"
-                        st.session_state.chat_history.append({"role": "assistant", "content": error_msg})
-                        
+
+                    # Add assistant message to chat history
+                    st.session_state.chat_history.append({"role": "assistant", "content": ai_response})
+
                 except Exception as e:
                     error_msg = f"An error occurred: {str(e)}"
                     st.session_state.chat_history.append({"role": "assistant", "content": error_msg})
@@ -550,8 +555,8 @@ def display_startup_details(startup_id, main_col):
             st.session_state.selected_startup_id = None
             st.rerun()
             
-        # Use cached function to prevent repeated API calls
-        startup_data = fetch_startup_info(startup_id)
+        # Load the profile and all reports in one cached request
+        startup_data = fetch_startup_details(startup_id)
         if not startup_data:
             st.error("Failed to load startup data")
             return
@@ -698,7 +703,7 @@ def display_startup_details(startup_id, main_col):
             """, unsafe_allow_html=True)
             
             # Show the executive summary
-            summary_text = fetch_report("summary_report", startup_id)
+            summary_text = startup_data.get("SUMMARY_REPORT")
             if summary_text:
                 st.markdown("### Pitch Deck Summary")
                 st.info(summary_text)
@@ -743,7 +748,7 @@ def display_startup_details(startup_id, main_col):
                         if response.status_code == 200:
                             st.success(f"Status updated to: {new_status}")
                             # Clear cache to refresh the startup data
-                            fetch_startup_info.clear()
+                            fetch_startup_details.clear()
                             fetch_startups_by_status.clear()
                         else:
                             st.error(f"Failed to update status: {response.text}")
@@ -846,7 +851,7 @@ def display_startup_details(startup_id, main_col):
             st.markdown("### 🌐 Market Analysis")
             
             # Display the analytics report
-            analytics_text = fetch_report("analytics_report", startup_id) 
+            analytics_text = startup_data.get("ANALYTICS_REPORT")
             if analytics_text:
                 st.markdown("### Market Insights")
                 st.info(analytics_text)
@@ -857,7 +862,7 @@ def display_startup_details(startup_id, main_col):
             st.markdown("## 📈 Performance Visualizations")
             st.markdown("### Key Metrics and Competitive Analysis")
             
-            visualization_data = fetch_report("competitor_visualizations", startup_id)
+            visualization_data = startup_data.get("COMPETITOR_VISUALIZATIONS")
             
             if visualization_data:
                 try:
@@ -888,7 +893,7 @@ def display_startup_details(startup_id, main_col):
         # ---------- 🔴 News Trends Tab ----------
         with tab4:
             st.markdown("### 🗞️ News Trends")
-            news_text = fetch_report("news_report", startup_id)
+            news_text = startup_data.get("NEWS_REPORT")
             if news_text:
                 # Parse the news text - assuming format like "Title: URL"
                 st.markdown(news_text)